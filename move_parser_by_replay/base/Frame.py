@@ -1,12 +1,12 @@
 import numpy as np
-from typing import Optional, Self, Dict
+from typing import Optional, Self, List
 
 from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.base.Region import Region
 from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ClassifierForFrameMeterStates import ClassifierForFrameMeterStates
 from move_parser_by_replay.observers.frame_meter.ColorFrameMeter import ColorFrameMeter
 from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
-from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
 from move_parser_by_replay.util.OpenCVWrapper import OpenCVWrapper
 
 
@@ -14,12 +14,15 @@ class Frame:
     MINIMAL_PERCENTAGE_OF_PIXELS_TO_ACCOUNT_FOR_FRAME_VALUE = 0
     image_data: np.ndarray
     frame_number: Optional[int]
+    origin: Position
     height: int
     width: int
 
-    def __init__(self, frame_data: np.ndarray, frame_number: Optional[int] = None):
+    def __init__(self, frame_data: np.ndarray, frame_number: Optional[int] = None, origin: Optional[Position] = None):
         self.image_data = frame_data
         self.frame_number = frame_number
+        # Crops of a video frame keep the coordinates of the full frame, their image starts at the origin
+        self.origin = origin if origin is not None else Position(0, 0)
         self.height, self.width = frame_data.shape[:2]
 
     def shape(self) -> tuple:
@@ -34,18 +37,32 @@ class Frame:
     def get_image_data(self) -> np.ndarray:
         return self.image_data
 
+    def get_origin(self) -> Position:
+        return self.origin
+
     def get_specific_point(self, position: Position) -> np.ndarray:
-        return self.image_data[position.get_y(), position.get_x()]
+        return self.image_data[position.get_y() - self.origin.get_y(), position.get_x() - self.origin.get_x()]
 
     def get_subregion(self, region: Region) -> Self:
-        x1 = max(0, region.get_left_x())
-        y1 = max(0, region.get_top_y())
-        x2 = min(self.width, region.get_right_x())
-        y2 = min(self.height, region.get_bottom_y())
+        x1 = max(0, region.get_left_x() - self.origin.get_x())
+        y1 = max(0, region.get_top_y() - self.origin.get_y())
+        x2 = min(self.width, region.get_right_x() - self.origin.get_x())
+        y2 = min(self.height, region.get_bottom_y() - self.origin.get_y())
 
         subregion_data = self.image_data[y1:y2, x1:x2]
         return Frame(subregion_data, self.frame_number)
 
+    def get_crop_keeping_coordinates(self, regions: List[Region]) -> Self:
+        left_x = max(self.origin.get_x(), min(region.get_left_x() for region in regions))
+        top_y = max(self.origin.get_y(), min(region.get_top_y() for region in regions))
+        right_x = min(self.origin.get_x() + self.width, max(region.get_right_x() for region in regions))
+        bottom_y = min(self.origin.get_y() + self.height, max(region.get_bottom_y() for region in regions))
+
+        bounding_region = Region(left_x, top_y, max(0, right_x - left_x), max(0, bottom_y - top_y))
+        # Copy so the full decoded frame can be released while the crop is still in use
+        cropped_data = self.get_subregion(bounding_region).get_image_data().copy()
+        return Frame(cropped_data, self.frame_number, Position(left_x, top_y))
+
     def get_sub_region_around_specific_point(self, point: Position, width: int, height: int) -> Self:
         region = Region(point.get_x() - width // 2, point.get_y() - height // 2, width, height)
         return self.get_subregion(region)
@@ -55,27 +72,7 @@ class Frame:
         return ColorFrameMeter(color_as_tuple)
 
     def get_map_of_states_in_frame(self) -> LikelihoodMapForObservation[StateFrameMeter]:
-        states_detected: Dict[StateFrameMeter, int] = {}
-        for row in self.image_data:
-            for pixel in row:
-                color = ColorFrameMeter(tuple(pixel))
-                state = color.get_potential_state_frame_meter()
-                if state is None:
-                    weight_of_observation = 1
-                else:
-                    weight_of_observation = StateFrameMeterRegistry.get_weight(state.get_state_type(),
-                                                                               state.get_temporal_state())
-                if state in states_detected:
-                    states_detected[state] += weight_of_observation
-                else:
-                    states_detected[state] = weight_of_observation
-
-        likelihood_map = LikelihoodMapForObservation(total_weight=0)
-        for state, count in states_detected.items():
-            likelihood_map.add_observation(state, weight=count)
-        if likelihood_map.get_total_weight() == 0:
-            likelihood_map.add_observation(None, 1)
-        return likelihood_map
+        return ClassifierForFrameMeterStates.get_map_of_states_in_image(self.image_data)
 
     def show(self) -> None:
         OpenCVWrapper.show_image(self.image_data)
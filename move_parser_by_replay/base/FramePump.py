@@ -0,0 +1,48 @@
+from typing import List
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
+from move_parser_by_replay.base.Video import Video
+
+
+class FramePump:
+    video: Video
+    subscribers: List[FramePumpSubscriberInterface]
+
+    def __init__(self, video: Video):
+        self.video = video
+        self.subscribers = []
+
+    def subscribe(self, subscriber: FramePumpSubscriberInterface) -> None:
+        self.subscribers.append(subscriber)
+
+    def get_subscribers(self) -> List[FramePumpSubscriberInterface]:
+        return self.subscribers
+
+    def run(self) -> None:
+        for subscriber in self.subscribers:
+            subscriber.start_receiving_frames()
+
+        frames_iterator = self.video.get_frames_by_condition_as_iterator(self.is_frame_needed_by_any_subscriber,
+                                                                         self.are_all_subscribers_done)
+        for frame in frames_iterator:
+            self.send_frame_to_subscribers(frame)
+
+        for subscriber in self.subscribers:
+            subscriber.finish_receiving_frames()
+
+    def is_frame_needed_by_any_subscriber(self, frame_number: int) -> bool:
+        return any(subscriber.is_frame_needed(frame_number) for subscriber in self.subscribers)
+
+    def are_all_subscribers_done(self, frame_number: int) -> bool:
+        return all(subscriber.is_done_with_frames(frame_number) for subscriber in self.subscribers)
+
+    def send_frame_to_subscribers(self, frame: Frame) -> None:
+        frame_number = frame.get_frame_number()
+        for subscriber in self.subscribers:
+            if subscriber.is_frame_needed(frame_number):
+                regions_of_interest = subscriber.get_regions_of_interest()
+                if regions_of_interest is None:
+                    subscriber.receive_frame(frame)
+                else:
+                    subscriber.receive_frame(frame.get_crop_keeping_coordinates(regions_of_interest))
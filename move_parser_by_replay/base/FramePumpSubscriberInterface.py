@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Region import Region
+
+
+class FramePumpSubscriberInterface(ABC):
+    def start_receiving_frames(self) -> None:
+        pass
+
+    @abstractmethod
+    def is_frame_needed(self, frame_number: int) -> bool:
+        pass
+
+    @abstractmethod
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        pass
+
+    def get_regions_of_interest(self) -> Optional[List[Region]]:
+        return None
+
+    @abstractmethod
+    def receive_frame(self, frame: Frame) -> None:
+        pass
+
+    def finish_receiving_frames(self) -> None:
+        pass
@@ -1,7 +1,8 @@
 import cv2
 import os
-from typing import Iterator, Optional, List, Dict
+from typing import Iterator, Optional, List, Dict, Iterable, Callable
 from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Region import Region
 
 
 def validate_file_exists(file_path):
@@ -10,6 +11,10 @@ def validate_file_exists(file_path):
 
 
 class Video:
+    NO_KEYFRAME_INFORMATION = -1
+    PACKETS_TO_INSPECT_FOR_KEYFRAMES = 600
+    FRAMES_OF_OVERHEAD_FOR_SEEKING = 5
+
     file_path: str
     capture: cv2.VideoCapture
     frame_count: int
@@ -17,8 +22,9 @@ class Video:
     width: int
     height: int
     duration: float
+    keyframe_interval: Optional[int]
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, keyframe_interval: Optional[int] = None):
         self.file_path = file_path
 
         validate_file_exists(file_path)
@@ -32,6 +38,7 @@ class Video:
         self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
         self.duration = self.frame_count / self.fps if self.fps > 0 else 0
+        self.keyframe_interval = keyframe_interval
 
     def get_frame_from_position(self, frame_number: int) -> Optional[Frame]:
         if frame_number < 0 or frame_number >= self.frame_count:
@@ -45,33 +52,116 @@ class Video:
 
         return Frame(frame_data, frame_number)
 
-    def get_frames_as_iterator(self) -> Iterator[Frame]:
+    def get_frames_as_iterator(self, gap_size: int = 1) -> Iterator[Frame]:
+        # Validated here, so the error is raised by the call and not by the first iteration
+        if gap_size < 1:
+            raise ValueError(f"Gap size must be at least 1, got {gap_size}")
+        return self.get_frames_with_gap_as_iterator(gap_size)
+
+    def get_frames_with_gap_as_iterator(self, gap_size: int) -> Iterator[Frame]:
         self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
         frame_number = 0
         still_reading = True
         while still_reading:
-            still_reading, frame_data = self.capture.read()
-
-            if still_reading:
-                yield Frame(frame_data, frame_number)
-                frame_number += 1
+            if frame_number % gap_size == 0:
+                still_reading, frame_data = self.capture.read()
+                if still_reading:
+                    yield Frame(frame_data, frame_number)
+            else:
+                # Skipped frames are only grabbed, never converted to an image
+                still_reading = self.capture.grab()
+            frame_number += 1
 
-    def get_frames_from_static_list(self, needed_frames: List[int]) -> Dict[int, Frame]:
+    def get_frames_by_condition_as_iterator(self, is_frame_needed: Callable[[int], bool],
+                                            is_reading_finished: Callable[[int], bool]) -> Iterator[Frame]:
         self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
         frame_number = 0
         still_reading = True
-        dict_of_frames = {}
-        max_frame = max(needed_frames)
-        while still_reading and frame_number <= max_frame:
-            still_reading, frame_data = self.capture.read()
-
-            if still_reading and frame_number in needed_frames:
-                dict_of_frames[frame_number] = Frame(frame_data, frame_number)
+        while still_reading and not is_reading_finished(frame_number):
+            if is_frame_needed(frame_number):
+                still_reading, frame_data = self.capture.read()
+                if still_reading:
+                    yield Frame(frame_data, frame_number)
+            else:
+                still_reading = self.capture.grab()
             frame_number += 1
+
+    def get_frames_from_static_list(self, needed_frames: List[int],
+                                    regions_of_interest: Optional[List[Region]] = None) -> Dict[int, Frame]:
+        dict_of_frames = {}
+        for frame in self.get_frames_from_static_list_as_iterator(needed_frames, regions_of_interest):
+            dict_of_frames[frame.get_frame_number()] = frame
         return dict_of_frames
 
+    def get_frames_from_static_list_as_iterator(self, needed_frames: Iterable[int],
+                                                regions_of_interest: Optional[List[Region]] = None,
+                                                seek_to_first_frame: bool = False) -> Iterator[Frame]:
+        frames_to_yield = sorted(set(needed_frames))
+
+        next_frame_to_decode = frames_to_yield[0] if seek_to_first_frame and len(frames_to_yield) > 0 else 0
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, next_frame_to_decode)
+
+        for frame_number in frames_to_yield:
+            if frame_number < next_frame_to_decode:
+                continue
+
+            if self.is_seeking_cheaper_than_skipping(frame_number - next_frame_to_decode):
+                self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                next_frame_to_decode = frame_number
+
+            while next_frame_to_decode < frame_number:
+                if not self.capture.grab():
+                    return
+                next_frame_to_decode += 1
+
+            success, frame_data = self.capture.read()
+            if not success:
+                return
+            next_frame_to_decode += 1
+
+            frame = Frame(frame_data, frame_number)
+            if regions_of_interest is not None:
+                frame = frame.get_crop_keeping_coordinates(regions_of_interest)
+            yield frame
+
+    def is_seeking_cheaper_than_skipping(self, frames_to_skip: int) -> bool:
+        # A seek decodes from the previous keyframe, so it only pays off when it jumps over at least one keyframe
+        keyframe_interval = self.get_keyframe_interval()
+        if keyframe_interval == self.NO_KEYFRAME_INFORMATION:
+            return False
+        return frames_to_skip > keyframe_interval + self.FRAMES_OF_OVERHEAD_FOR_SEEKING
+
+    def get_keyframe_interval(self) -> int:
+        if self.keyframe_interval is None:
+            self.keyframe_interval = self.estimate_keyframe_interval()
+        return self.keyframe_interval
+
+    def estimate_keyframe_interval(self) -> int:
+        # Raw packets are read without decoding them, only to know which ones are keyframes
+        raw_capture = cv2.VideoCapture(self.file_path)
+        try:
+            if not raw_capture.isOpened() or not raw_capture.set(cv2.CAP_PROP_FORMAT, -1):
+                return self.NO_KEYFRAME_INFORMATION
+
+            keyframe_positions = []
+            for packet_number in range(self.PACKETS_TO_INSPECT_FOR_KEYFRAMES):
+                if not raw_capture.grab():
+                    break
+                if raw_capture.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME) > 0:
+                    keyframe_positions.append(packet_number)
+        finally:
+            raw_capture.release()
+
+        if len(keyframe_positions) < 2:
+            return self.NO_KEYFRAME_INFORMATION
+        gaps_between_keyframes = [second - first for first, second in zip(keyframe_positions, keyframe_positions[1:])]
+        return max(gaps_between_keyframes)
+
+    def get_file_path(self) -> str:
+        return self.file_path
+
     def get_frame_count(self) -> int:
         return self.frame_count
 
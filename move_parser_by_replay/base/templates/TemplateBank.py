@@ -0,0 +1,132 @@
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Self, Type
+
+import numpy as np
+
+from move_parser_by_replay.base.templates.TemplateImage import TemplateImage
+
+
+class TemplateBank:
+    DEFAULT_CACHE_FOLDER = './data/cache/'
+    NAMES_KEY = 'names'
+    IMAGE_KEY = 'image_{}'
+    ALPHA_KEY = 'alpha_{}'
+
+    _banks_by_folder: Dict[str, Self] = {}
+    _lock = threading.Lock()
+
+    names: List[str]
+    images: Dict[str, np.ndarray]
+    alphas: Dict[str, Optional[np.ndarray]]
+    templates_by_class: Dict[Type, Dict[str, TemplateImage]]
+
+    def __init__(self, names: List[str], images: Dict[str, np.ndarray], alphas: Dict[str, Optional[np.ndarray]]):
+        self.names = names
+        self.images = images
+        self.alphas = alphas
+        self.templates_by_class = {}
+
+    def get_names(self) -> List[str]:
+        return self.names
+
+    def get_templates(self, class_from_template_image: Type) -> Dict[str, TemplateImage]:
+        # Templates of the same class are shared, so what they cache (preprocessed variants) is shared as well
+        if class_from_template_image not in self.templates_by_class:
+            self.templates_by_class[class_from_template_image] = {
+                name: class_from_template_image.from_arrays(name, self.images[name], self.alphas[name])
+                for name in self.names}
+        return self.templates_by_class[class_from_template_image]
+
+    @classmethod
+    def get_bank(cls, folder: str, cache_folder: Optional[str] = DEFAULT_CACHE_FOLDER) -> Self:
+        key = os.path.abspath(folder)
+        if key not in cls._banks_by_folder:
+            with cls._lock:
+                if key not in cls._banks_by_folder:
+                    cls._banks_by_folder[key] = cls.load_or_build(folder, cache_folder)
+        return cls._banks_by_folder[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._banks_by_folder = {}
+
+    @staticmethod
+    def get_template_files(folder: str) -> Dict[str, str]:
+        if not os.path.exists(folder):
+            raise FileNotFoundError(f"Templates directory not found: {folder}")
+
+        template_files = {}
+        for file_name in os.listdir(folder):
+            file_path = os.path.join(folder, file_name)
+            if os.path.isfile(file_path):
+                template_files[os.path.splitext(file_name)[0]] = file_path
+        return template_files
+
+    @staticmethod
+    def get_signature_of_files(template_files: Dict[str, str]) -> str:
+        signature = hashlib.sha1(repr(TemplateImage.SCALE_FACTOR).encode())
+        for name in sorted(template_files):
+            signature.update(name.encode())
+            with open(template_files[name], 'rb') as template_file:
+                signature.update(hashlib.sha1(template_file.read()).digest())
+        return signature.hexdigest()[:16]
+
+    @classmethod
+    def get_cache_path(cls, template_files: Dict[str, str], cache_folder: str) -> str:
+        return os.path.join(cache_folder, 'templates_{}.npz'.format(cls.get_signature_of_files(template_files)))
+
+    @classmethod
+    def build(cls, template_files: Dict[str, str]) -> Self:
+        images = {}
+        alphas = {}
+        for name, file_path in template_files.items():
+            images[name], alphas[name] = TemplateImage.read_image_and_alpha(file_path)
+        return cls(list(template_files.keys()), images, alphas)
+
+    @classmethod
+    def load_or_build(cls, folder: str, cache_folder: Optional[str] = DEFAULT_CACHE_FOLDER) -> Self:
+        template_files = cls.get_template_files(folder)
+        if cache_folder is None:
+            return cls.build(template_files)
+
+        # The cache is keyed by the content of the templates, so editing any of them builds a new one
+        cache_path = cls.get_cache_path(template_files, cache_folder)
+        if os.path.exists(cache_path):
+            return cls.load(cache_path)
+
+        bank = cls.build(template_files)
+        bank.save(cache_path)
+        return bank
+
+    def save(self, file_path: str) -> None:
+        folder = os.path.dirname(file_path)
+        if folder != '':
+            os.makedirs(folder, exist_ok=True)
+
+        arrays = {self.NAMES_KEY: np.array(self.names)}
+        for index, name in enumerate(self.names):
+            arrays[self.IMAGE_KEY.format(index)] = self.images[name]
+            if self.alphas[name] is not None:
+                arrays[self.ALPHA_KEY.format(index)] = self.alphas[name]
+
+        temporary_path = file_path + '.tmp.npz'
+        np.savez(temporary_path, **arrays)
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> Self:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Template bank not found: {file_path}")
+
+        with np.load(file_path) as arrays:
+            names = [str(name) for name in arrays[cls.NAMES_KEY]]
+            images = {}
+            alphas = {}
+            for index, name in enumerate(names):
+                images[name] = arrays[cls.IMAGE_KEY.format(index)]
+                alpha_key = cls.ALPHA_KEY.format(index)
+                alphas[name] = arrays[alpha_key] if alpha_key in arrays.files else None
+        return cls(names, images, alphas)
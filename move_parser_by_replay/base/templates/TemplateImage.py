@@ -1,22 +1,54 @@
-from typing import Self, Optional
+from typing import Self, Optional, Dict, Tuple
 
 import cv2
 import os
 
 import numpy as np
 
+from move_parser_by_replay.util.ImagePreprocessorForTemplateMatching import ImagePreprocessorForTemplateMatching
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+
 
 class TemplateImage:
+    SCALE_FACTOR = 1.1
+
     name: str
     image: np.ndarray
+    alpha: Optional[np.ndarray]
+    preprocessed_images: Dict[PreprocessingForTemplateMatching, np.ndarray]
+    masks: Dict[PreprocessingForTemplateMatching, Optional[np.ndarray]]
 
     def __init__(self, path_file: str):
         file_name = os.path.basename(path_file)
-        self.name = os.path.splitext(file_name)[0]
+        image, alpha = self.read_image_and_alpha(path_file)
+        self.initialise(os.path.splitext(file_name)[0], image, alpha)
+
+    @classmethod
+    def from_arrays(cls, name: str, image: np.ndarray, alpha: Optional[np.ndarray]) -> Self:
+        template = cls.__new__(cls)
+        template.initialise(name, image, alpha)
+        return template
+
+    def initialise(self, name: str, image: np.ndarray, alpha: Optional[np.ndarray]) -> None:
+        self.name = name
+        self.image = image
+        self.alpha = alpha
+        self.preprocessed_images = {}
+        self.masks = {}
+
+    @classmethod
+    def read_image_and_alpha(cls, path_file: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
         open_cv_image = cv2.imread(path_file, cv2.IMREAD_UNCHANGED)
         changed_image_to_video_format = cv2.cvtColor(open_cv_image, cv2.COLOR_BGRA2BGR)
-        scaled_image = cv2.resize(changed_image_to_video_format, None, fx=1.1, fy=1.1, interpolation=cv2.INTER_LINEAR)
-        self.image = np.asarray(scaled_image)
+        scaled_image = cv2.resize(changed_image_to_video_format, None, fx=cls.SCALE_FACTOR, fy=cls.SCALE_FACTOR,
+                                  interpolation=cv2.INTER_LINEAR)
+        image = np.asarray(scaled_image)
+
+        alpha = None
+        if open_cv_image.ndim == 3 and open_cv_image.shape[2] == 4:
+            alpha = cv2.resize(open_cv_image[:, :, 3], (image.shape[1], image.shape[0]),
+                               interpolation=cv2.INTER_LINEAR)
+        return image, alpha
 
     def get_name(self) -> str:
         return self.name
@@ -24,6 +56,21 @@ class TemplateImage:
     def get_image(self) -> np.ndarray:
         return self.image
 
+    def get_alpha(self) -> Optional[np.ndarray]:
+        return self.alpha
+
+    def get_preprocessed_image(self, preprocessing: PreprocessingForTemplateMatching) -> np.ndarray:
+        if preprocessing not in self.preprocessed_images:
+            self.preprocessed_images[preprocessing] = ImagePreprocessorForTemplateMatching.preprocess_image(
+                self.image, preprocessing)
+        return self.preprocessed_images[preprocessing]
+
+    def get_mask(self, preprocessing: PreprocessingForTemplateMatching) -> Optional[np.ndarray]:
+        if preprocessing not in self.masks:
+            self.masks[preprocessing] = ImagePreprocessorForTemplateMatching.get_mask_from_alpha(self.alpha,
+                                                                                                 preprocessing)
+        return self.masks[preprocessing]
+
     def __repr__(self):
         return self.name
 
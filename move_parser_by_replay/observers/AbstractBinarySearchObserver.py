@@ -1,15 +1,24 @@
 import bisect
 from abc import abstractmethod, ABC
-from typing import List
+from typing import List, Set, Optional, Iterable, Iterator
 
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
 from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.WindowForBinarySearch import WindowForBinarySearch
 from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
 
 
-class AbstractBinarySearchObserver(ABC):
+class AbstractBinarySearchObserver(FramePumpSubscriberInterface, ABC):
+    # Frames further apart than this never merge, so the search always goes deeper between them
+    MAXIMUM_DISTANCE_BETWEEN_FRAMES_TO_MERGE: Optional[int] = None
+
     window_to_stop_searching: int
     maximum_frame_to_look_at: int
     frame_numbers: List[int]
+    observed_frame_numbers: Set[int]
+    frames_to_prefetch: Set[int]
+    last_frame_to_prefetch: int
     exact_final_list: List
     video: Video
 
@@ -17,6 +26,9 @@ class AbstractBinarySearchObserver(ABC):
         self.window_to_stop_searching = 60
         self.maximum_frame_to_look_at = -1
         self.frame_numbers = []
+        self.observed_frame_numbers = set()
+        self.frames_to_prefetch = set()
+        self.last_frame_to_prefetch = -1
         self.exact_final_list = []
         self.video = video
 
@@ -30,55 +42,140 @@ class AbstractBinarySearchObserver(ABC):
         self.maximum_frame_to_look_at = max_frame
 
     def apply_observations_in_frame(self, frame_number: int):
-        self.apply_specific_observations_in_frame(frame_number)
+        if frame_number not in self.observed_frame_numbers:
+            self.apply_specific_observations_in_frame(frame_number)
+            self.observed_frame_numbers.add(frame_number)
 
         bisect.insort(self.frame_numbers, frame_number)
 
         return self.get_saved_observation_in_frame(frame_number)
 
-    @abstractmethod
     def apply_specific_observations_in_frame(self, frame_number: int):
+        frame = self.video.get_frame_from_position(frame_number)
+        self.apply_specific_observations_in_given_frame(frame, frame_number)
+
+    @abstractmethod
+    def apply_specific_observations_in_given_frame(self, frame: Frame, frame_number: int):
         pass
 
+    def apply_specific_observations_in_given_frames(self, frames: Iterable[Frame]) -> None:
+        for frame in frames:
+            self.apply_specific_observations_in_given_frame(frame, frame.get_frame_number())
+
     @abstractmethod
     def get_saved_observation_in_frame(self, frame_number: int):
         pass
 
+    def apply_observations_in_frames(self, frame_numbers: List[int]) -> None:
+        frames_to_decode = [frame_number for frame_number in frame_numbers
+                            if frame_number not in self.observed_frame_numbers]
+        # A single ordered pass over the video instead of one seek per frame
+        frames_decoded: List[int] = []
+        self.apply_specific_observations_in_given_frames(
+            self.get_frames_recording_their_numbers(frames_to_decode, frames_decoded))
+        # Frames the pass could not decode are not observed, so they are read again one by one below
+        self.observed_frame_numbers.update(frames_decoded)
+
+        for frame_number in frame_numbers:
+            self.apply_observations_in_frame(frame_number)
+
+    def get_frames_recording_their_numbers(self, frame_numbers: List[int], frames_decoded: List[int]) -> \
+            Iterator[Frame]:
+        for frame in self.video.get_frames_from_static_list_as_iterator(frame_numbers):
+            frames_decoded.append(frame.get_frame_number())
+            yield frame
+
     def apply_base_observations_in_window(self, start_frame: int, end_frame: int) -> None:
-        middle_frame = (start_frame + end_frame) // 2
+        first_window = WindowForBinarySearch(start_frame, end_frame)
+
+        # The windows of a level are disjoint, so observing all their middle frames at once does not change the
+        # neighbours of any of them
+        windows_in_level = [first_window]
+        while len(windows_in_level) > 0:
+            self.apply_observations_in_frames([window.get_middle_frame() for window in windows_in_level])
+
+            windows_in_next_level = []
+            for window in windows_in_level:
+                self.set_merged_lists_around_middle_frame(window)
+                windows_in_next_level.extend(window.create_children_to_search(self.window_to_stop_searching))
+            windows_in_level = windows_in_next_level
 
-        self.apply_observations_in_frame(middle_frame)
+        self.merge_windows_in_depth_first_order(first_window)
 
+    def set_merged_lists_around_middle_frame(self, window: WindowForBinarySearch) -> None:
+        middle_frame = window.get_middle_frame()
         middle_frame_index = bisect.bisect_left(self.frame_numbers, middle_frame)
         previous_frame = self.frame_numbers[middle_frame_index - 1]
         next_frame = self.frame_numbers[middle_frame_index + 1]
 
-        merged_list_first_window = self.get_merge_observation_in_two_frames(previous_frame, middle_frame)
-        merged_list_second_window = self.get_merge_observation_in_two_frames(middle_frame, next_frame)
-        if merged_list_first_window is not None:
-            self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
-                                                                   merged_list_first_window)
-        if merged_list_second_window is not None:
-            self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
-                                                                   merged_list_second_window)
-
-        continue_searching = end_frame - start_frame >= self.window_to_stop_searching
-        if continue_searching and merged_list_first_window is None:
-            self.apply_base_observations_in_window(start_frame, middle_frame - 1)
-        if continue_searching and merged_list_second_window is None:
-            self.apply_base_observations_in_window(middle_frame + 1, end_frame)
+        window.set_merged_lists(self.get_merge_observation_in_two_frames(previous_frame, middle_frame),
+                                self.get_merge_observation_in_two_frames(middle_frame, next_frame))
+
+    def merge_windows_in_depth_first_order(self, first_window: WindowForBinarySearch) -> None:
+        # Merging is not commutative, so the lists are merged in the order of the recursive search
+        windows_to_merge = [first_window]
+        while len(windows_to_merge) > 0:
+            window = windows_to_merge.pop()
+            if window.get_merged_list_first_window() is not None:
+                self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
+                                                                       window.get_merged_list_first_window())
+            if window.get_merged_list_second_window() is not None:
+                self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
+                                                                       window.get_merged_list_second_window())
+            windows_to_merge.extend(reversed(window.get_children()))
 
     @abstractmethod
     def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> List:
         pass
 
-    def analyse_full_video(self) -> None:
+    def get_final_frame(self) -> int:
         frame_count = self.video.get_frame_count()
 
-        final_frame = frame_count if self.maximum_frame_to_look_at == -1 else self.maximum_frame_to_look_at
+        return frame_count if self.maximum_frame_to_look_at == -1 else self.maximum_frame_to_look_at
+
+    def get_frames_probed_in_any_case(self) -> List[int]:
+        final_frame = self.get_final_frame()
+        frames_probed = [0, final_frame - 5]
+        if self.MAXIMUM_DISTANCE_BETWEEN_FRAMES_TO_MERGE is None:
+            return frames_probed
+
+        windows_to_search = [(0, final_frame - 1)]
+        while len(windows_to_search) > 0:
+            start_frame, end_frame = windows_to_search.pop()
+            middle_frame = (start_frame + end_frame) // 2
+            frames_probed.append(middle_frame)
+
+            if end_frame - start_frame >= self.window_to_stop_searching:
+                if middle_frame - start_frame > self.MAXIMUM_DISTANCE_BETWEEN_FRAMES_TO_MERGE:
+                    windows_to_search.append((start_frame, middle_frame - 1))
+                if min(end_frame + 1, final_frame - 5) - middle_frame > self.MAXIMUM_DISTANCE_BETWEEN_FRAMES_TO_MERGE:
+                    windows_to_search.append((middle_frame + 1, end_frame))
+
+        return sorted(set(frames_probed))
+
+    def start_receiving_frames(self) -> None:
+        self.frames_to_prefetch = set(self.get_frames_probed_in_any_case())
+        self.last_frame_to_prefetch = max(self.frames_to_prefetch)
+
+    def is_frame_needed(self, frame_number: int) -> bool:
+        return frame_number in self.frames_to_prefetch and frame_number not in self.observed_frame_numbers
+
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        return frame_number > self.last_frame_to_prefetch
+
+    def receive_frame(self, frame: Frame) -> None:
+        frame_number = frame.get_frame_number()
+        self.apply_specific_observations_in_given_frame(frame, frame_number)
+        self.observed_frame_numbers.add(frame_number)
+
+    def finish_receiving_frames(self) -> None:
+        # Probes that depend on the result of merges are read level by level from the video
+        self.analyse_full_video()
+
+    def analyse_full_video(self) -> None:
+        final_frame = self.get_final_frame()
 
-        self.apply_observations_in_frame(0)
-        self.apply_observations_in_frame(final_frame - 5)
+        self.apply_observations_in_frames([0, final_frame - 5])
         self.apply_base_observations_in_window(0, final_frame - 1)
 
         self.clean_final_list_if_needed()
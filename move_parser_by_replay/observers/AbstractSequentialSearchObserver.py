@@ -1,26 +1,77 @@
+import copy
+import multiprocessing
+import os
 from abc import abstractmethod, ABC
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple, Any, Callable, Self
 
 from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePump import FramePump
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
+from move_parser_by_replay.base.Region import Region
 from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.util.ListWithMutableTail import ListWithMutableTail
 
 
-class AbstractSequentialSearchObserver(ABC):
+class AbstractSequentialSearchObserver(FramePumpSubscriberInterface, ABC):
     DEFAULT_GAP_SIZE = 20
+    # While nothing changes the gap doubles, up to this many times the gap size
+    MAXIMUM_GAP_SIZE_FACTOR = 4
+    # While merges overlap too little the gap halves, down to the gap size divided by this
+    MINIMUM_GAP_SIZE_DIVISOR = 4
+    # Observations add about one item per frame. One that should share this many items with the final list at that
+    # pace, but shares fewer, moves too fast for the gap. 0 never narrows the gap
+    MINIMUM_OVERLAP_TO_MERGE = 0
+    CHUNKS_PER_PROCESS = 4
     FRAMES_TO_REMOVE_FROM_TAIL_FOR_NUMBERS = 0
+    # Merges only change the end of the final list, as long as the longest list of an observation
+    MAXIMUM_LENGTH_OF_MUTABLE_TAIL = ListWithMutableTail.DEFAULT_MAXIMUM_TAIL_LENGTH
+
+    # Each worker of the pool keeps the observer it was initialised with
+    _observer_in_worker: Optional['AbstractSequentialSearchObserver'] = None
 
     gap_size: int
     maximum_frame_to_look_at: int
     frames: Dict[int, Frame]
+    frames_to_look: List[int]
+    frames_to_look_as_set: Set[int]
+    last_frame_changed: int
+    last_frame_merged: Optional[int]
+    is_last_overlap_too_small: bool
+    is_last_overlap_enough_for_double_gap: bool
     exact_final_list: List
+    final_list_being_merged: ListWithMutableTail
+    sink_for_final_items: Optional[Callable[[List], None]]
+    items_waiting_for_sink: List
     video: Video
+    is_gap_size_adaptive: bool
+    current_gap_size: int
+    next_frame_to_look: int
+    last_frame_looked: Optional[int]
+    frames_skipped: Dict[int, Frame]
 
     def __init__(self, video: Video, gap_size: int = DEFAULT_GAP_SIZE):
         self.gap_size = gap_size
         self.maximum_frame_to_look_at = -1
         self.exact_final_list = []
+        self.sink_for_final_items = None
+        self.items_waiting_for_sink = []
+        self.final_list_being_merged = ListWithMutableTail(self.MAXIMUM_LENGTH_OF_MUTABLE_TAIL)
         self.video = video
         self.frames = {}
+        self.frames_to_look = []
+        self.frames_to_look_as_set = set()
+        self.last_frame_changed = 0
+        self.last_frame_merged = None
+        self.is_last_overlap_too_small = False
+        self.is_last_overlap_enough_for_double_gap = True
+        self.is_gap_size_adaptive = False
+        self.current_gap_size = gap_size
+        self.next_frame_to_look = 0
+        self.last_frame_looked = None
+        self.frames_skipped = {}
+
+    def set_adaptive_gap_size(self, is_gap_size_adaptive: bool) -> None:
+        self.is_gap_size_adaptive = is_gap_size_adaptive
 
     def get_exact_final_list(self) -> List:
         return self.exact_final_list
@@ -28,6 +79,27 @@ class AbstractSequentialSearchObserver(ABC):
     def set_maximum_frame_to_look_at(self, max_frame: int) -> None:
         self.maximum_frame_to_look_at = max_frame
 
+    def set_sink_for_final_items(self, sink: Optional[Callable[[List], None]]) -> None:
+        # Items that can no longer be merged are cleaned and given to the sink instead of being kept until the end.
+        # The sink receives the start of the list that would be final without it, the final list has the rest
+        self.sink_for_final_items = sink
+        self.final_list_being_merged.set_sink(self.get_sink_for_frozen_items())
+
+    def get_sink_for_frozen_items(self) -> Optional[Callable[[List], None]]:
+        if self.sink_for_final_items is None:
+            return None
+        return self.receive_frozen_items
+
+    def receive_frozen_items(self, items: List) -> None:
+        self.items_waiting_for_sink.extend(self.get_items_cleaned_one_by_one(items))
+        # The cleaning of some items depends on the next ones, so those wait until it cannot change any more
+        number_of_items_ready = self.get_number_of_items_ready_for_sink(self.items_waiting_for_sink)
+        if number_of_items_ready == 0:
+            return
+        items_ready = self.items_waiting_for_sink[:number_of_items_ready]
+        self.items_waiting_for_sink = self.items_waiting_for_sink[number_of_items_ready:]
+        self.sink_for_final_items(self.get_items_cleaned_together(items_ready))
+
     def apply_observations_in_frame(self, frame_number: int):
         self.apply_specific_observations_in_frame(frame_number)
 
@@ -41,6 +113,13 @@ class AbstractSequentialSearchObserver(ABC):
     def get_saved_observation_in_frame(self, frame_number: int):
         pass
 
+    @abstractmethod
+    def set_saved_observation_in_frame(self, frame_number: int, observation) -> None:
+        pass
+
+    def forget_observation_in_frame(self, frame_number: int) -> None:
+        pass
+
     @abstractmethod
     def get_exact_list_from_frame(self, frame_number: int):
         pass
@@ -49,38 +128,234 @@ class AbstractSequentialSearchObserver(ABC):
     def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> List:
         pass
 
+    def is_observation_changed_between_frames(self, first_frame: int, second_frame: int) -> bool:
+        # Without a way to compare observations every frame is considered a change, so the gap never grows
+        return True
+
     def get_frame_from_position(self, frame_number: int) -> Frame:
         return self.frames[frame_number]
 
-    def analyse_full_video(self) -> None:
+    def get_regions_of_interest(self) -> Optional[List[Region]]:
+        return None
+
+    def get_frames_to_look(self) -> List[int]:
         frame_count = self.video.get_frame_count()
 
         final_frame = frame_count if self.maximum_frame_to_look_at == -1 else self.maximum_frame_to_look_at
 
-        frames_to_look = [self.gap_size * i for i in range(0, (final_frame - 5) // self.gap_size)]
+        return [self.gap_size * i for i in range(0, (final_frame - 5) // self.gap_size)]
+
+    def get_minimum_gap_size(self) -> int:
+        return max(1, self.gap_size // self.MINIMUM_GAP_SIZE_DIVISOR)
+
+    def analyse_full_video(self) -> None:
+        if self.is_gap_size_adaptive:
+            # The frames to look at depend on the observations, so they are chosen while the video is read
+            frame_pump = FramePump(self.video)
+            frame_pump.subscribe(self)
+            frame_pump.run()
+            return
+
+        self.start_receiving_frames()
+
+        frames_iterator = self.video.get_frames_from_static_list_as_iterator(self.frames_to_look,
+                                                                              self.get_regions_of_interest())
+        for frame in frames_iterator:
+            self.receive_frame(frame)
+
+        self.finish_receiving_frames()
+
+    def start_receiving_frames(self) -> None:
+        self.frames_to_look = self.get_frames_to_look()
+        self.frames_to_look_as_set = set(self.frames_to_look)
+        self.last_frame_changed = 0
+        self.last_frame_merged = None
+        self.is_last_overlap_too_small = False
+        self.is_last_overlap_enough_for_double_gap = True
+        self.current_gap_size = self.gap_size
+        self.next_frame_to_look = 0
+        self.last_frame_looked = None
+        self.frames_skipped = {}
+        self.items_waiting_for_sink = []
+        self.final_list_being_merged = ListWithMutableTail(self.MAXIMUM_LENGTH_OF_MUTABLE_TAIL,
+                                                           self.get_sink_for_frozen_items())
+
+    def is_frame_needed(self, frame_number: int) -> bool:
+        if not self.is_gap_size_adaptive:
+            return frame_number in self.frames_to_look_as_set
+
+        if len(self.frames_to_look) == 0 or frame_number > self.frames_to_look[-1]:
+            return False
+        if frame_number >= self.next_frame_to_look or frame_number == self.frames_to_look[-1]:
+            return True
+        # Inside a wide gap, the frames at the normal gap are kept, to observe them if something changed meanwhile
+        return self.last_frame_looked is not None and (frame_number - self.last_frame_looked) % self.gap_size == 0
 
-        self.frames = self.video.get_frames_from_static_list(frames_to_look)
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        return len(self.frames_to_look) == 0 or frame_number > self.frames_to_look[-1]
 
-        last_frame_changed = 0
-        for frame_number in frames_to_look:
-            is_first_column_from_list_to_merge_0 = False
+    def receive_frame(self, frame: Frame) -> None:
+        frame_number = frame.get_frame_number()
+        # Only the frame being analysed is kept alive, so memory does not grow with the length of the video
+        if self.is_gap_size_adaptive:
+            self.receive_frame_with_adaptive_gap(frame)
+            return
+
+        self.frames = {frame_number: frame}
+        self.apply_observations_in_frame(frame_number)
+        self.merge_observation_in_frame(frame_number)
+
+    def receive_frame_with_adaptive_gap(self, frame: Frame) -> None:
+        frame_number = frame.get_frame_number()
+        # Every frame is decoded when the video is read in order, the frames kept inside a wide gap only save their
+        # classification when nothing changed meanwhile
+        if frame_number < self.next_frame_to_look and frame_number != self.frames_to_look[-1]:
+            self.frames_skipped[frame_number] = frame
+            return
+
+        self.frames = {frame_number: frame}
+        self.apply_observations_in_frame(frame_number)
+        is_observation_changed = self.last_frame_looked is None or \
+            self.is_observation_changed_between_frames(self.last_frame_looked, frame_number)
+        if is_observation_changed:
+            self.apply_and_merge_observations_in_frames_skipped()
+        self.frames_skipped = {}
+
+        self.frames = {frame_number: frame}
+        self.merge_observation_in_frame(frame_number)
+        if not is_observation_changed:
+            self.current_gap_size = min(self.gap_size * self.MAXIMUM_GAP_SIZE_FACTOR, self.current_gap_size * 2)
+        elif self.is_last_overlap_too_small:
+            # The observations move faster than the gap allows to align them, so the next one is looked at sooner
+            self.current_gap_size = max(self.get_minimum_gap_size(), min(self.gap_size, self.current_gap_size) // 2)
+        elif self.is_last_overlap_enough_for_double_gap:
+            self.current_gap_size = min(self.gap_size, self.current_gap_size * 2)
+        else:
+            self.current_gap_size = min(self.gap_size, self.current_gap_size)
+        self.last_frame_looked = frame_number
+        self.next_frame_to_look = frame_number + self.current_gap_size
+
+    def apply_and_merge_observations_in_frames_skipped(self) -> None:
+        for frame_number in sorted(self.frames_skipped):
+            self.frames = {frame_number: self.frames_skipped[frame_number]}
             self.apply_observations_in_frame(frame_number)
-            # merged_list = self.get_merge_observation_in_two_frames(frame_number - self.gap_size, frame_number)
-            list_to_merge = self.get_exact_list_from_frame(frame_number)
-            previous_length = len(self.exact_final_list)
-            if len(list_to_merge) > 0:
-                is_first_column_from_list_to_merge_0 = list_to_merge[0].get_column_position() == 0
-            self.exact_final_list[-len(list_to_merge):] = self.merge_two_sequences(
-                self.exact_final_list[-len(list_to_merge):], list_to_merge, frame_number - last_frame_changed,
-                is_first_column_from_list_to_merge_0)
-            self.update_internal_variables_if_needed()
-            if previous_length != len(self.exact_final_list):
-                last_frame_changed = frame_number
+            self.merge_observation_in_frame(frame_number)
+
+    def merge_observation_in_frame(self, frame_number: int) -> None:
+        is_first_column_from_list_to_merge_0 = False
+        # merged_list = self.get_merge_observation_in_two_frames(frame_number - self.gap_size, frame_number)
+        list_to_merge = self.get_exact_list_from_frame(frame_number)
+        previous_length = len(self.final_list_being_merged)
+        if len(list_to_merge) > 0:
+            is_first_column_from_list_to_merge_0 = list_to_merge[0].get_column_position() == 0
+        self.final_list_being_merged.replace_tail(len(list_to_merge), self.merge_two_sequences(
+            self.final_list_being_merged.get_tail(len(list_to_merge)), list_to_merge,
+            frame_number - self.last_frame_changed, is_first_column_from_list_to_merge_0))
+        self.update_internal_variables_if_needed()
+        number_of_new_items = len(self.final_list_being_merged) - previous_length
+        overlap_length = len(list_to_merge) - number_of_new_items
+        self.is_last_overlap_too_small = self.is_overlap_too_small(frame_number, len(list_to_merge), overlap_length,
+                                                                   previous_length,
+                                                                   is_first_column_from_list_to_merge_0)
+        # A gap twice as long brings twice as many new items, which are taken from the overlap
+        self.is_last_overlap_enough_for_double_gap = \
+            overlap_length - number_of_new_items >= self.MINIMUM_OVERLAP_TO_MERGE
+        self.last_frame_merged = frame_number
+        if previous_length != len(self.final_list_being_merged):
+            self.last_frame_changed = frame_number
+
+    def is_overlap_too_small(self, frame_number: int, length_of_list_to_merge: int, overlap_length: int,
+                             previous_length: int, is_new_sequence: bool) -> bool:
+        # A new sequence, or a short one that started meanwhile, shares nothing with the final list, and that is not a
+        # failure to align
+        if self.last_frame_merged is None or previous_length == 0 or is_new_sequence:
+            return False
+        overlap_length_at_one_item_per_frame = length_of_list_to_merge - (frame_number - self.last_frame_merged)
+        return overlap_length < self.MINIMUM_OVERLAP_TO_MERGE <= overlap_length_at_one_item_per_frame
+
+    def analyse_full_video_in_parallel(self, number_of_processes: Optional[int] = None) -> None:
+        number_of_processes = number_of_processes if number_of_processes is not None else os.cpu_count()
+        self.start_receiving_frames()
+
+        chunks_of_frames = self.get_chunks_of_frames_to_look(number_of_processes * self.CHUNKS_PER_PROCESS)
+        # The configured observer is sent once to every worker, without the video, which cannot be pickled
+        initial_arguments = (self.get_observer_for_worker(), self.video.get_file_path(),
+                             self.video.get_keyframe_interval())
+        with multiprocessing.Pool(number_of_processes, initializer=AbstractSequentialSearchObserver.initialise_worker,
+                                  initargs=initial_arguments) as pool:
+            # imap keeps the order of the chunks, so the merge runs in frame order as in analyse_full_video
+            for observations_in_chunk in pool.imap(AbstractSequentialSearchObserver.get_observations_in_chunk_of_frames,
+                                                   chunks_of_frames):
+                for frame_number, observation in observations_in_chunk:
+                    self.set_saved_observation_in_frame(frame_number, observation)
+                    self.merge_observation_in_frame(frame_number)
+
+        self.finish_receiving_frames()
+
+    def get_chunks_of_frames_to_look(self, number_of_chunks: int) -> List[List[int]]:
+        frames_per_chunk = max(1, -(-len(self.frames_to_look) // max(1, number_of_chunks)))
+        return [self.frames_to_look[start:start + frames_per_chunk]
+                for start in range(0, len(self.frames_to_look), frames_per_chunk)]
 
+    def get_observer_for_worker(self) -> Self:
+        # Every setting of the observer is kept, only what belongs to the analysis in this process is left out
+        observer_for_worker = copy.copy(self)
+        observer_for_worker.video = None
+        observer_for_worker.frames = {}
+        observer_for_worker.frames_skipped = {}
+        observer_for_worker.exact_final_list = []
+        observer_for_worker.sink_for_final_items = None
+        observer_for_worker.items_waiting_for_sink = []
+        observer_for_worker.final_list_being_merged = ListWithMutableTail(self.MAXIMUM_LENGTH_OF_MUTABLE_TAIL)
+        return observer_for_worker
+
+    def prepare_in_worker(self) -> None:
+        # Settings kept outside the observer, as class attributes, are lost in spawned workers and set again here
+        pass
+
+    @staticmethod
+    def initialise_worker(observer: 'AbstractSequentialSearchObserver', file_path: str,
+                          keyframe_interval: int) -> None:
+        observer.video = Video(file_path, keyframe_interval)
+        observer.prepare_in_worker()
+        AbstractSequentialSearchObserver._observer_in_worker = observer
+
+    @staticmethod
+    def get_observations_in_chunk_of_frames(frames_in_chunk: List[int]) -> List[Tuple[int, Any]]:
+        observer = AbstractSequentialSearchObserver._observer_in_worker
+
+        observations_in_chunk = []
+        frames_iterator = observer.video.get_frames_from_static_list_as_iterator(
+            frames_in_chunk, observer.get_regions_of_interest(), seek_to_first_frame=True)
+        for frame in frames_iterator:
+            frame_number = frame.get_frame_number()
+            observer.frames = {frame_number: frame}
+            observations_in_chunk.append((frame_number, observer.apply_observations_in_frame(frame_number)))
+            # The observation is sent back to the main process, the worker does not need to keep it
+            observer.forget_observation_in_frame(frame_number)
+        observer.frames = {}
+        return observations_in_chunk
+
+    def finish_receiving_frames(self) -> None:
+        self.frames = {}
+        self.frames_skipped = {}
+        # Items waiting for the sink are already cleaned one by one, which does not change them a second time
+        self.exact_final_list = self.items_waiting_for_sink + self.final_list_being_merged.to_list()
+        self.items_waiting_for_sink = []
         self.clean_final_list_if_needed()
 
     def clean_final_list_if_needed(self) -> None:
-        pass
+        self.exact_final_list = self.get_items_cleaned_together(self.get_items_cleaned_one_by_one(
+            self.exact_final_list))
+
+    def get_items_cleaned_one_by_one(self, items: List) -> List:
+        return items
+
+    def get_number_of_items_ready_for_sink(self, items: List) -> int:
+        return len(items)
+
+    def get_items_cleaned_together(self, items: List) -> List:
+        return items
 
     def update_internal_variables_if_needed(self) -> None:
         pass
@@ -8,9 +8,13 @@ class LikelihoodMapForObservation(Generic[T]):
     weights_for_observations = Dict[T, int]
     total_weight: int
     unknown_weight: int
+    is_frozen: bool
+    cached_hash: Optional[int]
 
     def __init__(self, likelihood_for_possibilities: Dict[Optional[T], int] = None,
                  total_weight: Optional[int] = None, default_value: Optional[T] = None):
+        self.is_frozen = False
+        self.cached_hash = None
         if likelihood_for_possibilities is not None:
             self.weights_for_observations = likelihood_for_possibilities
 
@@ -33,7 +37,23 @@ class LikelihoodMapForObservation(Generic[T]):
     def get_unknown_weight(self) -> int:
         return self.unknown_weight
 
+    def freeze(self) -> Self:
+        # A frozen map can be shared between observations, any change to it raises
+        self.is_frozen = True
+        return self
+
+    def get_frozen_copy(self) -> Self:
+        frozen_copy = LikelihoodMapForObservation(dict(self.weights_for_observations), self.total_weight)
+        frozen_copy.unknown_weight = self.unknown_weight
+        return frozen_copy.freeze()
+
+    def validate_is_not_frozen(self) -> None:
+        if self.is_frozen:
+            raise Exception('You cannot change a frozen likelihood map, change a copy of it instead')
+        self.cached_hash = None
+
     def add_observation(self, observation: Optional[T], weight: int = 1) -> None:
+        self.validate_is_not_frozen()
         self.total_weight += weight
 
         if observation is None:
@@ -74,7 +94,17 @@ class LikelihoodMapForObservation(Generic[T]):
             and self.total_weight == other.total_weight and self.unknown_weight == other.unknown_weight
 
     def __hash__(self) -> int:
-        return hash((str(self), self.total_weight, self.unknown_weight))
+        # Same fields as __eq__, computed once until the map changes
+        if self.cached_hash is None:
+            self.cached_hash = hash((frozenset(self.weights_for_observations.items()), self.total_weight,
+                                     self.unknown_weight))
+        return self.cached_hash
+
+    def __getstate__(self) -> Dict:
+        # Hashes of the states change between processes, so the cached one is not sent to other processes
+        state = self.__dict__.copy()
+        state['cached_hash'] = None
+        return state
 
     def __repr__(self) -> str:
         dict_with_keys_str = self.get_dict_keys_as_string()
@@ -139,4 +169,5 @@ class LikelihoodMapForObservation(Generic[T]):
         return self.get_merge_map_with_second_map(second_map).get_known_most_likely_possibility()
 
     def replace_weight_in_value_for_uncertainty(self, value_to_remove: T) -> None:
+        self.validate_is_not_frozen()
         self.unknown_weight += self.weights_for_observations.pop(value_to_remove)
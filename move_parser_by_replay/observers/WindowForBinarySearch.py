@@ -0,0 +1,50 @@
+from typing import List, Optional, Self
+
+
+class WindowForBinarySearch:
+    start_frame: int
+    end_frame: int
+    merged_list_first_window: Optional[List]
+    merged_list_second_window: Optional[List]
+    children: List[Self]
+
+    def __init__(self, start_frame: int, end_frame: int):
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.merged_list_first_window = None
+        self.merged_list_second_window = None
+        self.children = []
+
+    def get_start_frame(self) -> int:
+        return self.start_frame
+
+    def get_end_frame(self) -> int:
+        return self.end_frame
+
+    def get_middle_frame(self) -> int:
+        return (self.start_frame + self.end_frame) // 2
+
+    def get_merged_list_first_window(self) -> Optional[List]:
+        return self.merged_list_first_window
+
+    def get_merged_list_second_window(self) -> Optional[List]:
+        return self.merged_list_second_window
+
+    def set_merged_lists(self, merged_list_first_window: Optional[List],
+                         merged_list_second_window: Optional[List]) -> None:
+        self.merged_list_first_window = merged_list_first_window
+        self.merged_list_second_window = merged_list_second_window
+
+    def get_children(self) -> List[Self]:
+        return self.children
+
+    def create_children_to_search(self, window_to_stop_searching: int) -> List[Self]:
+        if self.end_frame - self.start_frame < window_to_stop_searching:
+            return []
+
+        middle_frame = self.get_middle_frame()
+        if self.merged_list_first_window is None:
+            self.children.append(WindowForBinarySearch(self.start_frame, middle_frame - 1))
+        if self.merged_list_second_window is None:
+            self.children.append(WindowForBinarySearch(middle_frame + 1, self.end_frame))
+        return self.children
@@ -1,6 +1,7 @@
 from typing import Dict
 
 from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.Video import Video
 from move_parser_by_replay.base.templates.Character import Character
@@ -8,7 +9,7 @@ from move_parser_by_replay.observers.AbstractTemplateObserver import AbstractTem
 from move_parser_by_replay.util.OpenCVWrapper import OpenCVWrapper
 
 
-class CharacterTemplateObserver(AbstractTemplateObserver):
+class CharacterTemplateObserver(AbstractTemplateObserver, FramePumpSubscriberInterface):
     TEMPLATES_FOR_CHARACTERS = './data/characters/'
     GAP_BETWEEN_FRAMES_FOR_LOOKUP = 300
 
@@ -29,23 +30,35 @@ class CharacterTemplateObserver(AbstractTemplateObserver):
         frame_position = self.GAP_BETWEEN_FRAMES_FOR_LOOKUP
 
         current_frame = self.video.get_frame_from_position(frame_position)
-        found_p1 = False
-        found_p2 = False
-        while not found_p1 or not found_p2:
-            for character_key in self.character_templates:
-                character_template = self.character_templates[character_key]
-                if self.look_for_character_in_image(character_template, current_frame):
-                    if character_key[:2] == 'p1':
-                        found_p1 = True
-                        self.characters_guesses[Player.FIRST_PLAYER] = character_key[3:]
-                    elif character_key[:2] == 'p2':
-                        found_p2 = True
-                        self.characters_guesses[Player.SECOND_PLAYER] = character_key[3:]
-                    else:
-                        raise Exception('All character templates should be either p1_* or p2_*')
+        while not self.are_both_characters_found():
+            self.look_for_characters_in_frame(current_frame)
             frame_position += self.GAP_BETWEEN_FRAMES_FOR_LOOKUP
             current_frame = self.video.get_frame_from_position(frame_position)
 
+    def look_for_characters_in_frame(self, frame: Frame) -> None:
+        for character_key in self.character_templates:
+            character_template = self.character_templates[character_key]
+            if self.look_for_character_in_image(character_template, frame):
+                if character_key[:2] == 'p1':
+                    self.characters_guesses[Player.FIRST_PLAYER] = character_key[3:]
+                elif character_key[:2] == 'p2':
+                    self.characters_guesses[Player.SECOND_PLAYER] = character_key[3:]
+                else:
+                    raise Exception('All character templates should be either p1_* or p2_*')
+
+    def are_both_characters_found(self) -> bool:
+        return Player.FIRST_PLAYER in self.characters_guesses and Player.SECOND_PLAYER in self.characters_guesses
+
+    def is_frame_needed(self, frame_number: int) -> bool:
+        return frame_number > 0 and frame_number % self.GAP_BETWEEN_FRAMES_FOR_LOOKUP == 0 and \
+            not self.are_both_characters_found()
+
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        return self.are_both_characters_found()
+
+    def receive_frame(self, frame: Frame) -> None:
+        self.look_for_characters_in_frame(frame)
+
     def get_character_guesses(self) -> Dict[Player, str]:
         return self.characters_guesses
 
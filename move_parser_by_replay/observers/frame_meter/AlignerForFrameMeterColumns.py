@@ -0,0 +1,87 @@
+from typing import List
+
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
+
+
+class AlignerForFrameMeterColumns:
+    # A misclassified column must not turn a long overlap into a concatenation, as difflib tolerated those
+    MAXIMUM_FRACTION_OF_MISMATCHED_COLUMNS = 0.1
+    MINIMUM_LENGTH_FOR_OVERLAP_WITH_MISMATCHES = 5
+
+    @classmethod
+    def merge_sequences(cls, first_sequence: List[FrameMeterColumnMap],
+                        second_sequence: List[FrameMeterColumnMap]) -> List[FrameMeterColumnMap]:
+        overlap_length = cls.get_length_of_overlap(first_sequence, second_sequence)
+        overlap_length = max(overlap_length,
+                             cls.get_length_of_overlap_with_mismatches(first_sequence, second_sequence, overlap_length))
+        # As with an equal block of difflib, the columns of the overlap are the ones from the first sequence
+        return first_sequence + second_sequence[overlap_length:]
+
+    @staticmethod
+    def get_length_of_overlap(first_sequence: List[FrameMeterColumnMap],
+                              second_sequence: List[FrameMeterColumnMap]) -> int:
+        # The second sequence is observed later, so the overlap is the longest tail of the first one that is also
+        # the head of the second one. Columns are compared by position and most likely states, never by their maps
+        second_keys = [column.get_signature() for column in second_sequence]
+        if len(second_keys) == 0:
+            return 0
+        prefix_lengths = AlignerForFrameMeterColumns.get_prefix_lengths(second_keys)
+
+        matched_length = 0
+        for column in first_sequence[max(0, len(first_sequence) - len(second_keys)):]:
+            key = column.get_signature()
+            while matched_length > 0 and (matched_length == len(second_keys) or second_keys[matched_length] != key):
+                matched_length = prefix_lengths[matched_length - 1]
+            if second_keys[matched_length] == key:
+                matched_length += 1
+
+        return matched_length
+
+    @classmethod
+    def get_length_of_overlap_with_mismatches(cls, first_sequence: List[FrameMeterColumnMap],
+                                              second_sequence: List[FrameMeterColumnMap],
+                                              exact_overlap_length: int) -> int:
+        # Only overlaps longer than the exact one are tried, longest first. Positions must always match, the most
+        # likely states of a few columns may differ. An overlap starts where the first sequence shows the position of
+        # the first column of the second one, which happens once per window of the meter, so few tails are compared
+        if len(second_sequence) == 0:
+            return 0
+        first_position_of_second = second_sequence[0].get_column_position()
+        longest_overlap_length = min(len(first_sequence), len(second_sequence))
+        for tail_of_first in range(len(first_sequence) - longest_overlap_length, len(first_sequence)):
+            overlap_length = len(first_sequence) - tail_of_first
+            if overlap_length <= max(exact_overlap_length, cls.MINIMUM_LENGTH_FOR_OVERLAP_WITH_MISMATCHES - 1):
+                break
+            if first_sequence[tail_of_first].get_column_position() == first_position_of_second and \
+                    cls.is_overlap_with_few_mismatches(first_sequence, second_sequence, tail_of_first):
+                return overlap_length
+        return 0
+
+    @classmethod
+    def is_overlap_with_few_mismatches(cls, first_sequence: List[FrameMeterColumnMap],
+                                       second_sequence: List[FrameMeterColumnMap], tail_of_first: int) -> bool:
+        overlap_length = len(first_sequence) - tail_of_first
+        maximum_mismatched_columns = overlap_length * cls.MAXIMUM_FRACTION_OF_MISMATCHED_COLUMNS
+        mismatched_columns = 0
+        # The comparison stops at the first position that differs or once too many states differ
+        for first_column, second_column in zip(first_sequence[tail_of_first:], second_sequence):
+            if first_column.get_column_position() != second_column.get_column_position():
+                return False
+            if first_column.get_signature() != second_column.get_signature():
+                mismatched_columns += 1
+                if mismatched_columns > maximum_mismatched_columns:
+                    return False
+        return True
+
+    @staticmethod
+    def get_prefix_lengths(keys: List) -> List[int]:
+        # For every position, the length of the longest proper head of the keys that also ends there
+        prefix_lengths = [0] * len(keys)
+        matched_length = 0
+        for index in range(1, len(keys)):
+            while matched_length > 0 and keys[index] != keys[matched_length]:
+                matched_length = prefix_lengths[matched_length - 1]
+            if keys[index] == keys[matched_length]:
+                matched_length += 1
+            prefix_lengths[index] = matched_length
+        return prefix_lengths
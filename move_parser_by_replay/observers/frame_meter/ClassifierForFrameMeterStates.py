@@ -0,0 +1,123 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ColorFrameMeter import ColorFrameMeter
+from move_parser_by_replay.observers.frame_meter.LookUpTableForFrameMeterColors import LookUpTableForFrameMeterColors
+from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+
+
+class ClassifierForFrameMeterStates:
+    WEIGHT_FOR_UNKNOWN_STATE = 1
+
+    _weights_by_state_index: Optional[np.ndarray] = None
+    _registry_indices_by_state_index: Optional[np.ndarray] = None
+    _look_up_table: Optional[LookUpTableForFrameMeterColors] = None
+
+    @classmethod
+    def use_look_up_table(cls, look_up_table: Optional[LookUpTableForFrameMeterColors]) -> None:
+        cls._look_up_table = look_up_table
+
+    @classmethod
+    def get_look_up_table(cls) -> Optional[LookUpTableForFrameMeterColors]:
+        return cls._look_up_table
+
+    @classmethod
+    def enable_look_up_table(cls, bits_per_channel: int = LookUpTableForFrameMeterColors.EXACT_BITS_PER_CHANNEL,
+                             folder: str = LookUpTableForFrameMeterColors.DEFAULT_FOLDER) -> None:
+        cls.use_look_up_table(LookUpTableForFrameMeterColors.load_or_build(bits_per_channel, folder))
+
+    @classmethod
+    def disable_look_up_table(cls) -> None:
+        cls.use_look_up_table(None)
+
+    @classmethod
+    def get_indices_of_potential_states_in_image(cls, image_data: np.ndarray) -> np.ndarray:
+        if cls._look_up_table is not None:
+            return cls._look_up_table.get_indices_of_potential_states_in_image(image_data).astype(np.int64)
+        return ColorFrameMeter.get_indices_of_potential_states_in_image(image_data)
+
+    @classmethod
+    def get_weights_by_state_index(cls) -> np.ndarray:
+        if cls._weights_by_state_index is None:
+            weights = [StateFrameMeterRegistry.get_weight(state.get_state_type(), state.get_temporal_state())
+                       for state in ColorFrameMeter.get_states_array()]
+            weights.append(cls.WEIGHT_FOR_UNKNOWN_STATE)
+            cls._weights_by_state_index = np.array(weights, dtype=np.int64)
+        return cls._weights_by_state_index
+
+    @classmethod
+    def get_registry_indices_by_state_index(cls) -> np.ndarray:
+        if cls._registry_indices_by_state_index is None:
+            indices = [StateFrameMeterRegistry.get_index(state) for state in ColorFrameMeter.get_states_array()]
+            # The unknown state goes after every state of the registry
+            indices.append(StateFrameMeterRegistry.get_number_of_states())
+            cls._registry_indices_by_state_index = np.array(indices, dtype=np.int64)
+        return cls._registry_indices_by_state_index
+
+    @classmethod
+    def get_map_of_states_in_image(cls, image_data: np.ndarray) -> LikelihoodMapForObservation[StateFrameMeter]:
+        return cls.get_maps_of_states_in_stack(image_data[np.newaxis])[0]
+
+    @classmethod
+    def get_maps_of_states_in_list_of_images(cls, list_of_images: List[np.ndarray]) -> \
+            List[LikelihoodMapForObservation[StateFrameMeter]]:
+        if len(list_of_images) == 0:
+            return []
+        if all(image.shape == list_of_images[0].shape for image in list_of_images):
+            return cls.get_maps_of_states_in_stack(np.stack(list_of_images))
+        return [cls.get_map_of_states_in_image(image) for image in list_of_images]
+
+    @classmethod
+    def get_maps_of_states_in_stack(cls, stack_of_images: np.ndarray) -> \
+            List[LikelihoodMapForObservation[StateFrameMeter]]:
+        return cls.get_maps_and_dense_weights_of_states_in_stack(stack_of_images)[0]
+
+    @classmethod
+    def get_maps_and_dense_weights_of_states_in_stack(cls, stack_of_images: np.ndarray) -> \
+            Tuple[List[LikelihoodMapForObservation[StateFrameMeter]], np.ndarray]:
+        states = ColorFrameMeter.get_states_array()
+        weights_by_state_index = cls.get_weights_by_state_index()
+        number_of_labels = len(states) + 1
+        number_of_images = stack_of_images.shape[0]
+
+        state_indices = cls.get_indices_of_potential_states_in_image(stack_of_images)
+        state_indices = state_indices.reshape(number_of_images, -1)
+        pixels_per_image = state_indices.shape[1]
+
+        flat_labels = (np.arange(number_of_images)[:, np.newaxis] * number_of_labels + state_indices).ravel()
+        weights_per_label = np.bincount(flat_labels, weights=weights_by_state_index[state_indices.ravel()],
+                                        minlength=number_of_images * number_of_labels)
+        weights_per_label = np.rint(weights_per_label).astype(np.int64).reshape(number_of_images, number_of_labels)
+
+        # The first pixel where each state shows up keeps the insertion order of the per-pixel implementation
+        first_appearance = np.full(number_of_images * number_of_labels, pixels_per_image, dtype=np.int64)
+        np.minimum.at(first_appearance, flat_labels, np.tile(np.arange(pixels_per_image), number_of_images))
+        first_appearance = first_appearance.reshape(number_of_images, number_of_labels)
+
+        list_of_maps: List[LikelihoodMapForObservation[StateFrameMeter]] = []
+        for image_index in range(number_of_images):
+            known_appearances = first_appearance[image_index, :-1]
+            present_indices = np.nonzero(known_appearances < pixels_per_image)[0]
+            present_indices = present_indices[np.argsort(known_appearances[present_indices], kind='stable')]
+
+            likelihood_map = LikelihoodMapForObservation(total_weight=0)
+            for state_index in present_indices:
+                weight_of_state = int(weights_per_label[image_index, state_index])
+                likelihood_map.add_observation(states[state_index], weight=weight_of_state)
+            unknown_weight = int(weights_per_label[image_index, -1])
+            if unknown_weight > 0:
+                likelihood_map.add_observation(None, weight=unknown_weight)
+            if likelihood_map.get_total_weight() == 0:
+                likelihood_map.add_observation(None, 1)
+            list_of_maps.append(likelihood_map)
+
+        # Same weights indexed by the ordinals of the registry, with the unknown state in the last position
+        dense_weights = np.zeros((number_of_images, StateFrameMeterRegistry.get_number_of_states() + 1),
+                                 dtype=np.int64)
+        dense_weights[:, cls.get_registry_indices_by_state_index()] = weights_per_label
+        dense_weights[dense_weights.sum(axis=-1) == 0, -1] = 1
+
+        return list_of_maps, dense_weights
@@ -1,4 +1,4 @@
-from typing import Tuple, Self, Dict, Optional
+from typing import Tuple, Self, Dict, Optional, List
 import numpy as np
 
 from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
@@ -55,6 +55,29 @@ class ColorFrameMeter:
         cls._colors_array = np.array(list(cls.ALL_COLORS.values()))
         cls._initialized = True
 
+    @classmethod
+    def get_states_array(cls) -> List[StateFrameMeter]:
+        if not cls._initialized:
+            cls._initialize_color_arrays_in_numpy()
+        return cls._states_array
+
+    @classmethod
+    def get_indices_of_potential_states_in_image(cls, image_data: np.ndarray) -> np.ndarray:
+        # Index in get_states_array() of the closest color for every pixel, len(get_states_array()) if none is close
+        if not cls._initialized:
+            cls._initialize_color_arrays_in_numpy()
+
+        pixels = image_data.reshape(-1, 3).astype(np.int64)
+        colors = cls._colors_array.astype(np.int64)
+        distances = (pixels * pixels).sum(axis=1)[:, np.newaxis] - 2 * pixels @ colors.T \
+            + (colors * colors).sum(axis=1)[np.newaxis, :]
+
+        min_indices = np.argmin(distances, axis=1)
+        min_distances = np.take_along_axis(distances, min_indices[:, np.newaxis], axis=1)[:, 0]
+        min_indices[min_distances > cls.THRESHOLD_FOR_DISTANCE] = len(cls._states_array)
+
+        return min_indices.reshape(image_data.shape[:-1])
+
     def get_potential_state_frame_meter(self) -> Optional[StateFrameMeter]:
         color_key = self.color
         if color_key in self._color_cache:
@@ -0,0 +1,108 @@
+from typing import List, Self
+
+import numpy as np
+
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+
+
+class DenseLikelihoodsOfFrameMeter:
+    NUMBER_OF_PLAYERS = 2
+    NUMBER_OF_STATES = StateFrameMeterRegistry.get_number_of_states()
+    # The weight of the unknown state is stored after the weights of the known states
+    UNKNOWN_INDEX = NUMBER_OF_STATES
+    # Products of two totals below this limit are exact as floats, so divisions round as the ones of Python integers
+    MAXIMUM_TOTAL_WEIGHT_FOR_INTEGER_ARRAYS = 1 << 26
+
+    IS_PAST = np.array([state.is_from_the_past() for state in StateFrameMeterRegistry.get_states_in_order()])
+    IS_PRESENT = np.array([state.is_from_the_present() for state in StateFrameMeterRegistry.get_states_in_order()])
+    IS_NOTHING = np.array([state.is_nothing() for state in StateFrameMeterRegistry.get_states_in_order()])
+
+    column_positions: np.ndarray
+    weights: np.ndarray
+
+    def __init__(self, column_positions: np.ndarray, weights: np.ndarray):
+        # Weights have shape (column, player, state + 1)
+        self.column_positions = column_positions
+        self.weights = self.get_weights_with_exact_type(weights)
+
+    @classmethod
+    def from_columns(cls, columns: List[FrameMeterColumnMap]) -> Self:
+        column_positions = np.array([column.get_column_position() for column in columns], dtype=np.int64)
+        weights = np.zeros((len(columns), cls.NUMBER_OF_PLAYERS, cls.NUMBER_OF_STATES + 1), dtype=object)
+        for column_index, column in enumerate(columns):
+            for player_index, player in enumerate([Player.FIRST_PLAYER, Player.SECOND_PLAYER]):
+                state = column.get_state_for_player(player)
+                for possibility, weight in state.get_dictionary_of_possibilities().items():
+                    state_index = StateFrameMeterRegistry.get_index(possibility)
+                    weights[column_index, player_index, state_index] = weight
+                weights[column_index, player_index, cls.UNKNOWN_INDEX] = state.get_unknown_weight()
+        return cls(column_positions, weights)
+
+    @classmethod
+    def get_weights_with_exact_type(cls, weights: np.ndarray) -> np.ndarray:
+        # Merges multiply weights, so they can outgrow 64 bits. Those are kept as Python integers
+        if weights.size == 0 or weights.sum(axis=-1).max() < cls.MAXIMUM_TOTAL_WEIGHT_FOR_INTEGER_ARRAYS:
+            return weights.astype(np.int64)
+        return weights.astype(object)
+
+    def get_number_of_columns(self) -> int:
+        return len(self.column_positions)
+
+    def get_column_positions(self) -> np.ndarray:
+        return self.column_positions
+
+    def get_weights(self) -> np.ndarray:
+        return self.weights
+
+    def get_total_weights(self) -> np.ndarray:
+        return self.weights.sum(axis=-1)
+
+    def get_unknown_weights(self) -> np.ndarray:
+        return self.weights[..., self.UNKNOWN_INDEX]
+
+    def get_probabilities_that_are_past(self) -> np.ndarray:
+        return self.get_probabilities_in_temporal_state(self.IS_PAST)
+
+    def get_probabilities_that_are_present(self) -> np.ndarray:
+        return self.get_probabilities_in_temporal_state(self.IS_PRESENT)
+
+    def get_probabilities_in_temporal_state(self, is_in_temporal_state: np.ndarray) -> np.ndarray:
+        known_weights = self.weights[..., :self.NUMBER_OF_STATES]
+        weights_in_temporal_state = self.get_unknown_weights() + known_weights[..., is_in_temporal_state].sum(axis=-1)
+        confused_nothing_weights = known_weights[..., self.IS_NOTHING & ~is_in_temporal_state].sum(axis=-1)
+        probabilities = (weights_in_temporal_state + confused_nothing_weights *
+                         FrameMeterColumnMap.PROBABILITY_NOTHING_CONFUSES_PAST_PRESENT) / self.get_total_weights()
+        return self.get_product_of_players(probabilities)
+
+    def get_probabilities_are_unknown_or_nothing(self) -> np.ndarray:
+        # As in the maps, the unknown weight is not part of this probability
+        likelihoods = self.weights[..., :self.NUMBER_OF_STATES] / self.get_total_weights()[..., np.newaxis]
+        return self.get_product_of_players(likelihoods[..., self.IS_NOTHING].sum(axis=-1))
+
+    def get_probabilities_are_same_columns_than(self, other: Self) -> np.ndarray:
+        total_weights = self.get_total_weights()
+        other_total_weights = other.get_total_weights()
+        weights_for_being_same = (self.weights[..., :self.NUMBER_OF_STATES] *
+                                  other.weights[..., :self.NUMBER_OF_STATES]).sum(axis=-1)
+        weights_for_being_same += self.get_unknown_weights() * other_total_weights
+        weights_for_being_same += total_weights * other.get_unknown_weights()
+        probabilities = self.get_product_of_players(weights_for_being_same / (total_weights * other_total_weights))
+        return np.where(self.column_positions == other.column_positions, probabilities, 0)
+
+    def get_sub_range(self, start: int, end: int) -> Self:
+        return DenseLikelihoodsOfFrameMeter(self.column_positions[start:end], self.weights[start:end])
+
+    def get_columns(self, indices: np.ndarray) -> Self:
+        return DenseLikelihoodsOfFrameMeter(self.column_positions[indices], self.weights[indices])
+
+    @staticmethod
+    def concatenate(list_of_likelihoods: List[Self]) -> Self:
+        return DenseLikelihoodsOfFrameMeter(
+            np.concatenate([likelihoods.column_positions for likelihoods in list_of_likelihoods]),
+            np.concatenate([likelihoods.weights for likelihoods in list_of_likelihoods]))
+
+    @staticmethod
+    def get_product_of_players(probabilities: np.ndarray) -> np.ndarray:
+        return (probabilities[:, 0] * probabilities[:, 1]).astype(np.float64)
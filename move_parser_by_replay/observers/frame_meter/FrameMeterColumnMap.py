@@ -1,4 +1,4 @@
-from typing import Optional, Self, List
+from typing import Optional, Self, List, Tuple
 
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
@@ -51,26 +51,30 @@ class FrameMeterColumnMap:
     def get_probability_of_a_state_being_past(cls, state: LikelihoodMapForObservation[StateFrameMeter]) -> float:
         dictionary_of_possibilities = state.get_dictionary_of_possibilities()
         is_past_weight = state.get_unknown_weight()
+        confused_nothing_weight = 0
         for possibility in dictionary_of_possibilities:
             if possibility.is_from_the_past():
                 is_past_weight += dictionary_of_possibilities[possibility]
             elif possibility.is_nothing():
-                is_past_weight += dictionary_of_possibilities[possibility] \
-                                  * cls.PROBABILITY_NOTHING_CONFUSES_PAST_PRESENT
-        probability = is_past_weight / state.get_total_weight()
+                confused_nothing_weight += dictionary_of_possibilities[possibility]
+        # Integer weights are added before the confused nothing, as the dense likelihoods do
+        probability = (is_past_weight + confused_nothing_weight * cls.PROBABILITY_NOTHING_CONFUSES_PAST_PRESENT) \
+            / state.get_total_weight()
         return probability
 
     @classmethod
     def get_probability_of_a_state_being_present(cls, state: LikelihoodMapForObservation[StateFrameMeter]) -> float:
         dictionary_of_possibilities = state.get_dictionary_of_possibilities()
         is_present_weight = state.get_unknown_weight()
+        confused_nothing_weight = 0
         for possibility in dictionary_of_possibilities:
             if possibility.is_from_the_present():
                 is_present_weight += dictionary_of_possibilities[possibility]
             elif possibility.is_nothing():
-                is_present_weight += dictionary_of_possibilities[possibility] \
-                                     * cls.PROBABILITY_NOTHING_CONFUSES_PAST_PRESENT
-        probability = is_present_weight / state.get_total_weight()
+                confused_nothing_weight += dictionary_of_possibilities[possibility]
+        # Integer weights are added before the confused nothing, as the dense likelihoods do
+        probability = (is_present_weight + confused_nothing_weight * cls.PROBABILITY_NOTHING_CONFUSES_PAST_PRESENT) \
+            / state.get_total_weight()
         return probability
 
     def is_unknown_or_nothing(self) -> bool:
@@ -95,6 +99,10 @@ class FrameMeterColumnMap:
     def get_column_position(self) -> int:
         return self.column_position
 
+    def get_signature(self) -> Tuple[int, Optional[StateFrameMeter], Optional[StateFrameMeter]]:
+        return (self.column_position, self.p1_state.get_known_most_likely_possibility(),
+                self.p2_state.get_known_most_likely_possibility())
+
     def set_state_for_player(self, player: Player, state: LikelihoodMapForObservation[StateFrameMeter]) -> None:
         if player == Player.FIRST_PLAYER:
             self.p1_state = state
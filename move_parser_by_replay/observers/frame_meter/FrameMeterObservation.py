@@ -1,40 +1,100 @@
-from typing import Dict, List, Optional, Self, Callable
+from typing import Dict, List, Optional, Self, Callable, Tuple
+
+import numpy as np
 
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ClassifierForFrameMeterStates import ClassifierForFrameMeterStates
+from move_parser_by_replay.observers.frame_meter.DenseLikelihoodsOfFrameMeter import DenseLikelihoodsOfFrameMeter
 from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
 from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
+from move_parser_by_replay.observers.frame_meter.StripExtractorForFrameMeter import StripExtractorForFrameMeter
 
 
 class FrameMeterObservation:
     NUMBER_OF_COLUMNS_IN_FRAME_METER = 80
     WINDOW_FOR_PAST_COLUMNS = 20
+    TOLERANCE_FOR_LOG_PROBABILITIES = 1e-9
 
     frame_meter: List[FrameMeterColumnMap]
+    dense_likelihoods: Optional[DenseLikelihoodsOfFrameMeter]
 
-    def __init__(self, frame_meter: Optional[List[FrameMeterColumnMap]] = None):
+    def __init__(self, frame_meter: Optional[List[FrameMeterColumnMap]] = None,
+                 dense_likelihoods: Optional[DenseLikelihoodsOfFrameMeter] = None):
         if frame_meter is None:
             self.frame_meter = []
         else:
             self.frame_meter = frame_meter
+        self.dense_likelihoods = dense_likelihoods
 
     def get_frame_meter_list(self) -> List[FrameMeterColumnMap]:
         return self.frame_meter
 
+    def set_frame_meter_list(self, frame_meter: List[FrameMeterColumnMap]) -> None:
+        self.frame_meter = frame_meter
+        self.invalidate_dense_likelihoods()
+
+    def invalidate_dense_likelihoods(self) -> None:
+        # Whoever changes the columns of the list in place calls this, so the arrays are built again when needed
+        self.dense_likelihoods = None
+
+    def get_dense_likelihoods(self) -> DenseLikelihoodsOfFrameMeter:
+        if not self.is_dense_likelihoods_in_sync():
+            self.dense_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(self.frame_meter)
+        return self.dense_likelihoods
+
+    def is_dense_likelihoods_in_sync(self) -> bool:
+        return self.dense_likelihoods is not None
+
+    def get_signature(self) -> Tuple[Tuple[int, Optional[StateFrameMeter], Optional[StateFrameMeter]], ...]:
+        return tuple(column.get_signature() for column in self.frame_meter)
+
     @classmethod
     def fill_from_frame_and_positions(cls, frame: Frame, positions: Dict[Player, List[Position]]) -> Self:
         frame_meter_states: Dict[Player, List[LikelihoodMapForObservation[StateFrameMeter]]] = {}
+        subregions_to_classify: List[np.ndarray] = []
         for player in positions:
-            list_for_player: List[LikelihoodMapForObservation[StateFrameMeter]] = []
             for position in positions[player]:
                 # raw_color = frame.get_specific_point(position)
                 subregion = frame.get_sub_region_around_specific_point(position, 10, 20)
-                state_in_subregion = subregion.get_map_of_states_in_frame()
-                list_for_player.append(state_in_subregion)
-            frame_meter_states[player] = list_for_player
+                subregions_to_classify.append(subregion.get_image_data())
+
+        states_in_subregions = ClassifierForFrameMeterStates.get_maps_of_states_in_list_of_images(
+            subregions_to_classify)
+        start_index = 0
+        for player in positions:
+            end_index = start_index + len(positions[player])
+            frame_meter_states[player] = states_in_subregions[start_index:end_index]
+            start_index = end_index
 
+        return cls.fill_from_states_by_player(frame_meter_states)
+
+    @classmethod
+    def fill_from_frame_and_strip_extractor(cls, frame: Frame, strip_extractor: StripExtractorForFrameMeter) -> Self:
+        if not strip_extractor.is_frame_big_enough(frame):
+            return cls.fill_from_frame_and_positions(frame, strip_extractor.get_positions())
+
+        cells = strip_extractor.get_cells_from_frame(frame)
+        number_of_players, number_of_columns = cells.shape[:2]
+        states_in_cells, dense_weights = ClassifierForFrameMeterStates.get_maps_and_dense_weights_of_states_in_stack(
+            cells.reshape((number_of_players * number_of_columns,) + cells.shape[2:]))
+
+        frame_meter_states: Dict[Player, List[LikelihoodMapForObservation[StateFrameMeter]]] = {}
+        for player_index, player in enumerate(strip_extractor.get_players()):
+            start_index = player_index * number_of_columns
+            frame_meter_states[player] = states_in_cells[start_index:start_index + number_of_columns]
+
+        # From (player, column, state) to (column, player, state)
+        dense_weights = dense_weights.reshape(number_of_players, number_of_columns, -1).transpose(1, 0, 2)
+        dense_likelihoods = DenseLikelihoodsOfFrameMeter(np.arange(number_of_columns), dense_weights)
+        return cls.fill_from_states_by_player(frame_meter_states, dense_likelihoods)
+
+    @classmethod
+    def fill_from_states_by_player(cls, frame_meter_states: Dict[
+        Player, List[LikelihoodMapForObservation[StateFrameMeter]]],
+                                   dense_likelihoods: Optional[DenseLikelihoodsOfFrameMeter] = None) -> Self:
         all_columns = []
         for column_position in range(cls.NUMBER_OF_COLUMNS_IN_FRAME_METER):
             states: List[LikelihoodMapForObservation[StateFrameMeter]] = []
@@ -42,10 +102,14 @@ class FrameMeterObservation:
                 states.append(frame_meter_states[player][column_position])
             new_column = FrameMeterColumnMap(column_position, states[0], states[1])
             all_columns.append(new_column)
-        return cls(all_columns)
+        return cls(all_columns, dense_likelihoods)
 
     def clean_nothing_frames_from_tail(self) -> None:
-        self.clean_continuous_columns_not_following_boolean_function(lambda column: column.is_unknown_or_nothing())
+        self.clean_continuous_columns_not_following_mask(self.get_mask_of_unknown_or_nothing_columns())
+
+    def get_mask_of_unknown_or_nothing_columns(self) -> np.ndarray:
+        return self.get_dense_likelihoods().get_probabilities_are_unknown_or_nothing() >= \
+            FrameMeterColumnMap.THRESHOLD_UNKNOWN_PROBABILITY
 
     def clean_past_frames(self) -> None:
         self.clean_continuous_columns_not_following_boolean_function(lambda column: column.is_past())
@@ -55,72 +119,62 @@ class FrameMeterObservation:
             # self.frame_meter = [frame_column for frame_column in self.frame_meter if not frame_column.is_past()]
 
             self.clean_from_estimated_column_because_it_is_past()
-            self.clean_continuous_columns_not_following_boolean_function(
-                lambda column: column.is_unknown_or_nothing()
-            )
+            self.clean_continuous_columns_not_following_mask(self.get_mask_of_unknown_or_nothing_columns())
 
     def clean_from_estimated_column_because_it_is_past(self):
-        past_zero_indices = []
-        present_zero_indices = []
+        dense_likelihoods = self.get_dense_likelihoods()
+        past_probabilities = dense_likelihoods.get_probabilities_that_are_past()
+        present_probabilities = dense_likelihoods.get_probabilities_that_are_present()
 
-        for i, frame_column in enumerate(self.frame_meter):
-            if frame_column.probability_that_is_past() == 0:
-                past_zero_indices.append(i)
-            if frame_column.probability_that_is_present() == 0:
-                present_zero_indices.append(i)
+        past_zero_indices = np.nonzero(past_probabilities == 0)[0]
+        present_zero_indices = np.nonzero(present_probabilities == 0)[0]
 
         min_index = 0
-        if past_zero_indices:
-            min_index = max(past_zero_indices) + 1
+        if len(past_zero_indices) > 0:
+            min_index = int(past_zero_indices[-1]) + 1
 
         max_index = len(self.frame_meter)
-        if present_zero_indices:
-            max_index = min(present_zero_indices)
+        if len(present_zero_indices) > 0:
+            max_index = int(present_zero_indices[0])
 
         if min_index < len(self.frame_meter):
             if min_index > max_index:
                 raise ValueError("It seems you are trying to clean a specific observation in "
                                  "Present and Past but the probabilities are contradictory")
 
-            tail_past_probability = 1
-            for i in range(min_index, len(self.frame_meter)):
-                tail_past_probability *= self.frame_meter[i].probability_that_is_past()
-
-            head_present_probability = 1
-            for i in range(min_index):
-                head_present_probability *= self.frame_meter[i].probability_that_is_present()
-
-            best_probability = head_present_probability * tail_past_probability
-            best_index = min_index
-
-            index_from_which_tail_is_past = min_index + 1
-            while index_from_which_tail_is_past <= max_index:
-                current_column = self.frame_meter[index_from_which_tail_is_past - 1]
-
-                if current_column.probability_that_is_past() != 0:
-                    tail_past_probability /= current_column.probability_that_is_past()
-                else:
-                    tail_past_probability = 0
-
-                head_present_probability *= current_column.probability_that_is_present()
-
-                current_probability = tail_past_probability * head_present_probability
-                if current_probability > best_probability:
-                    best_probability = current_probability
-                    best_index = index_from_which_tail_is_past
+            best_index = self.get_most_likely_index_from_which_tail_is_past(past_probabilities, present_probabilities,
+                                                                            min_index, max_index)
+            self.keep_first_columns(best_index)
 
-                index_from_which_tail_is_past += 1
-
-            self.frame_meter = self.frame_meter[:best_index]
+    @classmethod
+    def get_most_likely_index_from_which_tail_is_past(cls, past_probabilities: np.ndarray,
+                                                      present_probabilities: np.ndarray, min_index: int,
+                                                      max_index: int) -> int:
+        # Logarithms are added instead of multiplying probabilities, which vanish on long frame meters. Columns
+        # before min_index have a zero past probability and from max_index a zero present one, so between both
+        # indices every sum is finite
+        with np.errstate(divide='ignore'):
+            log_past_probabilities = np.log(past_probabilities)
+            log_present_probabilities = np.log(present_probabilities)
+        head_is_present = np.concatenate([[0], np.cumsum(log_present_probabilities)])
+        tail_is_past = np.concatenate([np.cumsum(log_past_probabilities[::-1])[::-1], [0]])
+
+        log_probabilities = (head_is_present + tail_is_past)[min_index:max_index + 1]
+        # The earliest index wins ties, also the ones that only differ by the rounding of the sums
+        is_best = log_probabilities >= log_probabilities.max() - cls.TOLERANCE_FOR_LOG_PROBABILITIES
+        return min_index + int(np.argmax(is_best))
 
     def move_last_past_frames_to_start(self) -> None:
         if len(self.frame_meter) != 0:
             window_to_look_in = self.frame_meter[-self.WINDOW_FOR_PAST_COLUMNS:]
+            is_past_in_window = self.get_dense_likelihoods().get_sub_range(
+                len(self.frame_meter) - len(window_to_look_in), len(self.frame_meter)).get_probabilities_that_are_past() \
+                >= FrameMeterColumnMap.THRESHOLD_PAST_PROBABILITY
             past_frames_from_tail = []
             index = len(window_to_look_in) - 1
             found_present_column = False
             while not found_present_column and index >= 0:
-                if window_to_look_in[index].is_past():
+                if is_past_in_window[index]:
                     past_frames_from_tail.append(window_to_look_in[index].transform_from_past_to_present())
                 else:
                     found_present_column = True
@@ -129,12 +183,28 @@ class FrameMeterObservation:
                 past_frames_from_tail.reverse()
                 new_list = past_frames_from_tail
                 new_list.append(FrameMeterColumnMap.get_end_window_column())
-                new_list.extend(self.frame_meter)
-                self.frame_meter = new_list
+                self.add_columns_at_the_start(new_list)
 
     def add_end_window_if_we_have_enough_states(self) -> None:
         if len(self.frame_meter) > 0.9 * self.NUMBER_OF_COLUMNS_IN_FRAME_METER:
-            self.frame_meter.append(FrameMeterColumnMap.get_end_window_column())
+            self.add_columns_at_the_end([FrameMeterColumnMap.get_end_window_column()])
+
+    def keep_first_columns(self, number_of_columns: int) -> None:
+        if self.is_dense_likelihoods_in_sync():
+            self.dense_likelihoods = self.dense_likelihoods.get_sub_range(0, number_of_columns)
+        del self.frame_meter[number_of_columns:]
+
+    def add_columns_at_the_start(self, columns: List[FrameMeterColumnMap]) -> None:
+        if self.is_dense_likelihoods_in_sync():
+            self.dense_likelihoods = DenseLikelihoodsOfFrameMeter.concatenate(
+                [DenseLikelihoodsOfFrameMeter.from_columns(columns), self.dense_likelihoods])
+        self.frame_meter = columns + self.frame_meter
+
+    def add_columns_at_the_end(self, columns: List[FrameMeterColumnMap]) -> None:
+        if self.is_dense_likelihoods_in_sync():
+            self.dense_likelihoods = DenseLikelihoodsOfFrameMeter.concatenate(
+                [self.dense_likelihoods, DenseLikelihoodsOfFrameMeter.from_columns(columns)])
+        self.frame_meter.extend(columns)
 
     def is_last_column_end_of_window(self) -> bool:
         if len(self.frame_meter) == 0:
@@ -156,6 +226,13 @@ class FrameMeterObservation:
             index -= 1
 
         if not found:
-            del self.frame_meter[0:]
+            self.keep_first_columns(0)
+        else:
+            self.keep_first_columns(maximum_of_not_cleanable_frames + 1)
+
+    def clean_continuous_columns_not_following_mask(self, is_cleanable: np.ndarray) -> None:
+        not_cleanable_indices = np.nonzero(~is_cleanable)[0]
+        if len(not_cleanable_indices) == 0:
+            self.keep_first_columns(0)
         else:
-            del self.frame_meter[maximum_of_not_cleanable_frames + 1:]
+            self.keep_first_columns(int(not_cleanable_indices[-1]) + 1)
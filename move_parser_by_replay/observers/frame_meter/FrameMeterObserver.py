@@ -1,26 +1,36 @@
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Self
+
+import numpy as np
 
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.base.Region import Region
 from move_parser_by_replay.base.Video import Video
 from move_parser_by_replay.observers.AbstractSequentialSearchObserver import AbstractSequentialSearchObserver
+from move_parser_by_replay.observers.frame_meter.ClassifierForFrameMeterStates import ClassifierForFrameMeterStates
+from move_parser_by_replay.observers.frame_meter.DenseLikelihoodsOfFrameMeter import DenseLikelihoodsOfFrameMeter
 from move_parser_by_replay.observers.frame_meter.FrameMeterColumn import FrameMeterColumn
 from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
 from move_parser_by_replay.observers.frame_meter.FrameMeterObservation import FrameMeterObservation
+from move_parser_by_replay.observers.frame_meter.LookUpTableForFrameMeterColors import LookUpTableForFrameMeterColors
 from move_parser_by_replay.observers.frame_meter.MergerForFrameMeterObservation import MergerForFrameMeterObservation
 from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
 from move_parser_by_replay.observers.frame_meter.StateType import StateType
+from move_parser_by_replay.observers.frame_meter.StripExtractorForFrameMeter import StripExtractorForFrameMeter
 from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalState
 
 
 class FrameMeterObserver(AbstractSequentialSearchObserver):
     NUMBER_OF_COLUMNS_IN_FRAME_METER = 80
     THRESHOLD_LAST_FRAMES_CHANGED_FOR_ACTUAL_MERGE = 40
+    # At normal speed the meter moves one column per frame, so the normal gap overlaps by most of the 80 columns
+    MINIMUM_OVERLAP_TO_MERGE = 10
 
     regions: Dict[Player, Region]
     positions_for_frame_meter_rectangles: Dict[Player, List[Position]]
+    strip_extractor: StripExtractorForFrameMeter
     observations: Dict[int, FrameMeterObservation]
+    look_up_table_for_workers: Optional[LookUpTableForFrameMeterColors]
 
     def __init__(self, video: Video):
         super().__init__(video)
@@ -33,7 +43,9 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
             Player.SECOND_PLAYER: []
         }
         self.initialise_positions_for_each_player()
+        self.strip_extractor = StripExtractorForFrameMeter(self.positions_for_frame_meter_rectangles)
         self.observations = {}
+        self.look_up_table_for_workers = None
 
     def initialise_positions_for_each_player(self) -> None:
         for player in self.regions:
@@ -48,11 +60,13 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
                 position = Position(position_to_look_x, middle_y_for_rectangle)
                 self.positions_for_frame_meter_rectangles[player].append(position)
 
+    def get_regions_of_interest(self) -> Optional[List[Region]]:
+        return list(self.regions.values())
+
     def apply_specific_observations_in_frame(self, frame_number: int) -> None:
         frame = self.get_frame_from_position(frame_number)
 
-        new_observation = FrameMeterObservation.fill_from_frame_and_positions(frame,
-                                                                              self.positions_for_frame_meter_rectangles)
+        new_observation = FrameMeterObservation.fill_from_frame_and_strip_extractor(frame, self.strip_extractor)
 
         new_observation.clean_nothing_frames_from_tail()
         new_observation.move_last_past_frames_to_start()
@@ -63,23 +77,56 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
     def get_saved_observation_in_frame(self, frame_number: int) -> FrameMeterObservation:
         return self.observations[frame_number]
 
+    def set_saved_observation_in_frame(self, frame_number: int, observation: FrameMeterObservation) -> None:
+        self.observations[frame_number] = observation
+
+    def forget_observation_in_frame(self, frame_number: int) -> None:
+        self.observations.pop(frame_number, None)
+
+    def get_observer_for_worker(self) -> Self:
+        observer_for_worker = super().get_observer_for_worker()
+        observer_for_worker.observations = {}
+        # The classifier keeps its look up table in the class, which spawned workers do not inherit
+        observer_for_worker.look_up_table_for_workers = ClassifierForFrameMeterStates.get_look_up_table()
+        return observer_for_worker
+
+    def prepare_in_worker(self) -> None:
+        ClassifierForFrameMeterStates.use_look_up_table(self.look_up_table_for_workers)
+
     def get_exact_list_from_frame(self, frame_number: int) -> List[FrameMeterColumnMap]:
         return self.get_saved_observation_in_frame(frame_number).get_frame_meter_list()
 
+    def is_observation_changed_between_frames(self, first_frame: int, second_frame: int) -> bool:
+        # Compression noise changes the weights of the states, but not the most likely state of each column
+        return self.observations[first_frame].get_signature() != self.observations[second_frame].get_signature()
+
     def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> List[FrameMeterColumnMap]:
         return MergerForFrameMeterObservation.merge_frame_meters(
             self.observations[first_frame], first_frame, self.observations[second_frame], second_frame
         )
 
-    def clean_final_list_if_needed(self) -> None:
-        self.exact_final_list: List[FrameMeterColumnMap]
-
-        self.exact_final_list: List[FrameMeterColumnMap] = [column for column in self.exact_final_list if
-                                                            not column.is_end_of_window()]
-        players = [Player.FIRST_PLAYER, Player.SECOND_PLAYER]
-
-        for player in players:
-            self.clean_final_list_if_needed_for_player(player)
+    def get_items_cleaned_one_by_one(self, items: List[FrameMeterColumnMap]) -> List[FrameMeterColumnMap]:
+        columns = [column for column in items if not column.is_end_of_window()]
+        for player in [Player.FIRST_PLAYER, Player.SECOND_PLAYER]:
+            self.move_all_impossible_states_to_uncertainty(columns, player)
+        return columns
+
+    def get_number_of_items_ready_for_sink(self, items: List[FrameMeterColumnMap]) -> int:
+        # Sparse full invulnerability frames copy the column before them once a column without them ends their run.
+        # Columns are split between two columns without them, so no run nor its copied column is cut. Runs at the
+        # start copy the last column of the whole list, so they wait for the end
+        if len(items) == 0 or self.is_full_invulnerability_for_any_player(items[0]):
+            return 0
+        for index in range(len(items) - 1, 0, -1):
+            if not self.is_full_invulnerability_for_any_player(items[index]) and \
+                    not self.is_full_invulnerability_for_any_player(items[index - 1]):
+                return index
+        return 0
+
+    def get_items_cleaned_together(self, items: List[FrameMeterColumnMap]) -> List[FrameMeterColumnMap]:
+        for player in [Player.FIRST_PLAYER, Player.SECOND_PLAYER]:
+            self.overwrite_full_invulnerability_frames_if_they_are_sparse(items, player)
+        return items
 
     def merge_two_sequences(self, first_sequence: List[FrameMeterColumnMap],
                             second_sequence: List[FrameMeterColumnMap], last_change_in_frames: int,
@@ -148,38 +195,27 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
         if len(potential_overlap_indices) == 1:
             return potential_overlap_indices[0]
 
-        overlap_ranges = []
-
-        for start_idx in potential_overlap_indices:
-            max_overlap_length = min(len(first_sequence) - start_idx, len(second_sequence))
-            overlap_ranges.append([start_idx, start_idx + max_overlap_length])
-
-        best_probability = 0
-        best_start_idx = potential_overlap_indices[0]
-
-        for start_idx, end_idx in overlap_ranges:
-            overlap_probability = 1.0
-
-            for i in range(min(end_idx - start_idx, len(second_sequence))):
-                first_seq_idx = start_idx + i
-                second_seq_idx = i
-
-                if first_seq_idx < len(first_sequence) and second_seq_idx < len(second_sequence):
-                    prob = first_sequence[first_seq_idx].probability_is_same_frame_meter_column_than(
-                        second_sequence[second_seq_idx])
-                    overlap_probability *= prob
-
-            if overlap_probability > best_probability:
-                best_probability = overlap_probability
-                best_start_idx = start_idx
-
-        start_overlap_position = best_start_idx
-
-        return start_overlap_position
-
-    def clean_final_list_if_needed_for_player(self, player: Player) -> None:
-        self.move_all_impossible_states_to_uncertainty(player)
-        self.overwrite_full_invulnerability_frames_if_they_are_sparse(player)
+        # Every pair of columns of every potential overlap is compared at once. Logarithms of the probabilities are
+        # added, as the products vanish on long overlaps
+        start_indices = np.array(potential_overlap_indices)
+        overlap_lengths = np.minimum(len(first_sequence) - start_indices, len(second_sequence))
+        overlap_of_pairs = np.repeat(np.arange(len(start_indices)), overlap_lengths)
+        second_indices = np.arange(overlap_lengths.sum()) - np.repeat(np.cumsum(overlap_lengths) - overlap_lengths,
+                                                                      overlap_lengths)
+        first_indices = start_indices[overlap_of_pairs] + second_indices
+
+        first_start_index = potential_overlap_indices[0]
+        first_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(first_sequence[first_start_index:])
+        second_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(second_sequence[:overlap_lengths.max()])
+        probabilities = first_likelihoods.get_columns(first_indices - first_start_index) \
+            .get_probabilities_are_same_columns_than(second_likelihoods.get_columns(second_indices))
+        with np.errstate(divide='ignore'):
+            log_probabilities = np.bincount(overlap_of_pairs, weights=np.log(probabilities),
+                                            minlength=len(start_indices))
+
+        # The earliest start wins ties, also the ones that only differ by the rounding of the sums
+        is_best = log_probabilities >= log_probabilities.max() - FrameMeterObservation.TOLERANCE_FOR_LOG_PROBABILITIES
+        return potential_overlap_indices[int(np.argmax(is_best))]
 
     @staticmethod
     def get_best_guess_from_list_of_columns(list_of_columns: List[FrameMeterColumnMap]) -> FrameMeterColumnMap:
@@ -189,9 +225,9 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
             return filtered_list[0]
         return list_of_columns[0]
 
-    def move_all_impossible_states_to_uncertainty(self, player: Player) -> None:
-        self.exact_final_list: List[FrameMeterColumnMap]
-        for index, column in enumerate(self.exact_final_list):
+    @staticmethod
+    def move_all_impossible_states_to_uncertainty(columns: List[FrameMeterColumnMap], player: Player) -> None:
+        for index, column in enumerate(columns):
             map_of_states = column.get_state_for_player(player)
             possibilities = map_of_states.get_dictionary_of_possibilities()
             states_to_replace: List[StateFrameMeter] = []
@@ -201,26 +237,35 @@ class FrameMeterObserver(AbstractSequentialSearchObserver):
             for state in states_to_replace:
                 map_of_states.replace_weight_in_value_for_uncertainty(state)
 
-    def overwrite_full_invulnerability_frames_if_they_are_sparse(self, player: Player) -> None:
-        self.exact_final_list: List[FrameMeterColumnMap]
+    @classmethod
+    def is_full_invulnerability_for_any_player(cls, column: FrameMeterColumnMap) -> bool:
+        return any(cls.is_full_invulnerability(column, player) for player in [Player.FIRST_PLAYER,
+                                                                              Player.SECOND_PLAYER])
+
+    @staticmethod
+    def is_full_invulnerability(column: FrameMeterColumnMap, player: Player) -> bool:
+        most_likely_possibility = column.get_state_for_player(player).get_known_most_likely_possibility()
+        return most_likely_possibility is not None and most_likely_possibility.get_state_type() in [
+            StateType.FULL_INVULNERABILITY_1,
+            StateType.FULL_INVULNERABILITY_2
+        ]
+
+    @classmethod
+    def overwrite_full_invulnerability_frames_if_they_are_sparse(cls, columns: List[FrameMeterColumnMap],
+                                                                 player: Player) -> None:
         list_of_full_invulnerability_states: List[int] = []
         threshold_for_invulnerability_frames_that_cannot_be_alone = 3
         continuous_invulnerability_frames = 0
-        for index, column in enumerate(self.exact_final_list):
-            state = column.get_state_for_player(player)
-            most_likely_possibility = state.get_known_most_likely_possibility()
-            if most_likely_possibility is not None and most_likely_possibility.get_state_type() in [
-                StateType.FULL_INVULNERABILITY_1,
-                StateType.FULL_INVULNERABILITY_2
-            ]:
+        for index, column in enumerate(columns):
+            if cls.is_full_invulnerability(column, player):
                 continuous_invulnerability_frames += 1
             else:
                 if 0 < continuous_invulnerability_frames <= threshold_for_invulnerability_frames_that_cannot_be_alone:
                     list_of_full_invulnerability_states.extend(range(index - continuous_invulnerability_frames, index))
                 continuous_invulnerability_frames = 0
         for index in list_of_full_invulnerability_states:
-            previous_state_to_copy = self.exact_final_list[index - 1].get_state_for_player(player)
-            self.exact_final_list[index].set_state_for_player(player, previous_state_to_copy)
+            previous_state_to_copy = columns[index - 1].get_state_for_player(player)
+            columns[index].set_state_for_player(player, previous_state_to_copy)
 
     def get_exact_list_for_player_as_frame_count(self, player: Player) -> List[Tuple[StateFrameMeter, int]]:
         self.exact_final_list: List[FrameMeterColumnMap]
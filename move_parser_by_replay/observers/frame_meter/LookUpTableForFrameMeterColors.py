@@ -0,0 +1,88 @@
+import hashlib
+import os
+from typing import Self
+
+import numpy as np
+
+from move_parser_by_replay.observers.frame_meter.ColorFrameMeter import ColorFrameMeter
+
+
+class LookUpTableForFrameMeterColors:
+    EXACT_BITS_PER_CHANNEL = 8
+    QUANTIZED_BITS_PER_CHANNEL = 6
+    DEFAULT_FOLDER = './data/cache/'
+    COLORS_PER_CHUNK_WHEN_BUILDING = 1 << 18
+
+    bits_per_channel: int
+    table: np.ndarray
+
+    def __init__(self, table: np.ndarray, bits_per_channel: int = EXACT_BITS_PER_CHANNEL):
+        if table.shape != (1 << (3 * bits_per_channel),):
+            raise ValueError(f"Look up table of shape {table.shape} does not match {bits_per_channel} bits per channel")
+        self.table = table
+        self.bits_per_channel = bits_per_channel
+
+    def get_bits_per_channel(self) -> int:
+        return self.bits_per_channel
+
+    def get_table(self) -> np.ndarray:
+        return self.table
+
+    def get_indices_of_potential_states_in_image(self, image_data: np.ndarray) -> np.ndarray:
+        shift = 8 - self.bits_per_channel
+        channels = image_data.astype(np.int32) >> shift
+        keys = (channels[..., 0] << (2 * self.bits_per_channel)) | (channels[..., 1] << self.bits_per_channel) \
+            | channels[..., 2]
+        return self.table[keys]
+
+    @classmethod
+    def build(cls, bits_per_channel: int = EXACT_BITS_PER_CHANNEL) -> Self:
+        if not 1 <= bits_per_channel <= cls.EXACT_BITS_PER_CHANNEL:
+            raise ValueError(f"Bits per channel must be between 1 and 8, got {bits_per_channel}")
+
+        shift = 8 - bits_per_channel
+        mask = (1 << bits_per_channel) - 1
+        number_of_colors = 1 << (3 * bits_per_channel)
+        table = np.empty(number_of_colors, dtype=np.uint8)
+
+        for start in range(0, number_of_colors, cls.COLORS_PER_CHUNK_WHEN_BUILDING):
+            keys = np.arange(start, min(start + cls.COLORS_PER_CHUNK_WHEN_BUILDING, number_of_colors))
+            channels = np.stack([keys >> (2 * bits_per_channel), keys >> bits_per_channel, keys], axis=-1) & mask
+            # Quantized buckets are represented by the color in their centre
+            colors = (channels << shift) + ((1 << shift) >> 1)
+            table[keys] = ColorFrameMeter.get_indices_of_potential_states_in_image(colors)
+
+        return cls(table, bits_per_channel)
+
+    @classmethod
+    def get_default_path(cls, bits_per_channel: int = EXACT_BITS_PER_CHANNEL, folder: str = DEFAULT_FOLDER) -> str:
+        return os.path.join(folder, 'frame_meter_colors_{}bits_{}.npy'.format(bits_per_channel,
+                                                                               cls.get_signature_of_colors()))
+
+    @staticmethod
+    def get_signature_of_colors() -> str:
+        description = repr((sorted((str(state), color) for state, color in ColorFrameMeter.ALL_COLORS.items()),
+                            [str(state) for state in ColorFrameMeter.get_states_array()],
+                            ColorFrameMeter.THRESHOLD_FOR_DISTANCE))
+        return hashlib.sha1(description.encode()).hexdigest()[:12]
+
+    def save(self, file_path: str) -> None:
+        folder = os.path.dirname(file_path)
+        if folder != '':
+            os.makedirs(folder, exist_ok=True)
+        temporary_path = file_path + '.tmp.npy'
+        np.save(temporary_path, self.table)
+        os.replace(temporary_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str, bits_per_channel: int = EXACT_BITS_PER_CHANNEL) -> Self:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Look up table not found: {file_path}")
+        return cls(np.load(file_path, mmap_mode='r'), bits_per_channel)
+
+    @classmethod
+    def load_or_build(cls, bits_per_channel: int = EXACT_BITS_PER_CHANNEL, folder: str = DEFAULT_FOLDER) -> Self:
+        file_path = cls.get_default_path(bits_per_channel, folder)
+        if not os.path.exists(file_path):
+            cls.build(bits_per_channel).save(file_path)
+        return cls.load(file_path, bits_per_channel)
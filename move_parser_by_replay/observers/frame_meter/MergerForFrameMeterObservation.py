@@ -1,9 +1,9 @@
 import copy
 from typing import List, Optional
 
+from move_parser_by_replay.observers.frame_meter.AlignerForFrameMeterColumns import AlignerForFrameMeterColumns
 from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
 from move_parser_by_replay.observers.frame_meter.FrameMeterObservation import FrameMeterObservation
-from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
 
 
 class MergerForFrameMeterObservation:
@@ -21,8 +21,10 @@ class MergerForFrameMeterObservation:
         #        len(second_observation.get_frame_meter_list()) <= cls.SIZE_OF_SECOND_OBSERVATION_TO_MERGE_MANUALLY:
         #    return cls.merge_manually(first_observation, second_observation)
 
-        return DiffLibWrapper.merge_sequences(first_observation.get_frame_meter_list(),
-                                              second_observation.get_frame_meter_list())
+        # FrameMeterObserver merges sequentially through merge_two_sequences, this is only used by
+        # get_merge_observation_in_two_frames
+        return AlignerForFrameMeterColumns.merge_sequences(first_observation.get_frame_meter_list(),
+                                                           second_observation.get_frame_meter_list())
 
     @classmethod
     def merge_manually(cls, first_observation: FrameMeterObservation, second_observation: FrameMeterObservation) -> \
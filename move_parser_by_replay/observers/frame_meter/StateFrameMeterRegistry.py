@@ -1,5 +1,5 @@
 from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from move_parser_by_replay.observers.frame_meter.StateType import StateType
 from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalState
@@ -7,6 +7,9 @@ from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalSt
 
 class StateFrameMeterRegistry:
     INSTANCES: Dict[Tuple[StateType, TemporalState], Tuple[StateFrameMeter, int]] = {}
+    # Ordinal of every state, used to store likelihood maps as arrays
+    INDICES: Dict[Tuple[StateType, TemporalState], int] = {}
+    STATES_IN_ORDER: List[StateFrameMeter] = []
 
     PRIORITIES: Dict[StateType, int] = {
         StateType.ACTIVE: 1,
@@ -36,6 +39,8 @@ class StateFrameMeterRegistry:
                 if temporal_state == TemporalState.PAST:
                     priority += 1
                 cls.INSTANCES[(state_type, temporal_state)] = (state, priority)
+                cls.INDICES[(state_type, temporal_state)] = len(cls.STATES_IN_ORDER)
+                cls.STATES_IN_ORDER.append(state)
 
     @classmethod
     def get(cls, state_type: StateType, temporal_state: TemporalState) -> StateFrameMeter:
@@ -49,6 +54,22 @@ class StateFrameMeterRegistry:
     def get_weight(cls, state_type: StateType, temporal_state: TemporalState) -> int:
         return cls.CONSTANT_FROM_PRIORITY_TO_WEIGHT // cls.INSTANCES[(state_type, temporal_state)][1]
 
+    @classmethod
+    def get_index(cls, state: StateFrameMeter) -> int:
+        return cls.INDICES[(state.get_state_type(), state.get_temporal_state())]
+
+    @classmethod
+    def get_by_index(cls, index: int) -> StateFrameMeter:
+        return cls.STATES_IN_ORDER[index]
+
+    @classmethod
+    def get_states_in_order(cls) -> List[StateFrameMeter]:
+        return cls.STATES_IN_ORDER
+
+    @classmethod
+    def get_number_of_states(cls) -> int:
+        return len(cls.STATES_IN_ORDER)
+
     @classmethod
     def from_csv_value(cls, csv_value: str) -> Optional[StateFrameMeter]:
         mapping = {
@@ -0,0 +1,48 @@
+from typing import Dict, List
+
+import numpy as np
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Position import Position
+
+
+class StripExtractorForFrameMeter:
+    DEFAULT_CELL_WIDTH = 10
+    DEFAULT_CELL_HEIGHT = 20
+
+    positions: Dict[Player, List[Position]]
+    players: List[Player]
+    rows_for_cells: np.ndarray
+    columns_for_cells: np.ndarray
+
+    def __init__(self, positions: Dict[Player, List[Position]], cell_width: int = DEFAULT_CELL_WIDTH,
+                 cell_height: int = DEFAULT_CELL_HEIGHT):
+        self.positions = positions
+        self.players = list(positions.keys())
+        left_x = np.array([[position.get_x() - cell_width // 2 for position in positions[player]]
+                           for player in self.players])
+        top_y = np.array([[position.get_y() - cell_height // 2 for position in positions[player]]
+                          for player in self.players])
+        if np.any(top_y != top_y[:, :1]):
+            raise ValueError('All the cells of the frame meter of a player must be in the same row')
+
+        # Shapes (player, 1, height, 1) and (player, column, 1, width) broadcast to (player, column, height, width)
+        self.rows_for_cells = (top_y[:, 0, np.newaxis] + np.arange(cell_height))[:, np.newaxis, :, np.newaxis]
+        self.columns_for_cells = (left_x[:, :, np.newaxis] + np.arange(cell_width))[:, :, np.newaxis, :]
+
+    def get_positions(self) -> Dict[Player, List[Position]]:
+        return self.positions
+
+    def get_players(self) -> List[Player]:
+        return self.players
+
+    def is_frame_big_enough(self, frame: Frame) -> bool:
+        height, width = frame.shape()[:2]
+        top_y, left_x = frame.get_origin().get_inverted_tuple()
+        return self.rows_for_cells.min() >= top_y and self.columns_for_cells.min() >= left_x and \
+            self.rows_for_cells.max() < top_y + height and self.columns_for_cells.max() < left_x + width
+
+    def get_cells_from_frame(self, frame: Frame) -> np.ndarray:
+        top_y, left_x = frame.get_origin().get_inverted_tuple()
+        return frame.get_image_data()[self.rows_for_cells - top_y, self.columns_for_cells - left_x]
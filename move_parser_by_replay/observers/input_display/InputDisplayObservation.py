@@ -1,4 +1,5 @@
-from typing import Dict, List, cast, Self
+from math import ceil
+from typing import Dict, List, cast, Self, Tuple, Optional
 
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.templates.Button import Button
@@ -15,6 +16,9 @@ class InputDisplayObservation:
     MAX_ROWS_TO_OBSERVE = 19
     MINIMUM_ROWS_FOR_OVERLAPS = 4
     SUCCESS_THRESHOLD_FOR_COMPARING_ROWS = 0.5
+    MINIMUM_FRAMES_PRESSED = 0
+    MAXIMUM_FRAMES_PRESSED = 99
+    WEIGHT_FOR_FULLY_CONFIDENT_FRAMES_PRESSED = 3
 
     observation_rows_by_player: Dict[Player, Dict[int, InputDisplayObservationRow]]
     raw_frame_number: int
@@ -40,6 +44,10 @@ class InputDisplayObservation:
     def get_observation_rows_by_player(self) -> Dict[Player, Dict[int, InputDisplayObservationRow]]:
         return self.observation_rows_by_player
 
+    def set_observation_rows_of_player(self, player: Player,
+                                       observation_rows: Dict[int, InputDisplayObservationRow]) -> None:
+        self.observation_rows_by_player[player] = observation_rows
+
     def get_observation_rows_by_list_of_ints_and_player(self, player: Player,
                                                         list_of_rows: List[int]) -> List[InputDisplayObservationRow]:
         list_observation_rows = []
@@ -50,30 +58,68 @@ class InputDisplayObservation:
 
     def add_observation_of_buttons(self, list_of_buttons_recognised: List[RecognisedTemplateInPosition],
                                    player: Player) -> None:
-        buttons_by_row = self.get_templates_grouped_by_row(list_of_buttons_recognised)
+        self.add_observation_of_buttons_in_rows(self.get_templates_grouped_by_row(list_of_buttons_recognised), player)
+
+    def add_observation_of_buttons_in_rows(self, buttons_by_row: Dict[int, List[TemplateImage]],
+                                           player: Player) -> None:
         buttons_by_row = cast(Dict[int, List[Button]], buttons_by_row)
 
         for row_key in buttons_by_row:
+            if len(buttons_by_row[row_key]) == 0:
+                continue
+
             buttons = buttons_by_row[row_key]
             list_of_buttons = ListOfButtons(buttons)
             self.observation_rows_by_player[player][row_key].add_buttons_pressed_observation(list_of_buttons, 9)
 
     def add_observation_of_directions(self, list_of_directions_recognised: List[RecognisedTemplateInPosition],
                                       player: Player) -> None:
-        for direction_recognised in list_of_directions_recognised:
-            mapped_row = self.map_y_from_position_to_row_key(direction_recognised.get_position().get_y())
+        self.add_observation_of_directions_in_rows(
+            self.get_templates_grouped_by_row(list_of_directions_recognised), player)
 
-            direction = cast(Direction, direction_recognised.get_template())
-            self.observation_rows_by_player[player][mapped_row].add_direction_pressed_observation(direction, 9)
+    def add_observation_of_directions_in_rows(self, directions_by_row: Dict[int, List[TemplateImage]],
+                                              player: Player) -> None:
+        for row_key in directions_by_row:
+            for direction in directions_by_row[row_key]:
+                direction = cast(Direction, direction)
+                self.observation_rows_by_player[player][row_key].add_direction_pressed_observation(direction, 9)
 
     def add_observation_of_frames_pressed(self, list_of_pressed_frames_recognised: List[RecognisedNumberInPosition],
-                                          player: Player) -> None:
+                                          player: Player, is_weighted_by_confidence: bool = False) -> None:
         for number_recognised in list_of_pressed_frames_recognised:
             mapped_row = self.map_y_from_position_to_row_key(number_recognised.get_position().get_y())
 
             number = number_recognised.get_number()
-            if 0 <= number <= 99:
-                self.observation_rows_by_player[player][mapped_row].add_frames_pressed_observation(number, 1)
+            if self.is_frames_pressed_in_range(number):
+                weight = self.get_weight_for_confidence(number_recognised.get_confidence()) \
+                    if is_weighted_by_confidence else 1
+                self.observation_rows_by_player[player][mapped_row].add_frames_pressed_observation(number, weight)
+
+    @classmethod
+    def is_frames_pressed_in_range(cls, number: int) -> bool:
+        return cls.MINIMUM_FRAMES_PRESSED <= number <= cls.MAXIMUM_FRAMES_PRESSED
+
+    @classmethod
+    def get_weight_for_confidence(cls, confidence: float) -> int:
+        return max(1, round(confidence * cls.WEIGHT_FOR_FULLY_CONFIDENT_FRAMES_PRESSED))
+
+    def get_rows_with_doubtful_frames_pressed(self, list_of_pressed_frames_recognised: List[RecognisedNumberInPosition],
+                                              player: Player, minimum_confidence: float) -> List[int]:
+        confident_rows = set()
+        doubtful_rows = set()
+        for number_recognised in list_of_pressed_frames_recognised:
+            mapped_row = self.map_y_from_position_to_row_key(number_recognised.get_position().get_y())
+            if self.is_frames_pressed_in_range(number_recognised.get_number()) and \
+                    number_recognised.get_confidence() >= minimum_confidence:
+                confident_rows.add(mapped_row)
+            else:
+                doubtful_rows.add(mapped_row)
+
+        # A row showing a direction must show how many frames it was held too
+        rows_without_frames_pressed = [row_key for row_key, observation_row
+                                       in self.observation_rows_by_player[player].items()
+                                       if observation_row.is_direction_observed() and row_key not in confident_rows]
+        return sorted(doubtful_rows.difference(confident_rows).union(rows_without_frames_pressed))
 
     def get_templates_grouped_by_row(self, list_of_buttons_recognised) -> Dict[int, List[TemplateImage]]:
         buttons_by_row: Dict[int, List[TemplateImage]] = {}
@@ -87,11 +133,25 @@ class InputDisplayObservation:
         return buttons_by_row
 
     @classmethod
-    def map_y_from_position_to_row_key(cls, y_from_position: int) -> int:
+    def get_row_size(cls) -> float:
         bottom_y = MatchTemplateNumberRecogniser.BOTTOM_Y_FOR_SUBREGION
         top_y = MatchTemplateNumberRecogniser.HEIGHT_Y_FOR_SUBREGION + bottom_y
         total_size = top_y - bottom_y
-        row_size = total_size / cls.MAX_ROWS_TO_OBSERVE
+        return total_size / cls.MAX_ROWS_TO_OBSERVE
+
+    @classmethod
+    def get_top_y_of_row_key(cls, row_key: int) -> int:
+        return int((row_key - 1) * cls.get_row_size())
+
+    @classmethod
+    def get_rows_in_strip(cls) -> Dict[int, Tuple[int, int]]:
+        row_height = ceil(cls.get_row_size())
+        return {row_key: (cls.get_top_y_of_row_key(row_key), row_height)
+                for row_key in range(1, cls.MAX_ROWS_TO_OBSERVE + 1)}
+
+    @classmethod
+    def map_y_from_position_to_row_key(cls, y_from_position: int) -> int:
+        row_size = cls.get_row_size()
 
         relative_y = y_from_position
         guessed_row = int(relative_y / row_size)
@@ -101,22 +161,71 @@ class InputDisplayObservation:
 
         return guessed_row + 1
 
+    def get_row_signatures(self, player: Player) -> Dict[int, Optional[Tuple[Direction, ListOfButtons, int]]]:
+        return {row_key: observation_row.get_signature()
+                for row_key, observation_row in self.observation_rows_by_player[player].items()}
+
+    def get_most_likely_slide_by_signatures(self, other_observation: Self, player: Player,
+                                            is_only_observed_rows_counted: bool = False) -> Optional[int]:
+        signatures = self.get_row_signatures(player)
+        row_keys_by_signature: Dict[Tuple[Direction, ListOfButtons, int], List[int]] = {}
+        for row_key, signature in other_observation.get_row_signatures(player).items():
+            if signature is not None:
+                row_keys_by_signature.setdefault(signature, []).append(row_key)
+
+        # Every pair of rows with the same signature votes for the slide that would put one over the other
+        matches_by_slide: Dict[int, int] = {}
+        for row_key, signature in signatures.items():
+            if row_key < 2 or signature is None:
+                continue
+            for other_row_key in row_keys_by_signature.get(signature, []):
+                slided_rows_number = other_row_key - row_key
+                if slided_rows_number >= 0:
+                    matches_by_slide[slided_rows_number] = matches_by_slide.get(slided_rows_number, 0) + 1
+
+        most_likely_slide = None
+        for slided_rows_number in sorted(matches_by_slide):
+            overlapped_rows = self.MAX_ROWS_TO_OBSERVE - slided_rows_number - 1
+            minimum_matches = overlapped_rows // 2
+            if is_only_observed_rows_counted:
+                # While the display is still filling up, empty rows cannot be matched by any slide
+                observed_rows = sum(1 for row_key in range(2, 2 + overlapped_rows) if signatures[row_key] is not None)
+                minimum_matches = max(1, observed_rows // 2)
+            if overlapped_rows < self.MINIMUM_ROWS_FOR_OVERLAPS or \
+                    matches_by_slide[slided_rows_number] < minimum_matches:
+                continue
+            if most_likely_slide is None or matches_by_slide[slided_rows_number] > matches_by_slide[most_likely_slide]:
+                most_likely_slide = slided_rows_number
+
+        return most_likely_slide
+
     def is_observation_inside_other_observation_slided_n_rows(self, other_observation: Self,
                                                               slided_rows_number: int,
-                                                              player: Player) -> bool:
+                                                              player: Player,
+                                                              is_only_observed_rows_counted: bool = False) -> bool:
         overlapped_rows = self.MAX_ROWS_TO_OBSERVE - slided_rows_number - 1
 
         if overlapped_rows < self.MINIMUM_ROWS_FOR_OVERLAPS:
             return False
 
         success_count = 0
+        observed_rows = 0
         for row_key in range(2, 2 + overlapped_rows):
             first_row = self.observation_rows_by_player[player][row_key]
             row_to_compare = other_observation.observation_rows_by_player[player][row_key + slided_rows_number]
+            if not first_row.is_likely_empty():
+                observed_rows += 1
             probability = first_row.get_probability_this_is_same_row_than(row_to_compare)
             if probability >= self.SUCCESS_THRESHOLD_FOR_COMPARING_ROWS and \
                     not first_row.is_likely_empty() and \
                     not row_to_compare.is_likely_empty():
                 success_count += 1
 
+        if is_only_observed_rows_counted:
+            # While the display is still filling up, empty rows cannot be matched by any slide
+            return success_count >= max(1, observed_rows // 2)
         return success_count >= overlapped_rows // 2
+
+    def is_filling_up(self, player: Player) -> bool:
+        # Rows appear at the top and scroll down, so the oldest row stays empty until the display is full
+        return self.observation_rows_by_player[player][self.MAX_ROWS_TO_OBSERVE].is_likely_empty()
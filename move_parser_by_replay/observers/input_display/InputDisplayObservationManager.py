@@ -1,77 +1,251 @@
-from typing import List, Dict
+import copy
+import hashlib
+from math import ceil
+from typing import List, Dict, Iterable, Tuple
+
+import numpy as np
 
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Position import Position
+from move_parser_by_replay.base.Region import Region
 from move_parser_by_replay.base.Video import Video
 from move_parser_by_replay.base.templates.Button import Button
 from move_parser_by_replay.base.templates.Direction import Direction
 from move_parser_by_replay.base.templates.Number import Number
+from move_parser_by_replay.base.templates.TemplateImage import TemplateImage
 from move_parser_by_replay.observers.AbstractBinarySearchObserver import AbstractBinarySearchObserver
 from move_parser_by_replay.observers.input_display.InputDisplayObservation import InputDisplayObservation
 from move_parser_by_replay.observers.input_display.InputDisplayRow import InputDisplayRow
 from move_parser_by_replay.observers.input_display.MergerForInputDisplayObservations import \
     MergerForInputDisplayObservations
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+from move_parser_by_replay.util.RecognisedTemplateInPosition import RecognisedTemplateInPosition
 from move_parser_by_replay.util.button_recognisers.MatchTemplateButtonRecogniser import MatchTemplateButtonRecogniser
 from move_parser_by_replay.util.direction_recognisers.MatchTemplateDirectionRecogniser import \
     MatchTemplateDirectionRecogniser
 from move_parser_by_replay.util.number_recognisers.EasyOCRNumberRecogniser import EasyOCRNumberRecogniser
 from move_parser_by_replay.util.number_recognisers.MatchTemplateNumberRecogniser import MatchTemplateNumberRecogniser
 from move_parser_by_replay.util.number_recognisers.NumberRecogniserInterface import NumberRecogniserInterface
+from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition import RecognisedNumberInPosition
 
 
 class InputDisplayObservationManager(AbstractBinarySearchObserver):
+    MAXIMUM_DISTANCE_BETWEEN_FRAMES_TO_MERGE = MergerForInputDisplayObservations.THRESHOLD_TO_START_CHECKING_OVERLAPS
+    MINIMUM_CONFIDENCE_TO_SKIP_NEXT_RECOGNISERS = 0.8
+    # Numbers, directions and buttons of a player, from the left of the numbers to the right of the buttons
+    LEFT_X_FOR_FINGERPRINT = 54
+    WIDTH_FOR_FINGERPRINT = 243
+
     number_recognisers: List[NumberRecogniserInterface]
+    is_cascade_of_number_recognisers: bool
+    is_row_anchored_matching: bool
+    is_change_detection_enabled: bool
+    frame_number_by_fingerprint: Dict[Tuple[Player, bytes], int]
+    template_number_recogniser: MatchTemplateNumberRecogniser
     button_recogniser: MatchTemplateButtonRecogniser
     direction_recogniser: MatchTemplateDirectionRecogniser
 
     observations: Dict[int, InputDisplayObservation]
 
     def __init__(self, numbers_template: Dict[str, Number], buttons_template: Dict[str, Button],
-                 directions_template: Dict[str, Direction], video: Video):
+                 directions_template: Dict[str, Direction], video: Video,
+                 is_cascade_of_number_recognisers: bool = False,
+                 preprocessing: PreprocessingForTemplateMatching = PreprocessingForTemplateMatching.COLOR):
         super().__init__(video)
         self.number_recognisers = []
+        self.is_cascade_of_number_recognisers = is_cascade_of_number_recognisers
 
+        # In cascade, the template recogniser reads the whole strips and the others only the rows it was not sure of
+        self.template_number_recogniser = MatchTemplateNumberRecogniser(numbers_template, preprocessing)
         self.number_recognisers.append(EasyOCRNumberRecogniser())
-        self.number_recognisers.append(MatchTemplateNumberRecogniser(numbers_template))
-        self.button_recogniser = MatchTemplateButtonRecogniser(buttons_template)
-        self.direction_recogniser = MatchTemplateDirectionRecogniser(directions_template)
+        self.number_recognisers.append(self.template_number_recogniser)
+        self.button_recogniser = MatchTemplateButtonRecogniser(buttons_template, preprocessing)
+        self.direction_recogniser = MatchTemplateDirectionRecogniser(directions_template, preprocessing)
+        self.is_row_anchored_matching = False
+        self.is_change_detection_enabled = True
+        self.frame_number_by_fingerprint = {}
 
         self.observations = {}
 
     def get_observations(self) -> Dict[int, InputDisplayObservation]:
         return self.observations
 
-    def apply_specific_observations_in_frame(self, frame_number: int):
-        frame = self.video.get_frame_from_position(frame_number)
-
-        self.apply_observations_for_player(frame, Player.FIRST_PLAYER, frame_number)
-        self.apply_observations_for_player(frame, Player.SECOND_PLAYER, frame_number)
+    def set_cascade_of_number_recognisers(self, is_cascade_of_number_recognisers: bool) -> None:
+        self.is_cascade_of_number_recognisers = is_cascade_of_number_recognisers
+
+    def set_row_anchored_matching(self, is_row_anchored_matching: bool) -> None:
+        # Templates are only searched around the centre of the rows of the input display instead of the whole strip
+        self.is_row_anchored_matching = is_row_anchored_matching
+        rows = InputDisplayObservation.get_rows_in_strip() if is_row_anchored_matching else None
+        self.template_number_recogniser.set_rows_to_anchor(rows)
+
+    def set_change_detection(self, is_change_detection_enabled: bool) -> None:
+        self.is_change_detection_enabled = is_change_detection_enabled
+
+    def apply_specific_observations_in_given_frame(self, frame: Frame, frame_number: int):
+        self.apply_specific_observations_in_given_frames([Frame(frame.get_image_data(), frame_number,
+                                                                frame.get_origin())])
+
+    def apply_specific_observations_in_given_frames(self, frames: Iterable[Frame]) -> None:
+        pending_regions_for_numbers: List[Tuple[int, Player, Frame]] = []
+        pending_reused_observations: List[Tuple[int, Player, int]] = []
+        for frame in frames:
+            frame_number = frame.get_frame_number()
+            if frame_number not in self.observations:
+                self.observations[frame_number] = InputDisplayObservation(frame_number)
+
+            for player in [Player.FIRST_PLAYER, Player.SECOND_PLAYER]:
+                if self.is_change_detection_enabled:
+                    # A strip identical to one already observed gives the same observation, recognition is skipped
+                    fingerprint = (player, self.get_fingerprint_of_player(frame, player))
+                    if fingerprint in self.frame_number_by_fingerprint:
+                        pending_reused_observations.append((frame_number, player,
+                                                            self.frame_number_by_fingerprint[fingerprint]))
+                        # The latest frame is the one kept alive by observers that forget the older ones
+                        self.frame_number_by_fingerprint[fingerprint] = frame_number
+                        continue
+                    self.frame_number_by_fingerprint[fingerprint] = frame_number
+
+                self.apply_observations_of_templates_for_player(frame, player, frame_number)
+                # The strip is copied so the full frame can be released before the numbers are read
+                subregion_for_numbers = MatchTemplateNumberRecogniser.get_subregion(frame, player)
+                subregion_for_numbers = Frame(subregion_for_numbers.get_image_data().copy(), frame_number)
+                pending_regions_for_numbers.append((frame_number, player, subregion_for_numbers))
+
+        self.apply_observations_of_numbers_in_regions(pending_regions_for_numbers)
+
+        # Observations are copied once their numbers are read, they may come from frames of this same batch
+        for frame_number, player, observed_frame_number in pending_reused_observations:
+            observation_rows = self.observations[observed_frame_number].get_observation_rows_by_player()[player]
+            self.observations[frame_number].set_observation_rows_of_player(player, copy.deepcopy(observation_rows))
+
+    @classmethod
+    def get_subregion_for_fingerprint(cls, frame: Frame, player: Player) -> Frame:
+        if player == Player.FIRST_PLAYER:
+            region = Region(cls.LEFT_X_FOR_FINGERPRINT, MatchTemplateNumberRecogniser.BOTTOM_Y_FOR_SUBREGION,
+                            cls.WIDTH_FOR_FINGERPRINT, MatchTemplateNumberRecogniser.HEIGHT_Y_FOR_SUBREGION)
+        else:
+            region = Region(1920 - cls.LEFT_X_FOR_FINGERPRINT - cls.WIDTH_FOR_FINGERPRINT,
+                            MatchTemplateNumberRecogniser.BOTTOM_Y_FOR_SUBREGION, cls.WIDTH_FOR_FINGERPRINT,
+                            MatchTemplateNumberRecogniser.HEIGHT_Y_FOR_SUBREGION)
+
+        return frame.get_subregion(region)
+
+    @classmethod
+    def get_fingerprint_of_player(cls, frame: Frame, player: Player) -> bytes:
+        # Every pixel is hashed, a strip that differs by a single value is recognised again
+        strip = np.ascontiguousarray(cls.get_subregion_for_fingerprint(frame, player).get_image_data())
+        return hashlib.blake2b(strip.tobytes(), digest_size=16).digest()
 
     def get_saved_observation_in_frame(self, frame_number: int):
         return self.observations[frame_number]
 
+    def forget_observation_in_frame(self, frame_number: int) -> None:
+        self.observations.pop(frame_number, None)
+        self.frame_number_by_fingerprint = {fingerprint: observed_frame_number for fingerprint, observed_frame_number
+                                            in self.frame_number_by_fingerprint.items()
+                                            if observed_frame_number != frame_number}
+
     def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> List:
         return MergerForInputDisplayObservations.merge_input_displays(
             self.observations[first_frame], first_frame, self.observations[second_frame], second_frame,
             Player.FIRST_PLAYER)
 
-    def apply_observations_for_player(self, frame: Frame, player: Player, frame_number: int) -> None:
-        subregion_for_buttons = MatchTemplateButtonRecogniser.get_subregion(frame, player)
-        buttons_recognised = self.button_recogniser.search_templates_in_image(subregion_for_buttons)
-
+    def apply_observations_of_templates_for_player(self, frame: Frame, player: Player, frame_number: int) -> None:
         if frame_number not in self.observations:
             self.observations[frame_number] = InputDisplayObservation(frame_number)
 
+        subregion_for_buttons = MatchTemplateButtonRecogniser.get_subregion(frame, player)
+        subregion_for_directions = MatchTemplateDirectionRecogniser.get_subregion(frame, player)
+        if self.is_row_anchored_matching:
+            rows = InputDisplayObservation.get_rows_in_strip()
+            buttons_by_row = self.button_recogniser.search_templates_in_rows(subregion_for_buttons, rows)
+            self.observations[frame_number].add_observation_of_buttons_in_rows(
+                self.get_templates_by_row(buttons_by_row), player)
+
+            directions_by_row = self.direction_recogniser.search_templates_in_rows(subregion_for_directions, rows)
+            self.observations[frame_number].add_observation_of_directions_in_rows(
+                self.get_templates_by_row(directions_by_row), player)
+            return
+
+        buttons_recognised = self.button_recogniser.search_templates_in_image(subregion_for_buttons)
         self.observations[frame_number].add_observation_of_buttons(buttons_recognised, player)
 
-        subregion_for_directions = MatchTemplateDirectionRecogniser.get_subregion(frame, player)
         directions_recognised = self.direction_recogniser.search_templates_in_image(subregion_for_directions)
         self.observations[frame_number].add_observation_of_directions(directions_recognised, player)
 
-        subregion_for_numbers = MatchTemplateNumberRecogniser.get_subregion(frame, player)
-        for number_recogniser in self.number_recognisers:
-            numbers_recognised = number_recogniser.get_numbers_in_region(subregion_for_numbers)
-            self.observations[frame_number].add_observation_of_frames_pressed(numbers_recognised, player)
+    @staticmethod
+    def get_templates_by_row(templates_recognised_by_row: Dict[int, List[RecognisedTemplateInPosition]]) -> \
+            Dict[int, List[TemplateImage]]:
+        return {row_key: [template_recognised.get_template() for template_recognised in templates_recognised]
+                for row_key, templates_recognised in templates_recognised_by_row.items()}
+
+    def apply_observations_of_numbers_in_regions(self, regions_for_numbers: List[Tuple[int, Player, Frame]]) -> None:
+        if not self.is_cascade_of_number_recognisers:
+            for number_recogniser in self.number_recognisers:
+                self.apply_observations_of_number_recogniser_in_regions(number_recogniser, regions_for_numbers)
+            return
+
+        numbers_recognised_by_region = self.apply_observations_of_number_recogniser_in_regions(
+            self.template_number_recogniser, regions_for_numbers)
+
+        rows_for_numbers: List[Tuple[int, Player, Frame]] = []
+        top_y_of_rows: List[int] = []
+        for (frame_number, player, region), numbers_recognised in zip(regions_for_numbers,
+                                                                      numbers_recognised_by_region):
+            rows_to_read_again = self.observations[frame_number].get_rows_with_doubtful_frames_pressed(
+                numbers_recognised, player, self.MINIMUM_CONFIDENCE_TO_SKIP_NEXT_RECOGNISERS)
+            for row_key in rows_to_read_again:
+                top_y = InputDisplayObservation.get_top_y_of_row_key(row_key)
+                row_region = Region(0, top_y, region.shape()[1], ceil(InputDisplayObservation.get_row_size()))
+                rows_for_numbers.append((frame_number, player, region.get_subregion(row_region)))
+                top_y_of_rows.append(top_y)
+
+        for number_recogniser in self.get_number_recognisers_after_templates():
+            if len(rows_for_numbers) == 0:
+                break
+
+            numbers_recognised_by_row = number_recogniser.get_numbers_in_regions(
+                [row for _, _, row in rows_for_numbers])
+
+            rows_still_doubtful = []
+            top_y_of_rows_still_doubtful = []
+            for (frame_number, player, row), top_y, numbers_recognised in zip(rows_for_numbers, top_y_of_rows,
+                                                                              numbers_recognised_by_row):
+                # Positions are moved back to the coordinates of the strip, so they are mapped to the same row
+                numbers_recognised_in_strip = [
+                    RecognisedNumberInPosition(Position(number.get_position().get_x(),
+                                                        number.get_position().get_y() + top_y),
+                                               number.get_number(), number.get_confidence())
+                    for number in numbers_recognised]
+                self.observations[frame_number].add_observation_of_frames_pressed(
+                    numbers_recognised_in_strip, player, is_weighted_by_confidence=True)
+
+                is_row_read = any(InputDisplayObservation.is_frames_pressed_in_range(number.get_number()) and
+                                  number.get_confidence() >= self.MINIMUM_CONFIDENCE_TO_SKIP_NEXT_RECOGNISERS
+                                  for number in numbers_recognised)
+                if not is_row_read:
+                    rows_still_doubtful.append((frame_number, player, row))
+                    top_y_of_rows_still_doubtful.append(top_y)
+
+            rows_for_numbers = rows_still_doubtful
+            top_y_of_rows = top_y_of_rows_still_doubtful
+
+    def apply_observations_of_number_recogniser_in_regions(self, number_recogniser: NumberRecogniserInterface,
+                                                           regions_for_numbers: List[Tuple[int, Player, Frame]]) -> \
+            List[List[RecognisedNumberInPosition]]:
+        numbers_recognised_by_region = number_recogniser.get_numbers_in_regions(
+            [region for _, _, region in regions_for_numbers])
+        for (frame_number, player, _), numbers_recognised in zip(regions_for_numbers, numbers_recognised_by_region):
+            self.observations[frame_number].add_observation_of_frames_pressed(
+                numbers_recognised, player, self.is_cascade_of_number_recognisers)
+
+        return numbers_recognised_by_region
+
+    def get_number_recognisers_after_templates(self) -> List[NumberRecogniserInterface]:
+        return [number_recogniser for number_recogniser in self.number_recognisers
+                if number_recogniser is not self.template_number_recogniser]
 
     def clean_final_list_if_needed(self) -> None:
 
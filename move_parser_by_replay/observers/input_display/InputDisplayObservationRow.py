@@ -1,4 +1,4 @@
-from typing import Self
+from typing import Self, Optional, Tuple
 
 from move_parser_by_replay.base.templates.Direction import Direction
 from move_parser_by_replay.base.templates.ListOfButtons import ListOfButtons
@@ -57,6 +57,17 @@ class InputDisplayObservationRow:
 
         return InputDisplayRow(merged_direction, merged_buttons, merged_frames)
 
+    def get_signature(self) -> Optional[Tuple[Direction, ListOfButtons, int]]:
+        if self.is_likely_empty():
+            return None
+
+        return (self.direction_pressed_observed.get_known_most_likely_possibility(),
+                self.buttons_pressed_observed.get_known_most_likely_possibility(),
+                self.frames_pressed_observed.get_known_most_likely_possibility())
+
+    def is_direction_observed(self) -> bool:
+        return self.direction_pressed_observed.get_known_most_likely_possibility() is not None
+
     def add_frames_pressed_observation(self, frames_pressed: int, weight: int = 1) -> None:
         self.frames_pressed_observed.add_observation(frames_pressed, weight)
 
@@ -12,18 +12,36 @@ class MergerForInputDisplayObservations:
     def merge_input_displays(first_input: InputDisplayObservation, first_frame: int,
                              second_input: InputDisplayObservation, second_frame: int, player: Player) -> \
             Optional[List[InputDisplayRow]]:
+        slided_rows = MergerForInputDisplayObservations.get_slide_between_input_displays(first_input, first_frame,
+                                                                                         second_input, second_frame,
+                                                                                         player)
+        if slided_rows is None:
+            return None
+
+        return MergerForInputDisplayObservations.get_final_list_of_rows_from_input_displays_slided(first_input,
+                                                                                                   second_input,
+                                                                                                   player,
+                                                                                                   slided_rows)
+
+    @staticmethod
+    def get_slide_between_input_displays(first_input: InputDisplayObservation, first_frame: int,
+                                         second_input: InputDisplayObservation, second_frame: int, player: Player) -> \
+            Optional[int]:
         if second_frame - first_frame > MergerForInputDisplayObservations.THRESHOLD_TO_START_CHECKING_OVERLAPS:
             return None
 
+        # Row signatures usually point to the right slide, so the likelihood of the rows is checked for it first
+        slided_rows = first_input.get_most_likely_slide_by_signatures(second_input, player)
+        if slided_rows is not None and \
+                first_input.is_observation_inside_other_observation_slided_n_rows(second_input, slided_rows, player):
+            return slided_rows
+
+        # Misread rows or near ties between slides can mislead the signatures, every slide is then tried in order
         for slide_possibilities in range(0, InputDisplayObservation.MAX_ROWS_TO_OBSERVE):
-            is_slided = first_input.is_observation_inside_other_observation_slided_n_rows(second_input,
-                                                                                          slide_possibilities,
-                                                                                          player)
-            if is_slided:
-                return MergerForInputDisplayObservations.get_final_list_of_rows_from_input_displays_slided(first_input,
-                                                                                                           second_input,
-                                                                                                           player,
-                                                                                                           slide_possibilities)
+            if slide_possibilities != slided_rows and \
+                    first_input.is_observation_inside_other_observation_slided_n_rows(second_input,
+                                                                                      slide_possibilities, player):
+                return slide_possibilities
 
         return None
 
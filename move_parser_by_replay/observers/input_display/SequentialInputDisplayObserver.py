@@ -0,0 +1,160 @@
+from typing import List, Optional, Callable
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.input_display.InputDisplayObservation import InputDisplayObservation
+from move_parser_by_replay.observers.input_display.InputDisplayObservationManager import InputDisplayObservationManager
+from move_parser_by_replay.observers.input_display.InputDisplayRow import InputDisplayRow
+from move_parser_by_replay.observers.input_display.MergerForInputDisplayObservations import \
+    MergerForInputDisplayObservations
+
+
+class SequentialInputDisplayObserver(FramePumpSubscriberInterface):
+    DEFAULT_STRIDE = 20
+    MINIMUM_STRIDE = 5
+    # Strides must stay below the distance the merger accepts between two frames
+    MAXIMUM_STRIDE = 120
+    # Above this slide the overlap left between two probes is too small to trust, so the stride is halved
+    MAXIMUM_SLIDE_TO_KEEP_STRIDE = InputDisplayObservation.MAX_ROWS_TO_OBSERVE // 2
+
+    manager: InputDisplayObservationManager
+    video: Video
+    player: Player
+    stride: int
+    next_frame_to_look: int
+    maximum_frame_to_look_at: int
+    final_frame: int
+    previous_frame_number: Optional[int]
+    is_last_probe_skipped: bool
+    pending_rows: List[InputDisplayRow]
+    exact_final_list: List[InputDisplayRow]
+    on_rows_emitted: Optional[Callable[[List[InputDisplayRow]], None]]
+
+    def __init__(self, manager: InputDisplayObservationManager, video: Video, player: Player = Player.FIRST_PLAYER,
+                 on_rows_emitted: Optional[Callable[[List[InputDisplayRow]], None]] = None):
+        self.manager = manager
+        self.video = video
+        self.player = player
+        self.on_rows_emitted = on_rows_emitted
+        self.stride = self.DEFAULT_STRIDE
+        self.next_frame_to_look = 0
+        self.maximum_frame_to_look_at = -1
+        self.final_frame = 0
+        self.previous_frame_number = None
+        self.is_last_probe_skipped = False
+        self.pending_rows = []
+        self.exact_final_list = []
+
+    def get_exact_final_list(self) -> List[InputDisplayRow]:
+        return self.exact_final_list
+
+    def get_stride(self) -> int:
+        return self.stride
+
+    def set_maximum_frame_to_look_at(self, max_frame: int) -> None:
+        self.maximum_frame_to_look_at = max_frame
+
+    def analyse_full_video(self) -> None:
+        self.start_receiving_frames()
+
+        frames_iterator = self.video.get_frames_by_condition_as_iterator(self.is_frame_needed,
+                                                                         self.is_done_with_frames)
+        for frame in frames_iterator:
+            self.receive_frame(frame)
+
+        self.finish_receiving_frames()
+
+    def start_receiving_frames(self) -> None:
+        frame_count = self.video.get_frame_count()
+        self.final_frame = frame_count if self.maximum_frame_to_look_at == -1 else self.maximum_frame_to_look_at
+        # Same margin at the end of the video as the binary search
+        self.final_frame -= 5
+        self.stride = self.DEFAULT_STRIDE
+        self.next_frame_to_look = 0
+        self.previous_frame_number = None
+        self.is_last_probe_skipped = False
+        self.pending_rows = []
+        self.exact_final_list = []
+
+    def is_frame_needed(self, frame_number: int) -> bool:
+        return frame_number == self.next_frame_to_look and frame_number <= self.final_frame
+
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        return frame_number > self.final_frame
+
+    def receive_frame(self, frame: Frame) -> None:
+        frame_number = frame.get_frame_number()
+        self.manager.apply_specific_observations_in_given_frames([frame])
+        self.merge_observation_in_frame(frame_number)
+        self.next_frame_to_look = frame_number + self.stride
+
+    def merge_observation_in_frame(self, frame_number: int) -> None:
+        observation = self.manager.get_saved_observation_in_frame(frame_number)
+        slided_rows = None
+        if self.previous_frame_number is not None:
+            previous_observation = self.manager.get_saved_observation_in_frame(self.previous_frame_number)
+            slided_rows = MergerForInputDisplayObservations.get_slide_between_input_displays(
+                previous_observation, self.previous_frame_number, observation, frame_number, self.player)
+            if slided_rows is None and previous_observation.is_filling_up(self.player):
+                slided_rows = self.get_slide_while_filling_up(previous_observation, observation)
+            if slided_rows is None and not self.is_last_probe_skipped:
+                # A noisy probe would restart the display and emit its rows twice, so the next probe is merged
+                # with the previous one instead
+                self.is_last_probe_skipped = True
+                self.manager.forget_observation_in_frame(frame_number)
+                self.stride = self.MINIMUM_STRIDE
+                return
+        self.is_last_probe_skipped = False
+
+        if slided_rows is None:
+            # Without overlap the rows seen so far cannot change any more, the new display starts again
+            self.emit_rows(self.pending_rows)
+            rows_by_key = observation.get_observation_rows_by_player()[self.player]
+            self.pending_rows = [rows_by_key[row_key].get_best_possibility()
+                                 for row_key in range(InputDisplayObservation.MAX_ROWS_TO_OBSERVE, 1, -1)]
+            if self.previous_frame_number is not None:
+                self.stride = self.MINIMUM_STRIDE
+        else:
+            merged_rows = MergerForInputDisplayObservations.get_final_list_of_rows_from_input_displays_slided(
+                previous_observation, observation, self.player, slided_rows)
+            # Rows that scrolled out of the display are final, the rest may still be merged with the next probe
+            self.emit_rows(self.pending_rows[:slided_rows])
+            self.pending_rows = merged_rows[slided_rows:]
+            self.update_stride(slided_rows)
+
+        if self.previous_frame_number is not None:
+            self.manager.forget_observation_in_frame(self.previous_frame_number)
+        self.previous_frame_number = frame_number
+
+    def get_slide_while_filling_up(self, previous_observation: InputDisplayObservation,
+                                   observation: InputDisplayObservation) -> Optional[int]:
+        # Empty rows of a display still filling up cannot be matched, so only the observed rows are counted
+        slided_rows = previous_observation.get_most_likely_slide_by_signatures(observation, self.player, True)
+        if slided_rows is None or not previous_observation.is_observation_inside_other_observation_slided_n_rows(
+                observation, slided_rows, self.player, True):
+            return None
+        return slided_rows
+
+    def update_stride(self, slided_rows: int) -> None:
+        if slided_rows == 0:
+            self.stride = min(self.MAXIMUM_STRIDE, self.stride * 2)
+        elif slided_rows > self.MAXIMUM_SLIDE_TO_KEEP_STRIDE:
+            self.stride = max(self.MINIMUM_STRIDE, self.stride // 2)
+
+    def emit_rows(self, rows: List[InputDisplayRow]) -> None:
+        rows = [row for row in rows if row != InputDisplayRow.get_empty_row()]
+        if len(rows) == 0:
+            return
+
+        self.exact_final_list.extend(rows)
+        if self.on_rows_emitted is not None:
+            self.on_rows_emitted(rows)
+
+    def finish_receiving_frames(self) -> None:
+        self.emit_rows(self.pending_rows)
+        self.pending_rows = []
+        if self.previous_frame_number is not None:
+            self.manager.forget_observation_in_frame(self.previous_frame_number)
+        self.previous_frame_number = None
@@ -0,0 +1,35 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+
+
+class ImagePreprocessorForTemplateMatching:
+    THRESHOLD_FOR_BINARY = 127
+    MINIMUM_ALPHA_TO_MATCH = 128
+
+    @classmethod
+    def preprocess_image(cls, image: np.ndarray, preprocessing: PreprocessingForTemplateMatching) -> np.ndarray:
+        if preprocessing == PreprocessingForTemplateMatching.COLOR or image.ndim == 2:
+            grayscale_image = image
+        else:
+            grayscale_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        if preprocessing == PreprocessingForTemplateMatching.BINARY:
+            _, binary_image = cv2.threshold(grayscale_image, cls.THRESHOLD_FOR_BINARY, 255, cv2.THRESH_BINARY)
+            return binary_image
+        return grayscale_image
+
+    @classmethod
+    def get_mask_from_alpha(cls, alpha: Optional[np.ndarray], preprocessing: PreprocessingForTemplateMatching) -> \
+            Optional[np.ndarray]:
+        # Plain color matching keeps its old behaviour, the alpha channel is only used by the preprocessed variants
+        if alpha is None or preprocessing == PreprocessingForTemplateMatching.COLOR:
+            return None
+
+        mask = np.where(alpha >= cls.MINIMUM_ALPHA_TO_MATCH, 255, 0).astype(np.uint8)
+        if np.all(mask == 255):
+            return None
+        return mask
@@ -0,0 +1,64 @@
+from typing import TypeVar, Generic, List, Optional, Callable
+
+T = TypeVar('T')
+
+
+class ListWithMutableTail(Generic[T]):
+    DEFAULT_MAXIMUM_TAIL_LENGTH = 128
+
+    frozen_chunks: List[List[T]]
+    frozen_length: int
+    tail: List[T]
+    maximum_tail_length: int
+    sink: Optional[Callable[[List[T]], None]]
+
+    def __init__(self, maximum_tail_length: int = DEFAULT_MAXIMUM_TAIL_LENGTH,
+                 sink: Optional[Callable[[List[T]], None]] = None):
+        self.frozen_chunks = []
+        self.frozen_length = 0
+        self.tail = []
+        self.maximum_tail_length = maximum_tail_length
+        self.sink = sink
+
+    def get_maximum_tail_length(self) -> int:
+        return self.maximum_tail_length
+
+    def set_sink(self, sink: Optional[Callable[[List[T]], None]]) -> None:
+        self.sink = sink
+
+    def get_tail(self, length: int) -> List[T]:
+        self.validate_length_of_tail(length)
+        return self.tail[max(0, len(self.tail) - length):]
+
+    def replace_tail(self, length: int, new_items: List[T]) -> None:
+        self.validate_length_of_tail(length)
+        self.tail[max(0, len(self.tail) - length):] = new_items
+        # Items are frozen in chunks, so each one is copied once no matter how long the list grows
+        if len(self.tail) >= 2 * self.maximum_tail_length:
+            self.freeze_items(len(self.tail) - self.maximum_tail_length)
+
+    def freeze_items(self, number_of_items: int) -> None:
+        chunk = self.tail[:number_of_items]
+        self.tail = self.tail[number_of_items:]
+        self.frozen_length += len(chunk)
+        if self.sink is not None:
+            self.sink(chunk)
+        else:
+            self.frozen_chunks.append(chunk)
+
+    def validate_length_of_tail(self, length: int) -> None:
+        # Frozen items cannot be changed any more, which holds while replaced tails do not get shorter
+        if length > len(self.tail) and self.frozen_length > 0:
+            raise ValueError('Only the last {} items can be changed, but {} were asked'.format(
+                len(self.tail), length))
+
+    def to_list(self) -> List[T]:
+        # Items given to the sink are not kept
+        items = []
+        for chunk in self.frozen_chunks:
+            items.extend(chunk)
+        items.extend(self.tail)
+        return items
+
+    def __len__(self) -> int:
+        return self.frozen_length + len(self.tail)
@@ -1,30 +1,45 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.base.templates.TemplateImage import TemplateImage
-from move_parser_by_replay.util.OpenCVWrapper import OpenCVWrapper
+from move_parser_by_replay.util.MultiTemplateMatcher import MultiTemplateMatcher
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
 from move_parser_by_replay.util.RecognisedTemplateInPosition import RecognisedTemplateInPosition
 
 
 class MatchTemplateAbstract:
+    DEFAULT_VERTICAL_SLACK_IN_ROWS = 3
+
     templates: Dict[str, TemplateImage]
+    matcher: MultiTemplateMatcher
 
-    def __init__(self, templates: Dict[str, TemplateImage]):
+    def __init__(self, templates: Dict[str, TemplateImage],
+                 preprocessing: PreprocessingForTemplateMatching = PreprocessingForTemplateMatching.COLOR):
         self.templates = templates
+        self.matcher = MultiTemplateMatcher.from_template_images(templates, preprocessing)
 
     def search_templates_in_image(self, image: Frame) -> List[RecognisedTemplateInPosition]:
-        image_data = image.get_image_data()
         match_positions: List[RecognisedTemplateInPosition] = []
 
-        for name, template in self.templates.items():
-            template_data = template.get_image()
-            matches = OpenCVWrapper.search_image_by_template(image_data, template_data)
-
-            for match in matches:
-                template_in_position = RecognisedTemplateInPosition(Position(int(match[0]), int(match[1])), template)
-                match_positions.append(template_in_position)
+        for name, x, y, _ in self.matcher.search_templates_in_image(image.get_image_data()):
+            template_in_position = RecognisedTemplateInPosition(Position(x, y), self.templates[name])
+            match_positions.append(template_in_position)
 
         match_positions.sort(key=lambda match_in_position: match_in_position.get_position().get_inverted_tuple())
 
         return match_positions
+
+    def search_templates_in_rows(self, image: Frame, rows: Dict[int, Tuple[int, int]],
+                                 vertical_slack: int = DEFAULT_VERTICAL_SLACK_IN_ROWS) -> \
+            Dict[int, List[RecognisedTemplateInPosition]]:
+        matches_by_row = self.matcher.search_templates_in_rows(image.get_image_data(), rows, vertical_slack)
+
+        templates_by_row: Dict[int, List[RecognisedTemplateInPosition]] = {}
+        for row_key, matches in matches_by_row.items():
+            templates_by_row[row_key] = [RecognisedTemplateInPosition(Position(x, y), self.templates[name])
+                                         for name, x, y, _ in matches]
+            templates_by_row[row_key].sort(
+                key=lambda match_in_position: match_in_position.get_position().get_inverted_tuple())
+
+        return templates_by_row
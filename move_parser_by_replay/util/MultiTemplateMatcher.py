@@ -0,0 +1,221 @@
+from typing import Dict, List, Tuple, Optional, Self
+
+import numpy as np
+
+from move_parser_by_replay.base.templates.TemplateImage import TemplateImage
+from move_parser_by_replay.util.ImagePreprocessorForTemplateMatching import ImagePreprocessorForTemplateMatching
+from move_parser_by_replay.util.OpenCVWrapper import OpenCVWrapper
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+
+
+class MultiTemplateMatcher:
+    # Same tolerance as cv2.matchTemplate when the correlation is slightly above the norm because of rounding
+    TOLERANCE_FOR_NORMALISATION = 1.125
+    MAXIMUM_WIDTH_FOR_FREQUENCY_DOMAIN = 40
+
+    names: List[str]
+    templates: Dict[str, np.ndarray]
+    masks: Dict[str, np.ndarray]
+    preprocessing: PreprocessingForTemplateMatching
+    names_by_shape: Dict[Tuple[int, ...], List[str]]
+    zero_mean_templates_by_shape: Dict[Tuple[int, ...], np.ndarray]
+    norms_by_shape: Dict[Tuple[int, ...], np.ndarray]
+    spectrums_by_shapes: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], np.ndarray]
+
+    def __init__(self, templates: Dict[str, np.ndarray], masks: Optional[Dict[str, np.ndarray]] = None,
+                 preprocessing: PreprocessingForTemplateMatching = PreprocessingForTemplateMatching.COLOR):
+        # Templates are expected already preprocessed, images are preprocessed by the matcher before searching
+        self.names = list(templates.keys())
+        self.templates = templates
+        self.masks = masks if masks is not None else {}
+        self.preprocessing = preprocessing
+        self.names_by_shape = {}
+        for name, template in templates.items():
+            # Masked templates cannot be correlated in the frequency domain, they are matched one by one
+            if name not in self.masks:
+                self.names_by_shape.setdefault(template.shape, []).append(name)
+
+        self.zero_mean_templates_by_shape = {}
+        self.norms_by_shape = {}
+        for shape, names in self.names_by_shape.items():
+            stack = np.stack([templates[name] for name in names]).astype(np.float64)
+            stack = stack.reshape(stack.shape[:3] + (-1,))
+            # The mean of every channel is removed, as TM_CCOEFF does
+            zero_mean_stack = stack - stack.mean(axis=(1, 2), keepdims=True)
+            self.zero_mean_templates_by_shape[shape] = zero_mean_stack
+            self.norms_by_shape[shape] = np.sqrt((zero_mean_stack ** 2).sum(axis=(1, 2, 3)))
+
+        self.spectrums_by_shapes = {}
+
+    @classmethod
+    def from_template_images(cls, templates: Dict[str, TemplateImage],
+                             preprocessing: PreprocessingForTemplateMatching = PreprocessingForTemplateMatching.COLOR) \
+            -> Self:
+        preprocessed_templates = {name: template.get_preprocessed_image(preprocessing)
+                                  for name, template in templates.items()}
+        masks = {name: template.get_mask(preprocessing) for name, template in templates.items()
+                 if template.get_mask(preprocessing) is not None}
+        return cls(preprocessed_templates, masks, preprocessing)
+
+    def get_names(self) -> List[str]:
+        return self.names
+
+    def search_templates_in_image(self, image: np.ndarray,
+                                  threshold: float = OpenCVWrapper.DEFAULT_THRESHOLD_FOR_TEMPLATE_MATCHING) -> \
+            List[Tuple[str, int, int, float]]:
+        scores_by_name = self.get_scores_of_templates_in_image(image)
+
+        # Same order as matching every template in turn: templates in order, then positions row by row
+        matches = []
+        for name in self.names:
+            scores = scores_by_name[name]
+            locations = np.where(scores >= threshold)
+            for y, x, score in zip(locations[0].tolist(), locations[1].tolist(), scores[locations].tolist()):
+                matches.append((name, x, y, score))
+        return matches
+
+    def search_templates_in_rows(self, image: np.ndarray, rows: Dict[int, Tuple[int, int]], vertical_slack: int,
+                                 threshold: float = OpenCVWrapper.DEFAULT_THRESHOLD_FOR_TEMPLATE_MATCHING) -> \
+            Dict[int, List[Tuple[str, int, int, float]]]:
+        matches_by_row: Dict[int, List[Tuple[str, int, int, float]]] = {row_key: [] for row_key in rows}
+        image = self.get_preprocessed_image(image)
+        image_height = image.shape[0]
+        is_searched_row_by_row = self.is_search_row_by_row_faster(image)
+        scores_by_name = {} if is_searched_row_by_row else self.get_scores_of_templates_in_preprocessed_image(image)
+
+        for name in self.names:
+            template = self.templates[name]
+            template_height = template.shape[0]
+            for row_key, (top_y, row_height) in rows.items():
+                # Templates are centred in their row, so only a few vertical offsets around the centre are searched
+                expected_y = top_y + (row_height - template_height) // 2
+                first_y = max(0, expected_y - vertical_slack)
+                last_y = min(image_height - template_height, expected_y + vertical_slack)
+                if last_y < first_y or template.shape[1] > image.shape[1]:
+                    continue
+
+                if is_searched_row_by_row:
+                    scores = self.get_scores_of_template_with_open_cv(image[first_y:last_y + template_height], name)
+                else:
+                    scores = scores_by_name[name][first_y:last_y + 1]
+                locations = np.where(scores >= threshold)
+                for y, x, score in zip(locations[0].tolist(), locations[1].tolist(), scores[locations].tolist()):
+                    matches_by_row[row_key].append((name, x, first_y + y, score))
+
+        return matches_by_row
+
+    def is_search_row_by_row_faster(self, image: np.ndarray) -> bool:
+        # On wide color strips, like the buttons, OpenCV on a few offsets per row beats scoring the whole strip.
+        # On narrow or single channel strips one pass over the whole strip is faster
+        return image.ndim == 3 and image.shape[2] > 1 and \
+            image.shape[1] > self.MAXIMUM_WIDTH_FOR_FREQUENCY_DOMAIN
+
+    def get_scores_of_templates_in_image(self, image: np.ndarray) -> Dict[str, np.ndarray]:
+        return self.get_scores_of_templates_in_preprocessed_image(self.get_preprocessed_image(image))
+
+    def get_scores_of_templates_in_preprocessed_image(self, image: np.ndarray) -> Dict[str, np.ndarray]:
+        if len(self.names) == 0:
+            return {}
+        OpenCVWrapper.validate_types(image, self.templates[self.names[0]])
+        OpenCVWrapper.validate_same_shape(image, self.templates[self.names[0]])
+        OpenCVWrapper.validate_color_channel_consistency(image, self.templates[self.names[0]])
+
+        if not self.is_frequency_domain_faster(image):
+            scores_by_name: Dict[str, np.ndarray] = {}
+            for name in self.names:
+                OpenCVWrapper.validate_image_larger_than_template(image, self.templates[name])
+                scores_by_name[name] = self.get_scores_of_template_with_open_cv(image, name)
+            return scores_by_name
+
+        image_data = image.astype(np.float64)
+        image_data = image_data.reshape(image_data.shape[:2] + (-1,))
+        image_height, image_width = image_data.shape[:2]
+        # One transform of the image is shared by every template, padded with zeros to a size that is fast to transform
+        transform_shape = (self.get_fast_length_for_transform(image_height),
+                           self.get_fast_length_for_transform(image_width))
+        image_spectrum = np.fft.rfft2(image_data, s=transform_shape, axes=(0, 1))
+        integral_image = self.get_integral_image(image_data)
+        integral_of_squares = self.get_integral_image(image_data ** 2)
+
+        scores_by_name = {}
+        for shape, names in self.names_by_shape.items():
+            OpenCVWrapper.validate_image_larger_than_template(image, self.templates[names[0]])
+            template_height, template_width = shape[:2]
+            result_height = image_height - template_height + 1
+            result_width = image_width - template_width + 1
+
+            templates_spectrum = self.get_spectrum_of_templates(shape, transform_shape)
+            correlations = np.fft.irfft2(np.einsum('ijc,kijc->kij', image_spectrum, templates_spectrum),
+                                         s=transform_shape, axes=(1, 2))
+            numerators = correlations[:, :result_height, :result_width]
+
+            window_sums = self.get_sums_in_windows(integral_image, template_height, template_width)
+            window_sums_of_squares = self.get_sums_in_windows(integral_of_squares, template_height, template_width)
+            pixels_in_window = template_height * template_width
+            window_variances = (window_sums_of_squares - window_sums ** 2 / pixels_in_window).sum(axis=-1)
+            denominators = np.sqrt(np.maximum(window_variances, 0))[np.newaxis] * \
+                self.norms_by_shape[shape][:, np.newaxis, np.newaxis]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = numerators / denominators
+            is_out_of_range = ~(np.abs(scores) < 1)
+            if np.any(is_out_of_range):
+                out_of_range_scores = scores[is_out_of_range]
+                scores[is_out_of_range] = np.where(np.abs(out_of_range_scores) < self.TOLERANCE_FOR_NORMALISATION,
+                                                   np.sign(out_of_range_scores), 0)
+
+            for index, name in enumerate(names):
+                if self.norms_by_shape[shape][index] < np.finfo(np.float64).eps:
+                    # A flat template correlates perfectly with everything, as in cv2.matchTemplate
+                    scores[index] = 1
+                scores_by_name[name] = scores[index].astype(np.float32)
+
+        for name in self.masks:
+            OpenCVWrapper.validate_image_larger_than_template(image, self.templates[name])
+            scores_by_name[name] = self.get_scores_of_template_with_open_cv(image, name)
+
+        return {name: scores_by_name[name] for name in self.names}
+
+    def is_frequency_domain_faster(self, image: np.ndarray) -> bool:
+        # Sharing the transform pays off against OpenCV for narrow color strips, the directions and frame counters.
+        # On the wide strip of the buttons, or on a single channel, OpenCV is faster
+        return image.ndim == 3 and image.shape[2] > 1 and \
+            image.shape[1] <= self.MAXIMUM_WIDTH_FOR_FREQUENCY_DOMAIN
+
+    def get_preprocessed_image(self, image: np.ndarray) -> np.ndarray:
+        return ImagePreprocessorForTemplateMatching.preprocess_image(image, self.preprocessing)
+
+    def get_scores_of_template_with_open_cv(self, image: np.ndarray, name: str) -> np.ndarray:
+        return OpenCVWrapper.get_scores_of_template(image, self.templates[name], self.masks.get(name))
+
+    def get_spectrum_of_templates(self, template_shape: Tuple[int, ...], transform_shape: Tuple[int, int]) -> \
+            np.ndarray:
+        key = (template_shape, transform_shape)
+        if key not in self.spectrums_by_shapes:
+            # The conjugate spectrum of each template turns the product with the image into a correlation
+            self.spectrums_by_shapes[key] = np.conj(np.fft.rfft2(self.zero_mean_templates_by_shape[template_shape],
+                                                                 s=transform_shape, axes=(1, 2)))
+        return self.spectrums_by_shapes[key]
+
+    @staticmethod
+    def get_fast_length_for_transform(length: int) -> int:
+        fast_length = length
+        while True:
+            remainder = fast_length
+            for factor in (2, 3, 5):
+                while remainder % factor == 0:
+                    remainder //= factor
+            if remainder == 1:
+                return fast_length
+            fast_length += 1
+
+    @staticmethod
+    def get_integral_image(image_data: np.ndarray) -> np.ndarray:
+        integral_image = np.zeros((image_data.shape[0] + 1, image_data.shape[1] + 1, image_data.shape[2]))
+        integral_image[1:, 1:] = image_data.cumsum(axis=0).cumsum(axis=1)
+        return integral_image
+
+    @staticmethod
+    def get_sums_in_windows(integral_image: np.ndarray, window_height: int, window_width: int) -> np.ndarray:
+        return integral_image[window_height:, window_width:] - integral_image[:-window_height, window_width:] \
+            - integral_image[window_height:, :-window_width] + integral_image[:-window_height, :-window_width]
@@ -1,51 +1,112 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.templates.Number import Number
-from move_parser_by_replay.util.OpenCVWrapper import OpenCVWrapper
+from move_parser_by_replay.util.MultiTemplateMatcher import MultiTemplateMatcher
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
 
 
 class NumberInReplayWrapper:
+    CONFIDENCE_FOR_AMBIGUOUS_DIGIT = 0.0
+    MARGIN_AGAINST_OTHER_DIGITS = 0.1
+
+    @staticmethod
+    def get_matcher_for_numbers(numbers: Dict[str, Number],
+                                preprocessing: PreprocessingForTemplateMatching =
+                                PreprocessingForTemplateMatching.COLOR) -> MultiTemplateMatcher:
+        return MultiTemplateMatcher.from_template_images(numbers, preprocessing)
+
     @staticmethod
     def search_numbers_in_image(image: Frame, numbers: Dict[str, Number]) -> List[Tuple[int, Tuple[int, int]]]:
-        image_data = image.get_image_data()
-        match_positions = []
+        return [(number, position) for number, position, _
+                in NumberInReplayWrapper.search_numbers_in_image_with_confidence(image, numbers)]
 
-        for number_value, number_template in numbers.items():
-            template_data = number_template.get_image()
-            matches = OpenCVWrapper.search_image_by_template(image_data, template_data)
+    @staticmethod
+    def search_numbers_in_image_with_confidence(image: Frame, numbers: Dict[str, Number],
+                                                matcher: Optional[MultiTemplateMatcher] = None) -> \
+            List[Tuple[int, Tuple[int, int], float]]:
+        # Reusing the matcher of the numbers keeps the transforms of the templates between images
+        if matcher is None:
+            matcher = NumberInReplayWrapper.get_matcher_for_numbers(numbers)
 
-            for match in matches:
-                match_positions.append((match[0], match[1], number_value))
+        match_positions = []
+        for number_value, x, y, score in matcher.search_templates_in_image(image.get_image_data()):
+            match_positions.append((x, y, number_value, score))
 
-        # Sort by Y (rows first), then by X (columns within each row)
+        # Matches are grouped in rows first, so numbers in different rows of the same column are never joined.
+        # Matches less than half a digit apart in height are the same row of text
+        y_threshold = max(number_template.get_image().shape[0] for number_template in numbers.values()) // 2 \
+            if len(numbers) > 0 else 0
         match_positions.sort(key=lambda pos: (pos[1], pos[0]))
+        matches_by_row = []
+        for match in match_positions:
+            if len(matches_by_row) > 0 and match[1] - matches_by_row[-1][0][1] <= y_threshold:
+                matches_by_row[-1].append(match)
+            else:
+                matches_by_row.append([match])
 
         grouped_numbers = []
-        current_group = []
+        for matches_in_row in matches_by_row:
+            grouped_numbers.extend(NumberInReplayWrapper.get_numbers_in_row(matches_in_row))
+
+        return grouped_numbers
+
+    @staticmethod
+    def search_numbers_in_rows_with_confidence(image: Frame, matcher: MultiTemplateMatcher,
+                                               rows: Dict[int, Tuple[int, int]], vertical_slack: int) -> \
+            List[Tuple[int, Tuple[int, int], float]]:
+        matches_by_row = matcher.search_templates_in_rows(image.get_image_data(), rows, vertical_slack)
+
+        grouped_numbers = []
+        for row_key in sorted(matches_by_row):
+            matches_in_row = [(x, y, number_value, score) for number_value, x, y, score in matches_by_row[row_key]]
+            grouped_numbers.extend(NumberInReplayWrapper.get_numbers_in_row(matches_in_row))
+
+        return grouped_numbers
+
+    @staticmethod
+    def get_numbers_in_row(matches_in_row: List[Tuple[int, int, str, float]]) -> \
+            List[Tuple[int, Tuple[int, int], float]]:
         min_x_threshold = 10
         max_x_threshold = 25
-        y_threshold = 2  # Adjust based on row alignment
 
-        for i, (x, y, value) in enumerate(match_positions):
+        numbers_in_row = []
+        # Every digit is [x, y, value, score, best score of a different value matched in the same place]
+        current_group = []
+        for x, y, value, score in sorted(matches_in_row, key=lambda pos: pos[0]):
             if not current_group:
-                current_group.append((x, y, value))
+                current_group.append([x, y, value, score, 0.0])
                 continue
 
-            last_x, last_y, last_value = match_positions[i - 1]
-
-            if abs(y - last_y) <= y_threshold and abs(x - last_x) <= min_x_threshold:
-                continue
-            elif abs(x - last_x) <= max_x_threshold:
-                current_group.append((x, y, value))
+            last_digit = current_group[-1]
+            if abs(x - last_digit[0]) <= min_x_threshold:
+                # Overlapping matches are the same digit, the best one is kept
+                if value == last_digit[2]:
+                    if score > last_digit[3]:
+                        last_digit[:4] = [x, y, value, score]
+                elif score > last_digit[3]:
+                    current_group[-1] = [x, y, value, score, last_digit[3]]
+                else:
+                    last_digit[4] = max(last_digit[4], score)
+            elif abs(x - last_digit[0]) <= max_x_threshold:
+                current_group.append([x, y, value, score, 0.0])
             else:
-                number_str = "".join(v for _, _, v in sorted(current_group))
-                leftmost_x, leftmost_y, _ = min(current_group, key=lambda pos: pos[0])
-                grouped_numbers.append((int(number_str), (leftmost_x, leftmost_y)))
-                current_group = [(x, y, value)]
+                numbers_in_row.append(NumberInReplayWrapper.get_number_from_group(current_group))
+                current_group = [[x, y, value, score, 0.0]]
 
         if current_group:
-            number_str = "".join(v for _, _, v in sorted(current_group))
-            leftmost_x, leftmost_y, _ = min(current_group, key=lambda pos: pos[0])
-            grouped_numbers.append((int(number_str), (leftmost_x, leftmost_y)))
+            numbers_in_row.append(NumberInReplayWrapper.get_number_from_group(current_group))
 
-        return grouped_numbers
+        return numbers_in_row
+
+    @staticmethod
+    def get_number_from_group(group: List[List]) -> Tuple[int, Tuple[int, int], float]:
+        number_str = "".join(value for _, _, value, _, _ in group)
+        leftmost_x, leftmost_y = group[0][0], group[0][1]
+
+        # A number is as confident as its worst digit, and a digit is not confident if another one matches as well
+        confidence = 1.0
+        for _, _, _, score, best_score_of_other_value in group:
+            is_ambiguous = score - best_score_of_other_value < NumberInReplayWrapper.MARGIN_AGAINST_OTHER_DIGITS
+            confidence = min(confidence, NumberInReplayWrapper.CONFIDENCE_FOR_AMBIGUOUS_DIGIT if is_ambiguous
+                             else score)
+        return int(number_str), (leftmost_x, leftmost_y), confidence
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import cv2
 import numpy as np
 
@@ -9,16 +11,34 @@ class OpenCVWrapper:
     @staticmethod
     def search_image_by_template(image: np.ndarray, template: np.ndarray,
                                  threshold: float = DEFAULT_THRESHOLD_FOR_TEMPLATE_MATCHING):
+        matches = OpenCVWrapper.search_image_by_template_with_scores(image, template, threshold)
+        return [(x, y) for x, y, _ in matches]
+
+    @staticmethod
+    def search_image_by_template_with_scores(image: np.ndarray, template: np.ndarray,
+                                             threshold: float = DEFAULT_THRESHOLD_FOR_TEMPLATE_MATCHING,
+                                             mask: Optional[np.ndarray] = None):
         OpenCVWrapper.validate_types(image, template)
         OpenCVWrapper.validate_same_shape(image, template)
         OpenCVWrapper.validate_image_larger_than_template(image, template)
         OpenCVWrapper.validate_color_channel_consistency(image, template)
 
-        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        result = OpenCVWrapper.get_scores_of_template(image, template, mask)
         locations = np.where(result >= threshold)
-        matches = list(zip(*locations[::-1]))
+        matches = list(zip(*locations[::-1], result[locations].tolist()))
         return matches
 
+    @staticmethod
+    def get_scores_of_template(image: np.ndarray, template: np.ndarray, mask: Optional[np.ndarray] = None) -> \
+            np.ndarray:
+        if mask is None:
+            return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+        scores = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+        # Windows that are flat under the mask divide by zero
+        scores[~np.isfinite(scores)] = 0
+        return scores
+
     @staticmethod
     def validate_color_channel_consistency(image, template):
         if len(image.shape) == 3 and len(template.shape) == 3:
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class PreprocessingForTemplateMatching(Enum):
+    COLOR = 'Color'
+    GRAYSCALE = 'Grayscale'
+    BINARY = 'Binary'
@@ -1,28 +1,50 @@
-from typing import List
+from typing import List, Tuple
 
 from easyocr import Reader
 
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Position import Position
+from move_parser_by_replay.util.number_recognisers.EasyOCRReaderRegistry import EasyOCRReaderRegistry
 from move_parser_by_replay.util.number_recognisers.NumberRecogniserInterface import NumberRecogniserInterface
 from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition import RecognisedNumberInPosition
 
 
 class EasyOCRNumberRecogniser(NumberRecogniserInterface):
-    reader: Reader
+    ALLOWED_CHARACTERS = '0123456789'
+    REGIONS_PER_BATCH = 32
+    languages: Tuple[str, ...]
 
-    def __init__(self):
-        self.reader = Reader(['en'])
+    def __init__(self, languages: Tuple[str, ...] = EasyOCRReaderRegistry.DEFAULT_LANGUAGES):
+        self.languages = languages
+
+    def get_reader(self) -> Reader:
+        return EasyOCRReaderRegistry.get_reader(self.languages)
 
     def get_numbers_in_region(self, region: Frame) -> List[RecognisedNumberInPosition]:
-        result_matches = self.reader.readtext(region.get_image_data(), detail=1, allowlist='0123456789')
+        result_matches = self.get_reader().readtext(region.get_image_data(), detail=1, allowlist=self.ALLOWED_CHARACTERS)
+
+        return self.get_recognised_numbers_from_matches(result_matches)
+
+    def get_numbers_in_regions(self, regions: List[Frame]) -> List[List[RecognisedNumberInPosition]]:
+        # The batched reader stacks the images, so it can only be used when all of them have the same shape
+        if len(regions) <= 1 or any(region.shape() != regions[0].shape() for region in regions):
+            return super().get_numbers_in_regions(regions)
+
+        result_matches_by_region = self.get_reader().readtext_batched(
+            [region.get_image_data() for region in regions], detail=1, allowlist=self.ALLOWED_CHARACTERS,
+            batch_size=self.REGIONS_PER_BATCH)
+
+        return [self.get_recognised_numbers_from_matches(result_matches)
+                for result_matches in result_matches_by_region]
 
+    @staticmethod
+    def get_recognised_numbers_from_matches(result_matches: List) -> List[RecognisedNumberInPosition]:
         recognised_numbers = []
         for match in result_matches:
             position_detected = match[0][0]
             number_detected = int(match[1])
             position = Position(position_detected[0], position_detected[1])
-            recognised_number = RecognisedNumberInPosition(position, number_detected)
+            recognised_number = RecognisedNumberInPosition(position, number_detected, float(match[2]))
             recognised_numbers.append(recognised_number)
 
         return recognised_numbers
@@ -0,0 +1,44 @@
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+from easyocr import Reader
+
+
+class EasyOCRReaderRegistry:
+    DEFAULT_LANGUAGES = ('en',)
+    WARM_UP_IMAGE_SHAPE = (32, 32, 3)
+    THREADS_PER_WORKER_AFTER_FORK = 1
+
+    _readers: Dict[Tuple[str, ...], Reader] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_reader(cls, languages: Tuple[str, ...] = DEFAULT_LANGUAGES) -> Reader:
+        # Loading the weights takes seconds, so it only happens the first time a reader is needed in the process
+        if languages not in cls._readers:
+            with cls._lock:
+                if languages not in cls._readers:
+                    cls._readers[languages] = Reader(list(languages))
+        return cls._readers[languages]
+
+    @classmethod
+    def is_reader_loaded(cls, languages: Tuple[str, ...] = DEFAULT_LANGUAGES) -> bool:
+        return languages in cls._readers
+
+    @classmethod
+    def warm_up(cls, languages: Tuple[str, ...] = DEFAULT_LANGUAGES) -> None:
+        # Called before forking a pool, the workers inherit the loaded weights copy-on-write instead of loading them
+        reader = cls.get_reader(languages)
+        reader.readtext(np.zeros(cls.WARM_UP_IMAGE_SHAPE, dtype=np.uint8))
+
+    @classmethod
+    def prepare_worker_after_fork(cls) -> None:
+        # Every forked worker running torch with all the cores of the machine would oversubscribe them
+        import torch
+        torch.set_num_threads(cls.THREADS_PER_WORKER_AFTER_FORK)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._readers = {}
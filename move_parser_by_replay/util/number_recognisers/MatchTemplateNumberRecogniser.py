@@ -1,11 +1,13 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.base.Region import Region
 from move_parser_by_replay.base.templates.Number import Number
+from move_parser_by_replay.util.MultiTemplateMatcher import MultiTemplateMatcher
 from move_parser_by_replay.util.NumberInReplayWrapper import NumberInReplayWrapper
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
 from move_parser_by_replay.util.number_recognisers.NumberRecogniserInterface import NumberRecogniserInterface
 from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition import RecognisedNumberInPosition
 
@@ -13,20 +15,34 @@ from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition im
 class MatchTemplateNumberRecogniser(NumberRecogniserInterface):
     BOTTOM_Y_FOR_SUBREGION = 228
     HEIGHT_Y_FOR_SUBREGION = 645
+    VERTICAL_SLACK_IN_ROWS = 3
     numbers: Dict[str, Number]
+    matcher: MultiTemplateMatcher
+    rows_to_anchor: Optional[Dict[int, Tuple[int, int]]]
 
-    def __init__(self, numbers: Dict[str, Number]):
+    def __init__(self, numbers: Dict[str, Number],
+                 preprocessing: PreprocessingForTemplateMatching = PreprocessingForTemplateMatching.COLOR):
         self.numbers = numbers
+        self.matcher = NumberInReplayWrapper.get_matcher_for_numbers(numbers, preprocessing)
+        self.rows_to_anchor = None
+
+    def set_rows_to_anchor(self, rows_to_anchor: Optional[Dict[int, Tuple[int, int]]]) -> None:
+        self.rows_to_anchor = rows_to_anchor
 
     def get_numbers_in_region(self, region: Frame) -> List[RecognisedNumberInPosition]:
-        matches = NumberInReplayWrapper.search_numbers_in_image(region, self.numbers)
+        if self.rows_to_anchor is not None:
+            matches = NumberInReplayWrapper.search_numbers_in_rows_with_confidence(
+                region, self.matcher, self.rows_to_anchor, self.VERTICAL_SLACK_IN_ROWS)
+        else:
+            matches = NumberInReplayWrapper.search_numbers_in_image_with_confidence(region, self.numbers,
+                                                                                    self.matcher)
 
         recognised_numbers = []
         for match in matches:
             recognised_number = match[0]
             recognised_position = match[1]
             position = Position(recognised_position[0], recognised_position[1])
-            recognised_numbers.append(RecognisedNumberInPosition(position, recognised_number))
+            recognised_numbers.append(RecognisedNumberInPosition(position, recognised_number, match[2]))
 
         return recognised_numbers
 
@@ -9,3 +9,6 @@ class NumberRecogniserInterface(ABC):
     @abstractmethod
     def get_numbers_in_region(self, region: Frame) -> List[RecognisedNumberInPosition]:
         pass
+
+    def get_numbers_in_regions(self, regions: List[Frame]) -> List[List[RecognisedNumberInPosition]]:
+        return [self.get_numbers_in_region(region) for region in regions]
@@ -4,13 +4,18 @@ from move_parser_by_replay.base.Position import Position
 class RecognisedNumberInPosition:
     position: Position
     number: int
+    confidence: float
 
-    def __init__(self, position: Position, number: int):
+    def __init__(self, position: Position, number: int, confidence: float = 1.0):
         self.position = position
         self.number = number
+        self.confidence = confidence
 
     def get_position(self) -> Position:
         return self.position
 
     def get_number(self) -> int:
         return self.number
+
+    def get_confidence(self) -> float:
+        return self.confidence
@@ -0,0 +1,55 @@
+from typing import List
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.FramePump import FramePump
+from move_parser_by_replay.base.FramePumpSubscriberInterface import FramePumpSubscriberInterface
+from move_parser_by_replay.base.Region import Region
+from tests.base.test_Video import create_synthetic_video, get_frame_number_from_synthetic_frame
+
+
+class SubscriberForEveryNFrames(FramePumpSubscriberInterface):
+    gap: int
+    last_frame: int
+    received_frames: List[Frame]
+    finished: bool
+
+    def __init__(self, gap: int, last_frame: int):
+        self.gap = gap
+        self.last_frame = last_frame
+        self.received_frames = []
+        self.finished = False
+
+    def is_frame_needed(self, frame_number: int) -> bool:
+        return frame_number % self.gap == 0 and frame_number <= self.last_frame
+
+    def is_done_with_frames(self, frame_number: int) -> bool:
+        return frame_number > self.last_frame
+
+    def receive_frame(self, frame: Frame) -> None:
+        self.received_frames.append(frame)
+
+    def finish_receiving_frames(self) -> None:
+        self.finished = True
+
+
+class SubscriberWithRegionOfInterest(SubscriberForEveryNFrames):
+    def get_regions_of_interest(self) -> List[Region]:
+        return [Region(10, 10, 5, 5)]
+
+
+def test_frame_pump_sends_each_subscriber_its_frames_in_one_pass(tmp_path):
+    video = create_synthetic_video(tmp_path)
+    every_ten_frames = SubscriberForEveryNFrames(10, 30)
+    every_fifteen_frames_cropped = SubscriberWithRegionOfInterest(15, 45)
+
+    frame_pump = FramePump(video)
+    frame_pump.subscribe(every_ten_frames)
+    frame_pump.subscribe(every_fifteen_frames_cropped)
+    frame_pump.run()
+
+    assert [frame.get_frame_number() for frame in every_ten_frames.received_frames] == [0, 10, 20, 30]
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data())
+            for frame in every_ten_frames.received_frames] == [0, 10, 20, 30]
+    assert [frame.get_frame_number() for frame in every_fifteen_frames_cropped.received_frames] == [0, 15, 30, 45]
+    assert all(frame.shape() == (5, 5, 3) for frame in every_fifteen_frames_cropped.received_frames)
+    assert every_ten_frames.finished and every_fifteen_frames_cropped.finished
@@ -0,0 +1,51 @@
+import os
+
+import cv2
+import numpy as np
+
+from move_parser_by_replay.base.templates.Button import Button
+from move_parser_by_replay.base.templates.Direction import Direction
+from move_parser_by_replay.base.templates.TemplateBank import TemplateBank
+
+
+def create_template_folder(folder) -> str:
+    os.makedirs(folder)
+    random_generator = np.random.default_rng(3)
+    for name in ['LightKick', 'HeavyPunch', '6']:
+        image = random_generator.integers(0, 256, size=(20, 16, 4), dtype=np.uint8)
+        image[:, :2, 3] = 0
+        cv2.imwrite(os.path.join(str(folder), name + '.png'), image)
+    cv2.imwrite(os.path.join(str(folder), 'Opaque.png'), np.full((10, 10, 4), 200, dtype=np.uint8))
+    return str(folder)
+
+
+def test_bank_is_the_same_as_reading_every_template(tmp_path):
+    folder = create_template_folder(tmp_path / 'templates')
+
+    bank = TemplateBank.load_or_build(folder, str(tmp_path / 'cache'))
+    bank_from_cache = TemplateBank.load_or_build(folder, str(tmp_path / 'cache'))
+
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    for loaded_bank in [bank, bank_from_cache]:
+        buttons = loaded_bank.get_templates(Button)
+        assert sorted(buttons) == ['6', 'HeavyPunch', 'LightKick', 'Opaque']
+        for name, button in buttons.items():
+            expected_button = Button(os.path.join(folder, name + '.png'))
+            assert isinstance(button, Button)
+            assert np.array_equal(button.get_image(), expected_button.get_image())
+            assert (button.get_alpha() is None) == (expected_button.get_alpha() is None)
+            if button.get_alpha() is not None:
+                assert np.array_equal(button.get_alpha(), expected_button.get_alpha())
+
+
+def test_bank_is_shared_in_the_process(tmp_path):
+    folder = create_template_folder(tmp_path / 'templates')
+    TemplateBank.clear()
+    try:
+        bank = TemplateBank.get_bank(folder, None)
+
+        assert TemplateBank.get_bank(folder, None) is bank
+        assert bank.get_templates(Button) is bank.get_templates(Button)
+        assert isinstance(bank.get_templates(Direction)['6'], Direction)
+    finally:
+        TemplateBank.clear()
@@ -0,0 +1,113 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+import pytest
+
+from move_parser_by_replay.base.Region import Region
+from move_parser_by_replay.base.Video import Video
+
+NUMBER_OF_FRAMES_IN_SYNTHETIC_VIDEO = 50
+# FFV1 is lossless and puts a keyframe every 12 frames, the default GOP of FFmpeg
+KEYFRAME_INTERVAL_OF_FFV1 = 12
+
+
+def create_synthetic_video(folder, keyframe_interval: Optional[int] = None, codec: str = 'MJPG') -> Video:
+    file_path = str(folder / 'synthetic.avi')
+    writer = cv2.VideoWriter(file_path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*codec), 30, (64, 48))
+    for frame_number in range(NUMBER_OF_FRAMES_IN_SYNTHETIC_VIDEO):
+        writer.write(np.full((48, 64, 3), frame_number * 5, dtype=np.uint8))
+    writer.release()
+    return Video(file_path, keyframe_interval)
+
+
+def get_frame_number_from_synthetic_frame(image_data: np.ndarray) -> int:
+    return int(round(float(np.mean(image_data)) / 5))
+
+
+def test_frames_from_static_list_are_yielded_in_order(tmp_path):
+    video = create_synthetic_video(tmp_path)
+
+    frames = list(video.get_frames_from_static_list_as_iterator([40, 3, 10, 3]))
+
+    assert [frame.get_frame_number() for frame in frames] == [3, 10, 40]
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in frames] == [3, 10, 40]
+
+
+def test_frames_from_static_list_are_cropped_keeping_coordinates(tmp_path):
+    video = create_synthetic_video(tmp_path)
+    region = Region(10, 5, 20, 10)
+
+    frame = next(video.get_frames_from_static_list_as_iterator([7], [region]))
+
+    assert frame.shape() == (10, 20, 3)
+    assert frame.get_origin().get_tuple() == (10, 5)
+    assert frame.get_subregion(Region(12, 6, 4, 4)).shape() == (4, 4, 3)
+
+
+def test_frames_from_static_list_as_dict(tmp_path):
+    video = create_synthetic_video(tmp_path)
+
+    frames = video.get_frames_from_static_list([0, 20])
+
+    assert sorted(frames.keys()) == [0, 20]
+    assert video.get_frames_from_static_list([]) == {}
+
+
+def test_frames_from_static_list_are_the_same_seeking_or_skipping(tmp_path):
+    needed_frames = [0, 1, 2, 30, 31, 49]
+    skipping_video = create_synthetic_video(tmp_path, Video.NO_KEYFRAME_INFORMATION)
+    seeking_video = create_synthetic_video(tmp_path, 1)
+
+    skipped_frames = list(skipping_video.get_frames_from_static_list_as_iterator(needed_frames))
+    sought_frames = list(seeking_video.get_frames_from_static_list_as_iterator(needed_frames))
+
+    assert seeking_video.is_seeking_cheaper_than_skipping(28)
+    assert not skipping_video.is_seeking_cheaper_than_skipping(28)
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in skipped_frames] == \
+        needed_frames
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in sought_frames] == \
+        needed_frames
+
+
+def test_frames_from_static_list_seeking_to_first_frame(tmp_path):
+    needed_frames = [31, 33, 40]
+    video = create_synthetic_video(tmp_path, Video.NO_KEYFRAME_INFORMATION)
+
+    frames = list(video.get_frames_from_static_list_as_iterator(needed_frames, seek_to_first_frame=True))
+
+    assert [frame.get_frame_number() for frame in frames] == needed_frames
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in frames] == needed_frames
+
+
+def test_frames_as_iterator_with_gap(tmp_path):
+    video = create_synthetic_video(tmp_path)
+
+    frames = list(video.get_frames_as_iterator(gap_size=20))
+
+    assert [frame.get_frame_number() for frame in frames] == [0, 20, 40]
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in frames] == [0, 20, 40]
+
+
+def test_frames_as_iterator_needs_a_positive_gap(tmp_path):
+    video = create_synthetic_video(tmp_path)
+
+    with pytest.raises(ValueError):
+        video.get_frames_as_iterator(gap_size=0)
+
+
+@pytest.mark.parametrize('codec, keyframe_interval', [('MJPG', 1), ('FFV1', KEYFRAME_INTERVAL_OF_FFV1)])
+def test_keyframe_interval_is_estimated_from_raw_packets(tmp_path, codec, keyframe_interval):
+    video = create_synthetic_video(tmp_path, codec=codec)
+
+    assert video.get_keyframe_interval() == keyframe_interval
+
+
+def test_frames_from_static_list_are_sought_between_keyframes(tmp_path):
+    needed_frames = [0, 1, 30, 49]
+    video = create_synthetic_video(tmp_path, codec='FFV1')
+
+    frames = list(video.get_frames_from_static_list_as_iterator(needed_frames))
+
+    assert video.is_seeking_cheaper_than_skipping(28)
+    assert [get_frame_number_from_synthetic_frame(frame.get_image_data()) for frame in frames] == needed_frames
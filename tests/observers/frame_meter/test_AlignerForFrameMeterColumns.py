@@ -0,0 +1,103 @@
+import random
+from typing import List
+
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.AlignerForFrameMeterColumns import AlignerForFrameMeterColumns
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+from move_parser_by_replay.observers.frame_meter.StateType import StateType
+from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalState
+
+
+def get_columns(state_types: List[StateType], first_position: int, weight: int = 9) -> List[FrameMeterColumnMap]:
+    columns = []
+    for index, state_type in enumerate(state_types):
+        state = StateFrameMeterRegistry.get(state_type, TemporalState.PRESENT)
+        columns.append(FrameMeterColumnMap((first_position + index) % 80,
+                                           LikelihoodMapForObservation(default_value=state, total_weight=weight),
+                                           LikelihoodMapForObservation(default_value=state, total_weight=weight)))
+    return columns
+
+
+def test_overlap_is_found_even_if_weights_differ():
+    state_types = [StateType.STARTUP] * 3 + [StateType.ACTIVE] * 2 + [StateType.RECOVERY] * 4
+    first_sequence = get_columns(state_types[:6], 76)
+    second_sequence = get_columns(state_types[2:], 78, weight=4)
+
+    merged_sequence = AlignerForFrameMeterColumns.merge_sequences(first_sequence, second_sequence)
+
+    assert merged_sequence == first_sequence + second_sequence[4:]
+    assert [column.get_column_position() for column in merged_sequence] == [76, 77, 78, 79, 0, 1, 2, 3, 4]
+
+
+def test_sequences_without_overlap_are_concatenated():
+    first_sequence = get_columns([StateType.STARTUP] * 4, 0)
+    second_sequence = get_columns([StateType.RECOVERY] * 4, 2)
+
+    assert AlignerForFrameMeterColumns.merge_sequences(first_sequence, second_sequence) == \
+        first_sequence + second_sequence
+
+
+def test_repeated_columns_use_the_longest_overlap():
+    first_sequence = get_columns([StateType.ACTIVE] * 6, 0)
+    second_sequence = get_columns([StateType.ACTIVE] * 6, 3)
+
+    assert AlignerForFrameMeterColumns.get_length_of_overlap(first_sequence, second_sequence) == 3
+    assert AlignerForFrameMeterColumns.get_length_of_overlap(first_sequence, first_sequence) == 6
+    assert AlignerForFrameMeterColumns.get_length_of_overlap(first_sequence, []) == 0
+
+
+def test_overlap_with_one_misclassified_column_is_not_duplicated():
+    state_types = [StateType.STARTUP] * 10 + [StateType.ACTIVE] * 20 + [StateType.RECOVERY] * 30
+    first_sequence = get_columns(state_types[:50], 0)
+    second_sequence = get_columns(state_types[10:], 10)
+    noisy_column = get_columns([StateType.HIT_STUCK], 25)[0]
+    second_sequence[15] = noisy_column
+
+    merged_sequence = AlignerForFrameMeterColumns.merge_sequences(first_sequence, second_sequence)
+
+    assert merged_sequence == first_sequence + second_sequence[40:]
+    assert noisy_column not in merged_sequence
+
+
+def get_length_of_overlap_with_mismatches_trying_every_length(first_sequence: List[FrameMeterColumnMap],
+                                                              second_sequence: List[FrameMeterColumnMap],
+                                                              exact_overlap_length: int) -> int:
+    for overlap_length in range(min(len(first_sequence), len(second_sequence)), exact_overlap_length, -1):
+        if overlap_length < AlignerForFrameMeterColumns.MINIMUM_LENGTH_FOR_OVERLAP_WITH_MISMATCHES:
+            break
+        tail_of_first = first_sequence[len(first_sequence) - overlap_length:]
+        if [column.get_column_position() for column in tail_of_first] != \
+                [column.get_column_position() for column in second_sequence[:overlap_length]]:
+            continue
+        mismatched_columns = sum(1 for first_column, second_column in zip(tail_of_first, second_sequence)
+                                 if first_column.get_signature() != second_column.get_signature())
+        if mismatched_columns <= overlap_length * AlignerForFrameMeterColumns.MAXIMUM_FRACTION_OF_MISMATCHED_COLUMNS:
+            return overlap_length
+    return 0
+
+
+def test_overlap_with_mismatches_only_compares_tails_starting_at_the_same_position(monkeypatch):
+    random_generator = random.Random(7)
+    state_types = [StateType.STARTUP, StateType.ACTIVE, StateType.RECOVERY, StateType.HIT_STUCK]
+    tails_compared = []
+    is_overlap_with_few_mismatches = AlignerForFrameMeterColumns.is_overlap_with_few_mismatches
+    monkeypatch.setattr(AlignerForFrameMeterColumns, 'is_overlap_with_few_mismatches',
+                        lambda first, second, tail: tails_compared.append(tail) or
+                        is_overlap_with_few_mismatches(first, second, tail))
+
+    for _ in range(50):
+        history = [random_generator.choice(state_types[:2]) for _ in range(400)]
+        start_of_second = random_generator.randint(150, 400)
+        first_sequence = get_columns(history[:start_of_second + random_generator.randint(0, 80)], 0)
+        second_sequence = get_columns(history[start_of_second:], start_of_second)
+        for index in random_generator.sample(range(len(second_sequence)), 3):
+            second_sequence[index] = get_columns([random_generator.choice(state_types)], start_of_second + index)[0]
+        tails_compared.clear()
+
+        overlap_length = AlignerForFrameMeterColumns.get_length_of_overlap_with_mismatches(first_sequence,
+                                                                                           second_sequence, 0)
+
+        assert overlap_length == get_length_of_overlap_with_mismatches_trying_every_length(first_sequence,
+                                                                                          second_sequence, 0)
+        assert len(tails_compared) <= len(first_sequence) // 80 + 1
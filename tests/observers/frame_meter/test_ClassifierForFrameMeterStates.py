@@ -0,0 +1,75 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ClassifierForFrameMeterStates import ClassifierForFrameMeterStates
+from move_parser_by_replay.observers.frame_meter.ColorFrameMeter import ColorFrameMeter
+from move_parser_by_replay.observers.frame_meter.LookUpTableForFrameMeterColors import LookUpTableForFrameMeterColors
+from move_parser_by_replay.observers.frame_meter.StateFrameMeter import StateFrameMeter
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+
+
+def get_map_of_states_pixel_by_pixel(image_data: np.ndarray) -> LikelihoodMapForObservation[StateFrameMeter]:
+    states_detected: Dict[Optional[StateFrameMeter], int] = {}
+    for row in image_data:
+        for pixel in row:
+            state = ColorFrameMeter(tuple(pixel)).get_potential_state_frame_meter()
+            if state is None:
+                weight_of_observation = 1
+            else:
+                weight_of_observation = StateFrameMeterRegistry.get_weight(state.get_state_type(),
+                                                                           state.get_temporal_state())
+            states_detected[state] = states_detected.get(state, 0) + weight_of_observation
+
+    likelihood_map = LikelihoodMapForObservation(total_weight=0)
+    for state, count in states_detected.items():
+        likelihood_map.add_observation(state, weight=count)
+    if likelihood_map.get_total_weight() == 0:
+        likelihood_map.add_observation(None, 1)
+    return likelihood_map
+
+
+def get_example_stack_of_images(number_of_images: int) -> np.ndarray:
+    random_generator = np.random.default_rng(42)
+    palette = np.array(list(ColorFrameMeter.ALL_COLORS.values()))
+    chosen_colors = palette[random_generator.integers(0, len(palette), size=(number_of_images, 20, 10))]
+    noise = random_generator.integers(-9, 10, size=chosen_colors.shape)
+    stack = np.clip(chosen_colors + noise, 0, 255).astype(np.uint8)
+    random_pixels = random_generator.random((number_of_images, 20, 10)) < 0.2
+    stack[random_pixels] = random_generator.integers(0, 256, size=(int(random_pixels.sum()), 3))
+    return stack
+
+
+def test_batched_maps_are_identical_to_pixel_by_pixel_maps():
+    stack = get_example_stack_of_images(12)
+
+    batched_maps = ClassifierForFrameMeterStates.get_maps_of_states_in_stack(stack)
+
+    for image, batched_map in zip(stack, batched_maps):
+        expected_map = get_map_of_states_pixel_by_pixel(image)
+        assert expected_map == batched_map
+        assert list(expected_map.get_dictionary_of_possibilities()) == \
+            list(batched_map.get_dictionary_of_possibilities())
+
+
+def test_empty_image_is_unknown():
+    likelihood_map = ClassifierForFrameMeterStates.get_map_of_states_in_image(np.zeros((0, 10, 3), dtype=np.uint8))
+
+    assert likelihood_map.get_total_weight() == 1
+    assert likelihood_map.get_unknown_weight() == 1
+
+
+def test_maps_with_quantized_look_up_table_match_centre_of_each_bucket(tmp_path):
+    look_up_table = LookUpTableForFrameMeterColors.load_or_build(6, str(tmp_path))
+    stack = (get_example_stack_of_images(4) & 0b11111100) + 2
+
+    ClassifierForFrameMeterStates.use_look_up_table(look_up_table)
+    try:
+        maps_with_look_up_table = ClassifierForFrameMeterStates.get_maps_of_states_in_stack(stack)
+    finally:
+        ClassifierForFrameMeterStates.disable_look_up_table()
+
+    assert maps_with_look_up_table == ClassifierForFrameMeterStates.get_maps_of_states_in_stack(stack)
+    assert LookUpTableForFrameMeterColors.load(LookUpTableForFrameMeterColors.get_default_path(6, str(tmp_path)),
+                                               6).get_table().shape == (1 << 18,)
@@ -0,0 +1,67 @@
+from typing import List
+
+import numpy as np
+
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ClassifierForFrameMeterStates import ClassifierForFrameMeterStates
+from move_parser_by_replay.observers.frame_meter.DenseLikelihoodsOfFrameMeter import DenseLikelihoodsOfFrameMeter
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+
+
+def get_random_map(random_generator: np.random.Generator) -> LikelihoodMapForObservation:
+    likelihood_map = LikelihoodMapForObservation(total_weight=0)
+    number_of_states = StateFrameMeterRegistry.get_number_of_states()
+    for state_index in random_generator.choice(number_of_states, size=random_generator.integers(1, 5), replace=False):
+        likelihood_map.add_observation(StateFrameMeterRegistry.get_by_index(int(state_index)),
+                                       weight=int(random_generator.integers(1, 2000)))
+    if random_generator.random() < 0.5:
+        likelihood_map.add_observation(None, weight=int(random_generator.integers(1, 50)))
+    return likelihood_map
+
+
+def get_random_columns(seed: int, number_of_columns: int = 80) -> List[FrameMeterColumnMap]:
+    random_generator = np.random.default_rng(seed)
+    return [FrameMeterColumnMap(column_position, get_random_map(random_generator), get_random_map(random_generator))
+            for column_position in range(number_of_columns)]
+
+
+def test_probabilities_are_the_same_than_in_the_maps():
+    columns = get_random_columns(3)
+    dense_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(columns)
+
+    assert dense_likelihoods.get_probabilities_that_are_past().tolist() == \
+        [column.probability_that_is_past() for column in columns]
+    assert dense_likelihoods.get_probabilities_that_are_present().tolist() == \
+        [column.probability_that_is_present() for column in columns]
+    assert dense_likelihoods.get_probabilities_are_unknown_or_nothing().tolist() == \
+        [column.probability_is_unknown_or_nothing() for column in columns]
+
+
+def test_probabilities_of_merged_columns_are_the_same_than_in_the_maps_even_when_weights_outgrow_integers():
+    columns = get_random_columns(5)
+
+    for seed in range(6, 12):
+        other_columns = get_random_columns(seed)
+        dense_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(columns)
+        assert dense_likelihoods.get_probabilities_are_same_columns_than(
+            DenseLikelihoodsOfFrameMeter.from_columns(other_columns)).tolist() == \
+            [column.probability_is_same_frame_meter_column_than(other_column)
+             for column, other_column in zip(columns, other_columns)]
+        columns = [column.merge_with_other_column(other_column) for column, other_column in zip(columns, other_columns)]
+
+    dense_likelihoods = DenseLikelihoodsOfFrameMeter.from_columns(columns)
+    assert dense_likelihoods.get_weights().dtype == object
+    assert dense_likelihoods.get_probabilities_that_are_past().tolist() == \
+        [column.probability_that_is_past() for column in columns]
+
+
+def test_classifier_gives_the_dense_weights_of_its_maps():
+    random_generator = np.random.default_rng(17)
+    stack = random_generator.integers(0, 256, size=(8, 20, 10, 3), dtype=np.uint8)
+
+    maps, dense_weights = ClassifierForFrameMeterStates.get_maps_and_dense_weights_of_states_in_stack(stack)
+
+    columns = [FrameMeterColumnMap(index, maps[2 * index], maps[2 * index + 1]) for index in range(4)]
+    assert DenseLikelihoodsOfFrameMeter.from_columns(columns).get_weights().tolist() == \
+        dense_weights.reshape(4, 2, -1).tolist()
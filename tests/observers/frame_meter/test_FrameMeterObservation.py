@@ -0,0 +1,85 @@
+import numpy as np
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Position import Position
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+from move_parser_by_replay.observers.frame_meter.ColorFrameMeter import ColorFrameMeter
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
+from move_parser_by_replay.observers.frame_meter.FrameMeterObservation import FrameMeterObservation
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+from move_parser_by_replay.observers.frame_meter.StateType import StateType
+from move_parser_by_replay.observers.frame_meter.StripExtractorForFrameMeter import StripExtractorForFrameMeter
+from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalState
+
+
+def get_example_frame_and_positions():
+    random_generator = np.random.default_rng(7)
+    palette = np.array(list(ColorFrameMeter.ALL_COLORS.values()), dtype=np.uint8)
+    image = palette[random_generator.integers(0, len(palette), size=(1080, 1920))]
+    positions = {}
+    for player, middle_y in [(Player.FIRST_PLAYER, 814), (Player.SECOND_PLAYER, 854)]:
+        gap_between_rectangles = 1203 / FrameMeterObservation.NUMBER_OF_COLUMNS_IN_FRAME_METER
+        positions[player] = [Position(358 + int(gap_between_rectangles * (i + 0.5)), middle_y)
+                             for i in range(FrameMeterObservation.NUMBER_OF_COLUMNS_IN_FRAME_METER)]
+    return Frame(image, 0), positions
+
+
+def test_strip_extractor_gives_same_observation_than_one_subregion_per_position():
+    frame, positions = get_example_frame_and_positions()
+
+    expected_observation = FrameMeterObservation.fill_from_frame_and_positions(frame, positions)
+    observation = FrameMeterObservation.fill_from_frame_and_strip_extractor(frame,
+                                                                            StripExtractorForFrameMeter(positions))
+
+    assert expected_observation.get_frame_meter_list() == observation.get_frame_meter_list()
+
+
+def test_strip_extractor_falls_back_when_frame_is_too_small():
+    frame, positions = get_example_frame_and_positions()
+    small_frame = Frame(frame.get_image_data()[:830, :1000], 0)
+
+    expected_observation = FrameMeterObservation.fill_from_frame_and_positions(small_frame, positions)
+    observation = FrameMeterObservation.fill_from_frame_and_strip_extractor(small_frame,
+                                                                            StripExtractorForFrameMeter(positions))
+
+    assert expected_observation.get_frame_meter_list() == observation.get_frame_meter_list()
+
+
+def get_columns_with_past_tail(number_of_present_columns: int):
+    columns = []
+    for column_position in range(FrameMeterObservation.NUMBER_OF_COLUMNS_IN_FRAME_METER):
+        temporal_state = TemporalState.PRESENT if column_position < number_of_present_columns else TemporalState.PAST
+        state = StateFrameMeterRegistry.get(StateType.RECOVERY, temporal_state)
+        likelihood_map = LikelihoodMapForObservation(default_value=state, total_weight=90)
+        likelihood_map.add_observation(None, weight=10)
+        columns.append(FrameMeterColumnMap(column_position, likelihood_map, likelihood_map))
+    return columns
+
+
+def test_past_columns_are_cleaned_from_the_tail():
+    columns = get_columns_with_past_tail(50)
+    observation = FrameMeterObservation(columns)
+
+    observation.clean_from_estimated_column_because_it_is_past()
+
+    assert observation.get_frame_meter_list() == columns[:50]
+
+
+def test_dense_likelihoods_follow_a_list_of_the_same_length():
+    observation = FrameMeterObservation(get_columns_with_past_tail(50))
+    observation.get_dense_likelihoods()
+    columns = get_columns_with_past_tail(30)
+
+    observation.set_frame_meter_list(columns)
+    observation.clean_from_estimated_column_because_it_is_past()
+
+    assert observation.get_frame_meter_list() == columns[:30]
+
+
+def test_split_between_present_and_past_survives_vanishing_probabilities():
+    present_probabilities = np.array([0.5] * 40 + [1e-12] * 40)
+    past_probabilities = np.array([1e-12] * 40 + [0.5] * 40)
+
+    assert FrameMeterObservation.get_most_likely_index_from_which_tail_is_past(past_probabilities,
+                                                                              present_probabilities, 0, 80) == 40
@@ -1,11 +1,19 @@
+import copy
+import random
 from typing import List
 
 from move_parser_by_replay.base.Player import Player
 from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
 from move_parser_by_replay.observers.frame_meter.FrameMeterColumn import FrameMeterColumn
+from move_parser_by_replay.observers.frame_meter.FrameMeterColumnMap import FrameMeterColumnMap
 from move_parser_by_replay.observers.frame_meter.FrameMeterObserver import FrameMeterObserver
+from move_parser_by_replay.observers.frame_meter.StateFrameMeterRegistry import StateFrameMeterRegistry
+from move_parser_by_replay.observers.frame_meter.StateType import StateType
+from move_parser_by_replay.observers.frame_meter.TemporalState import TemporalState
 from move_parser_by_replay.util.CSVHelper import CSVHelper
 from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
+from tests.base.test_Video import create_synthetic_video
 
 
 def test_basic_frame_meter_observer():
@@ -34,3 +42,102 @@ def test_basic_frame_meter_observer():
                                                                           :min_length])
     assert len(final_frame_meter_list) > 0
     assert ratio_difference > 0.5
+
+
+def test_parallel_frame_meter_observer_matches_sequential():
+    sequential_observer = FrameMeterObserver(Video('./data/match1.mkv'))
+    sequential_observer.set_maximum_frame_to_look_at(1000)
+    sequential_observer.analyse_full_video()
+
+    parallel_observer = FrameMeterObserver(Video('./data/match1.mkv'))
+    parallel_observer.set_maximum_frame_to_look_at(1000)
+    parallel_observer.analyse_full_video_in_parallel(2)
+
+    assert parallel_observer.get_exact_final_list() == sequential_observer.get_exact_final_list()
+
+
+def test_adaptive_gap_finds_the_same_states_than_fixed_gap():
+    fixed_gap_observer = FrameMeterObserver(Video('./data/match1.mkv'))
+    fixed_gap_observer.set_maximum_frame_to_look_at(1000)
+    fixed_gap_observer.analyse_full_video()
+
+    adaptive_gap_observer = FrameMeterObserver(Video('./data/match1.mkv'))
+    adaptive_gap_observer.set_maximum_frame_to_look_at(1000)
+    adaptive_gap_observer.set_adaptive_gap_size(True)
+    adaptive_gap_observer.analyse_full_video()
+
+    for player in [Player.FIRST_PLAYER, Player.SECOND_PLAYER]:
+        assert adaptive_gap_observer.get_exact_list_for_player_as_frame_count(player) == \
+            fixed_gap_observer.get_exact_list_for_player_as_frame_count(player)
+
+
+def get_columns_with_uncertain_state(state_type: StateType, positions: List[int]) -> List[FrameMeterColumnMap]:
+    columns = []
+    for position in positions:
+        likelihood_map = LikelihoodMapForObservation(
+            default_value=StateFrameMeterRegistry.get(state_type, TemporalState.PRESENT), total_weight=1)
+        # Every column is barely more likely to be its state than the other ones, so long overlaps are unlikely
+        for other_state_type in [StateType.ACTIVE, StateType.STARTUP, StateType.RECOVERY, StateType.HIT_STUCK]:
+            if other_state_type != state_type:
+                likelihood_map.add_observation(StateFrameMeterRegistry.get(other_state_type, TemporalState.PRESENT))
+        columns.append(FrameMeterColumnMap(position, likelihood_map, likelihood_map))
+    return columns
+
+
+def test_start_overlap_index_picks_the_most_likely_of_repeated_positions():
+    positions = list(range(FrameMeterObserver.NUMBER_OF_COLUMNS_IN_FRAME_METER))
+    first_sequence = get_columns_with_uncertain_state(StateType.ACTIVE, positions[:60]) + \
+        get_columns_with_uncertain_state(StateType.RECOVERY, positions)
+    second_sequence = get_columns_with_uncertain_state(StateType.RECOVERY, positions)
+
+    assert FrameMeterObserver.calculate_start_overlap_index(first_sequence, second_sequence) == 60
+    assert FrameMeterObserver.calculate_start_overlap_index(first_sequence,
+                                                            get_columns_with_uncertain_state(StateType.ACTIVE,
+                                                                                             [81])) == -1
+
+
+def get_random_columns_to_clean(seed: int, number_of_columns: int) -> List[FrameMeterColumnMap]:
+    random_generator = random.Random(seed)
+    # Runs of full invulnerability of any length, columns to filter and states that are impossible in the final list
+    states = [StateFrameMeterRegistry.get(StateType.ACTIVE, TemporalState.PRESENT),
+              StateFrameMeterRegistry.get(StateType.FULL_INVULNERABILITY_1, TemporalState.PRESENT),
+              StateFrameMeterRegistry.get(StateType.RECOVERY, TemporalState.PAST),
+              StateFrameMeterRegistry.get(StateType.FRAME_METER_END_OF_FULL_WINDOW, TemporalState.PRESENT)]
+    columns = []
+    state_of_run = states[0]
+    while len(columns) < number_of_columns:
+        for _ in range(random_generator.randint(1, 5)):
+            maps = []
+            for _ in range(2):
+                likelihood_map = LikelihoodMapForObservation(default_value=state_of_run, total_weight=0)
+                likelihood_map.add_observation(state_of_run, weight=random_generator.randint(5, 10))
+                likelihood_map.add_observation(random_generator.choice(states), weight=random_generator.randint(1, 4))
+                maps.append(likelihood_map)
+            columns.append(FrameMeterColumnMap(len(columns) % 80, maps[0], maps[1]))
+        state_of_run = random_generator.choice(states)
+    return columns
+
+
+def get_final_list_and_items_in_sink(video: Video, columns: List[FrameMeterColumnMap], is_sink_used: bool):
+    frame_meter_observer = FrameMeterObserver(video)
+    frame_meter_observer.MAXIMUM_LENGTH_OF_MUTABLE_TAIL = 8
+    items_in_sink: List[FrameMeterColumnMap] = []
+    if is_sink_used:
+        frame_meter_observer.set_sink_for_final_items(items_in_sink.extend)
+    frame_meter_observer.start_receiving_frames()
+    for column in copy.deepcopy(columns):
+        frame_meter_observer.final_list_being_merged.replace_tail(0, [column])
+    frame_meter_observer.finish_receiving_frames()
+    return frame_meter_observer.get_exact_final_list(), items_in_sink
+
+
+def test_sink_receives_the_start_of_the_cleaned_final_list(tmp_path):
+    video = create_synthetic_video(tmp_path)
+    for seed in range(5):
+        columns = get_random_columns_to_clean(seed, 300)
+        final_list_without_sink, _ = get_final_list_and_items_in_sink(video, columns, False)
+        final_list_with_sink, items_in_sink = get_final_list_and_items_in_sink(video, columns, True)
+
+        assert len(items_in_sink) > 0
+        assert not any(column.is_end_of_window() for column in items_in_sink)
+        assert items_in_sink + final_list_with_sink == final_list_without_sink
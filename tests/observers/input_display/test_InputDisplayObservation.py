@@ -0,0 +1,85 @@
+from typing import List
+
+import numpy as np
+
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Position import Position
+from move_parser_by_replay.base.templates.Direction import Direction
+from move_parser_by_replay.base.templates.ListOfButtons import ListOfButtons
+from move_parser_by_replay.observers.input_display.InputDisplayObservation import InputDisplayObservation
+from move_parser_by_replay.observers.input_display.InputDisplayRow import InputDisplayRow
+from move_parser_by_replay.observers.input_display.MergerForInputDisplayObservations import \
+    MergerForInputDisplayObservations
+from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition import RecognisedNumberInPosition
+
+
+def get_number_in_row(number: int, row_key: int, confidence: float) -> RecognisedNumberInPosition:
+    y_in_row = InputDisplayObservation.get_top_y_of_row_key(row_key) + 5
+    return RecognisedNumberInPosition(Position(3, y_in_row), number, confidence)
+
+
+def test_rows_with_doubtful_frames_pressed():
+    observation = InputDisplayObservation(0)
+    numbers_recognised = [get_number_in_row(12, 1, 0.95), get_number_in_row(4, 3, 0.5),
+                          get_number_in_row(140, 5, 0.99), get_number_in_row(8, 7, 0.9)]
+
+    observation.add_observation_of_frames_pressed(numbers_recognised, Player.FIRST_PLAYER,
+                                                  is_weighted_by_confidence=True)
+    doubtful_rows = observation.get_rows_with_doubtful_frames_pressed(numbers_recognised, Player.FIRST_PLAYER, 0.8)
+
+    rows = observation.get_observation_rows_by_player()[Player.FIRST_PLAYER]
+    assert doubtful_rows == [3, 5]
+    assert rows[1].frames_pressed_observed.get_dictionary_of_possibilities() == {12: 3}
+    assert rows[3].frames_pressed_observed.get_dictionary_of_possibilities() == {4: 2}
+    assert rows[5].frames_pressed_observed.get_dictionary_of_possibilities() == {}
+
+
+def test_frames_pressed_have_the_same_weight_without_confidence():
+    observation = InputDisplayObservation(0)
+
+    observation.add_observation_of_frames_pressed([get_number_in_row(12, 1, 0.95), get_number_in_row(4, 3, 0.2)],
+                                                  Player.FIRST_PLAYER)
+
+    rows = observation.get_observation_rows_by_player()[Player.FIRST_PLAYER]
+    assert rows[1].frames_pressed_observed.get_dictionary_of_possibilities() == {12: 1}
+    assert rows[3].frames_pressed_observed.get_dictionary_of_possibilities() == {4: 1}
+
+
+def get_observation_of_rows(rows: List[InputDisplayRow], weight_factor: int = 1) -> InputDisplayObservation:
+    observation = InputDisplayObservation(0)
+    for row_key, row in enumerate(rows, start=1):
+        observation_row = observation.get_observation_rows_by_player()[Player.FIRST_PLAYER][row_key]
+        observation_row.add_direction_pressed_observation(row.get_direction(), 9 * weight_factor)
+        observation_row.add_frames_pressed_observation(row.get_frame_number(), 3 * weight_factor)
+    return observation
+
+
+def get_history_of_rows() -> List[InputDisplayRow]:
+    directions = [Direction.from_arrays(name, np.zeros((4, 4, 3), dtype=np.uint8), None) for name in ['2', '5', '6']]
+    # The newest row is the first one, older rows scroll down
+    return [InputDisplayRow(directions[index % 3], ListOfButtons([]), 1 + index % 7) for index in range(30)]
+
+
+def test_slide_found_by_signatures_is_merged():
+    history = get_history_of_rows()
+    slided_rows = 3
+    first_observation = get_observation_of_rows(history[slided_rows:slided_rows + 19])
+    second_observation = get_observation_of_rows(history[:19])
+
+    merged_rows = MergerForInputDisplayObservations.merge_input_displays(first_observation, 0, second_observation, 10,
+                                                                         Player.FIRST_PLAYER)
+
+    assert first_observation.get_most_likely_slide_by_signatures(second_observation, Player.FIRST_PLAYER) == 3
+    assert merged_rows == list(reversed(history[1:slided_rows + 19]))
+
+
+def test_slides_are_tried_in_order_when_signatures_point_to_a_wrong_one():
+    history = get_history_of_rows()
+    # Rows are observed often enough that only the right slide is likely
+    first_observation = get_observation_of_rows(history[3:22], 10)
+    second_observation = get_observation_of_rows(history[:19], 10)
+    # As with a near tie between slides, the vote goes to a slide that does not overlap
+    first_observation.get_most_likely_slide_by_signatures = lambda other_observation, player: 5
+
+    assert MergerForInputDisplayObservations.get_slide_between_input_displays(first_observation, 0, second_observation,
+                                                                              10, Player.FIRST_PLAYER) == 3
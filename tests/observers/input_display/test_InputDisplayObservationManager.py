@@ -1,11 +1,66 @@
+from typing import List, Callable, Tuple
+
+import numpy as np
+
+from move_parser_by_replay.base.Frame import Frame
 from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Position import Position
 from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.input_display.InputDisplayObservation import InputDisplayObservation
+from move_parser_by_replay.observers.input_display.InputDisplayObservationManager import \
+    InputDisplayObservationManager
 from move_parser_by_replay.observers.input_display.InputDisplayObserver import InputDisplayTemplateObserver
 from move_parser_by_replay.observers.input_display.InputDisplayRow import InputDisplayRow
 from move_parser_by_replay.observers.input_display.MergerForInputDisplayObservations import \
     MergerForInputDisplayObservations
 from move_parser_by_replay.util.CSVHelper import CSVHelper
 from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
+from move_parser_by_replay.util.number_recognisers.MatchTemplateNumberRecogniser import MatchTemplateNumberRecogniser
+from move_parser_by_replay.util.number_recognisers.NumberRecogniserInterface import NumberRecogniserInterface
+from move_parser_by_replay.util.number_recognisers.RecognisedNumberInPosition import RecognisedNumberInPosition
+from tests.base.test_Video import create_synthetic_video
+
+
+class StubNumberRecogniser(NumberRecogniserInterface):
+    get_numbers: Callable[[Frame], List[RecognisedNumberInPosition]]
+    regions_read: List[Frame]
+
+    def __init__(self, get_numbers: Callable[[Frame], List[RecognisedNumberInPosition]]):
+        self.get_numbers = get_numbers
+        self.regions_read = []
+
+    def get_numbers_in_region(self, region: Frame) -> List[RecognisedNumberInPosition]:
+        self.regions_read.append(region)
+        return self.get_numbers(region)
+
+
+def get_number_in_row(number: int, row_key: int, confidence: float) -> RecognisedNumberInPosition:
+    return RecognisedNumberInPosition(Position(3, InputDisplayObservation.get_top_y_of_row_key(row_key) + 10), number,
+                                      confidence)
+
+
+def get_strip_with_row_keys() -> Frame:
+    # Every line of pixels holds the key of the row it belongs to
+    row_keys = [InputDisplayObservation.map_y_from_position_to_row_key(y)
+                for y in range(MatchTemplateNumberRecogniser.HEIGHT_Y_FOR_SUBREGION)]
+    image = np.repeat(np.array(row_keys, dtype=np.uint8)[:, np.newaxis, np.newaxis], 26, axis=1)
+    return Frame(np.repeat(image, 3, axis=2), 0)
+
+
+def get_manager_with_stub_recognisers(tmp_path, is_cascade_of_number_recognisers: bool) -> \
+        Tuple[InputDisplayObservationManager, StubNumberRecogniser, StubNumberRecogniser]:
+    manager = InputDisplayObservationManager({}, {}, {}, create_synthetic_video(tmp_path),
+                                             is_cascade_of_number_recognisers)
+    # Row 2 is read with confidence, row 5 is a doubt
+    template_recogniser = StubNumberRecogniser(
+        lambda region: [get_number_in_row(12, 2, 0.95), get_number_in_row(4, 5, 0.5)])
+    # The OCR reads the key of the row in the middle of the region it is given
+    ocr_recogniser = StubNumberRecogniser(lambda region: [RecognisedNumberInPosition(
+        Position(2, 3), 20 + int(region.get_image_data()[region.shape()[0] // 2, 0, 0]), 0.9)])
+    manager.template_number_recogniser = template_recogniser
+    manager.number_recognisers = [ocr_recogniser, template_recogniser]
+    manager.observations[0] = InputDisplayObservation(0)
+    return manager, template_recogniser, ocr_recogniser
 
 
 def test_apply_base_observations():
@@ -96,3 +151,92 @@ def test_analyse_full_video_creates_merged_input_display_rows():
                    enumerate(list_of_expected_input_displays)]
 
     assert DiffLibWrapper.get_similarity_ratio_from_two_lists(list_of_expected_input_displays, final_list) > 0.5
+
+
+def test_identical_strips_are_recognised_once_and_reused_as_copies():
+    video = Video('./data/match1.mkv')
+    manager = InputDisplayTemplateObserver(video).get_manager()
+    image = video.get_frame_from_position(1000).get_image_data()
+    frames = [Frame(image, 1000), Frame(image.copy(), 1001),
+              Frame(video.get_frame_from_position(1500).get_image_data(), 1002)]
+    players = [Player.FIRST_PLAYER, Player.SECOND_PLAYER]
+    fingerprints = {(player, manager.get_fingerprint_of_player(frame, player))
+                    for frame in frames for player in players}
+
+    strips_recognised = []
+    apply_observations_of_templates_for_player = manager.apply_observations_of_templates_for_player
+
+    def apply_and_count_observations_of_templates(frame, player, frame_number):
+        strips_recognised.append((frame_number, player))
+        apply_observations_of_templates_for_player(frame, player, frame_number)
+
+    manager.apply_observations_of_templates_for_player = apply_and_count_observations_of_templates
+    manager.apply_specific_observations_in_given_frames(frames)
+
+    assert len(fingerprints) > len(players)
+    assert len(strips_recognised) == len(fingerprints)
+    assert all(frame_number != 1001 for frame_number, _ in strips_recognised)
+
+    fresh_manager = InputDisplayTemplateObserver(video).get_manager()
+    fresh_manager.set_change_detection(False)
+    fresh_manager.apply_specific_observations_in_given_frames([Frame(image.copy(), 1001)])
+    observations = manager.get_observations()
+    for player in players:
+        reused_rows = observations[1001].get_observation_rows_by_player()[player]
+        observed_rows = observations[1000].get_observation_rows_by_player()[player]
+        assert reused_rows == fresh_manager.get_observations()[1001].get_observation_rows_by_player()[player]
+        assert reused_rows is not observed_rows
+        assert all(reused_rows[row_key] is not observed_rows[row_key] for row_key in reused_rows)
+
+
+def test_cascade_reads_only_doubtful_rows_again_and_maps_them_to_their_row(tmp_path):
+    manager, template_recogniser, ocr_recogniser = get_manager_with_stub_recognisers(tmp_path, True)
+
+    manager.apply_observations_of_numbers_in_regions([(0, Player.FIRST_PLAYER, get_strip_with_row_keys())])
+
+    rows = manager.get_observations()[0].get_observation_rows_by_player()[Player.FIRST_PLAYER]
+    assert len(template_recogniser.regions_read) == 1
+    assert len(ocr_recogniser.regions_read) == 1
+    assert ocr_recogniser.regions_read[0].shape()[0] < MatchTemplateNumberRecogniser.HEIGHT_Y_FOR_SUBREGION
+    assert rows[2].frames_pressed_observed.get_dictionary_of_possibilities() == {12: 3}
+    assert rows[5].frames_pressed_observed.get_dictionary_of_possibilities() == {4: 2, 25: 3}
+    assert all(rows[row_key].frames_pressed_observed.get_dictionary_of_possibilities() == {}
+               for row_key in rows if row_key not in [2, 5])
+
+
+def test_without_cascade_every_recogniser_reads_the_whole_strip_with_the_same_weight(tmp_path):
+    manager, template_recogniser, ocr_recogniser = get_manager_with_stub_recognisers(tmp_path, False)
+    strip = get_strip_with_row_keys()
+
+    manager.apply_observations_of_numbers_in_regions([(0, Player.FIRST_PLAYER, strip)])
+
+    rows = manager.get_observations()[0].get_observation_rows_by_player()[Player.FIRST_PLAYER]
+    assert template_recogniser.regions_read == [strip]
+    assert ocr_recogniser.regions_read == [strip]
+    # The OCR saw the middle of the whole strip, row 10, at the top of it
+    assert rows[1].frames_pressed_observed.get_dictionary_of_possibilities() == {30: 1}
+    assert rows[2].frames_pressed_observed.get_dictionary_of_possibilities() == {12: 1}
+    assert rows[5].frames_pressed_observed.get_dictionary_of_possibilities() == {4: 1}
+
+
+def test_only_pixel_identical_strips_are_reused(tmp_path):
+    manager = InputDisplayObservationManager({}, {}, {}, create_synthetic_video(tmp_path))
+    manager.number_recognisers = []
+    image = np.random.default_rng(5).integers(0, 256, size=(1080, 1920, 3), dtype=np.uint8)
+    slightly_different_image = image.copy()
+    # A single value of the strip of the first player changes by one
+    slightly_different_image[MatchTemplateNumberRecogniser.BOTTOM_Y_FOR_SUBREGION + 100,
+                             InputDisplayObservationManager.LEFT_X_FOR_FINGERPRINT + 100, 0] ^= 1
+    strips_recognised = []
+    apply_observations_of_templates_for_player = manager.apply_observations_of_templates_for_player
+
+    def apply_and_count_observations_of_templates(frame, player, frame_number):
+        strips_recognised.append((frame_number, player))
+        apply_observations_of_templates_for_player(frame, player, frame_number)
+
+    manager.apply_observations_of_templates_for_player = apply_and_count_observations_of_templates
+    manager.apply_specific_observations_in_given_frames([Frame(image, 0), Frame(image.copy(), 1),
+                                                         Frame(slightly_different_image, 2)])
+
+    assert strips_recognised == [(0, Player.FIRST_PLAYER), (0, Player.SECOND_PLAYER), (2, Player.FIRST_PLAYER)]
+    assert sorted(manager.get_observations()) == [0, 1, 2]
@@ -0,0 +1,83 @@
+from typing import List, Dict
+
+import numpy as np
+
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.base.templates.Direction import Direction
+from move_parser_by_replay.base.templates.ListOfButtons import ListOfButtons
+from move_parser_by_replay.observers.input_display.InputDisplayObservation import InputDisplayObservation
+from move_parser_by_replay.observers.input_display.InputDisplayObserver import InputDisplayTemplateObserver
+from move_parser_by_replay.observers.input_display.InputDisplayRow import InputDisplayRow
+from move_parser_by_replay.observers.input_display.SequentialInputDisplayObserver import \
+    SequentialInputDisplayObserver
+from move_parser_by_replay.util.CSVHelper import CSVHelper
+from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
+from tests.observers.input_display.test_InputDisplayObservation import get_history_of_rows, get_observation_of_rows
+
+
+def test_sequential_observer_emits_rows_while_reading_the_video():
+    video = Video('./data/match1.mkv')
+    input_display_observer = InputDisplayTemplateObserver(video)
+    manager = input_display_observer.get_manager()
+    batches_of_rows: List[List[InputDisplayRow]] = []
+    sequential_observer = SequentialInputDisplayObserver(manager, video, on_rows_emitted=batches_of_rows.append)
+
+    sequential_observer.set_maximum_frame_to_look_at(2000)
+    sequential_observer.analyse_full_video()
+
+    final_list = sequential_observer.get_exact_final_list()
+    assert len(final_list) > 0
+    assert len(batches_of_rows) > 1
+    assert [row for batch in batches_of_rows for row in batch] == final_list
+    # Only the observations needed for the next merge are kept
+    assert len(manager.get_observations()) == 0
+
+    list_of_expected_input_displays = CSVHelper.read_input_display_from_csv('./data/match1-inputdisplay.csv',
+                                                                            input_display_observer)[:len(final_list)]
+    assert DiffLibWrapper.get_similarity_ratio_from_two_lists(list_of_expected_input_displays, final_list) > 0.5
+
+
+class ManagerOfGivenObservations:
+    observations: Dict[int, InputDisplayObservation]
+
+    def __init__(self, observations: Dict[int, InputDisplayObservation]):
+        self.observations = observations
+
+    def get_saved_observation_in_frame(self, frame_number: int) -> InputDisplayObservation:
+        return self.observations[frame_number]
+
+    def forget_observation_in_frame(self, frame_number: int) -> None:
+        self.observations.pop(frame_number, None)
+
+
+def get_final_list_of_observations(observations: Dict[int, InputDisplayObservation]) -> List[InputDisplayRow]:
+    sequential_observer = SequentialInputDisplayObserver(ManagerOfGivenObservations(observations), None)
+    for frame_number in sorted(observations):
+        sequential_observer.merge_observation_in_frame(frame_number)
+    sequential_observer.finish_receiving_frames()
+    return sequential_observer.get_exact_final_list()
+
+
+def test_noisy_probe_does_not_emit_rows_twice():
+    history = get_history_of_rows()
+    # Rows are observed often enough that only the right slide is likely
+    observations = {frame_number: get_observation_of_rows(history[offset:offset + 19], 10)
+                    for frame_number, offset in [(0, 9), (20, 6), (40, 3), (60, 0)]}
+    final_list = get_final_list_of_observations(dict(observations))
+
+    direction = Direction.from_arrays('8', np.zeros((4, 4, 3), dtype=np.uint8), None)
+    observations[40] = get_observation_of_rows([InputDisplayRow(direction, ListOfButtons([]), 50)] * 19, 10)
+
+    assert final_list == list(reversed(history[1:9 + 19]))
+    assert get_final_list_of_observations(observations) == final_list
+
+
+def test_display_filling_up_is_merged_with_observed_rows():
+    history = get_history_of_rows()
+    empty_row = InputDisplayRow.get_empty_row()
+    observations = {0: get_observation_of_rows(history[4:10] + [empty_row] * 13, 10),
+                    20: get_observation_of_rows(history[:10] + [empty_row] * 9, 10)}
+
+    assert observations[0].is_filling_up(Player.FIRST_PLAYER)
+    assert get_final_list_of_observations(observations) == list(reversed(history[1:10]))
@@ -0,0 +1,91 @@
+import bisect
+from typing import List, Dict, Optional
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.AbstractBinarySearchObserver import AbstractBinarySearchObserver
+from move_parser_by_replay.util.DiffLibWrapper import DiffLibWrapper
+from tests.base.test_Video import create_synthetic_video, get_frame_number_from_synthetic_frame
+
+
+class ObserverOfSyntheticFrameNumbers(AbstractBinarySearchObserver):
+    MAXIMUM_DISTANCE_TO_MERGE = 3
+
+    observations: Dict[int, int]
+    frames_read_by_seeking: List[int]
+
+    def __init__(self, video: Video):
+        super().__init__(video)
+        self.observations = {}
+        self.frames_read_by_seeking = []
+
+    def apply_specific_observations_in_frame(self, frame_number: int):
+        self.frames_read_by_seeking.append(frame_number)
+        super().apply_specific_observations_in_frame(frame_number)
+
+    def apply_specific_observations_in_given_frame(self, frame: Frame, frame_number: int):
+        self.observations[frame_number] = get_frame_number_from_synthetic_frame(frame.get_image_data())
+
+    def get_saved_observation_in_frame(self, frame_number: int):
+        return self.observations[frame_number]
+
+    def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> Optional[List]:
+        if second_frame - first_frame > self.MAXIMUM_DISTANCE_TO_MERGE:
+            return None
+        return list(range(self.observations[first_frame], self.observations[second_frame] + 1))
+
+
+class RecursiveObserverOfSyntheticFrameNumbers(ObserverOfSyntheticFrameNumbers):
+    def apply_base_observations_in_window(self, start_frame: int, end_frame: int) -> None:
+        middle_frame = (start_frame + end_frame) // 2
+
+        self.apply_observations_in_frame(middle_frame)
+
+        middle_frame_index = bisect.bisect_left(self.frame_numbers, middle_frame)
+        previous_frame = self.frame_numbers[middle_frame_index - 1]
+        next_frame = self.frame_numbers[middle_frame_index + 1]
+
+        merged_list_first_window = self.get_merge_observation_in_two_frames(previous_frame, middle_frame)
+        merged_list_second_window = self.get_merge_observation_in_two_frames(middle_frame, next_frame)
+        if merged_list_first_window is not None:
+            self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
+                                                                   merged_list_first_window)
+        if merged_list_second_window is not None:
+            self.exact_final_list = DiffLibWrapper.merge_sequences(self.exact_final_list,
+                                                                   merged_list_second_window)
+
+        continue_searching = end_frame - start_frame >= self.window_to_stop_searching
+        if continue_searching and merged_list_first_window is None:
+            self.apply_base_observations_in_window(start_frame, middle_frame - 1)
+        if continue_searching and merged_list_second_window is None:
+            self.apply_base_observations_in_window(middle_frame + 1, end_frame)
+
+
+def test_search_by_levels_matches_recursive_search_without_seeking(tmp_path):
+    observer = ObserverOfSyntheticFrameNumbers(create_synthetic_video(tmp_path))
+    observer.set_window_to_stop_searching(4)
+    recursive_observer = RecursiveObserverOfSyntheticFrameNumbers(create_synthetic_video(tmp_path))
+    recursive_observer.set_window_to_stop_searching(4)
+
+    observer.analyse_full_video()
+    recursive_observer.analyse_full_video()
+
+    assert observer.get_exact_final_list() == recursive_observer.get_exact_final_list()
+    assert observer.frame_numbers == recursive_observer.frame_numbers
+    assert observer.observations == recursive_observer.observations
+    assert observer.frames_read_by_seeking == []
+    assert len(recursive_observer.frames_read_by_seeking) > 0
+
+
+def test_frames_missing_from_the_ordered_pass_are_not_considered_observed(tmp_path, monkeypatch):
+    observer = ObserverOfSyntheticFrameNumbers(create_synthetic_video(tmp_path))
+    get_frames_from_static_list_as_iterator = observer.video.get_frames_from_static_list_as_iterator
+    # The pass stops after the first frame, as when the decoder fails in the middle of the video
+    monkeypatch.setattr(observer.video, 'get_frames_from_static_list_as_iterator',
+                        lambda needed_frames: get_frames_from_static_list_as_iterator(sorted(needed_frames)[:1]))
+
+    observer.apply_observations_in_frames([10, 20, 30])
+
+    assert observer.frames_read_by_seeking == [20, 30]
+    assert observer.observations == {10: 10, 20: 20, 30: 30}
+    assert observer.observed_frame_numbers == {10, 20, 30}
@@ -0,0 +1,155 @@
+import multiprocessing
+from dataclasses import dataclass
+from typing import List, Dict
+
+import pytest
+
+from move_parser_by_replay.base.Video import Video
+from move_parser_by_replay.observers.AbstractSequentialSearchObserver import AbstractSequentialSearchObserver
+from tests.base.test_Video import create_synthetic_video, get_frame_number_from_synthetic_frame
+
+
+@dataclass(frozen=True)
+class SyntheticColumn:
+    column_position: int
+    value: int
+
+    def get_column_position(self) -> int:
+        return self.column_position
+
+
+class ObserverOfSyntheticFrameNumbers(AbstractSequentialSearchObserver):
+    observations: Dict[int, List[SyntheticColumn]]
+    frames_per_observation: int
+    offset: int
+
+    def __init__(self, video: Video, frames_per_observation: int):
+        super().__init__(video, gap_size=3)
+        self.observations = {}
+        self.frames_per_observation = frames_per_observation
+        self.offset = 0
+
+    def set_offset(self, offset: int) -> None:
+        self.offset = offset
+
+    def get_number_of_frames_shown(self, frame_number_in_image: int) -> int:
+        return frame_number_in_image + 1
+
+    def apply_specific_observations_in_frame(self, frame_number: int):
+        frames_shown = self.get_number_of_frames_shown(get_frame_number_from_synthetic_frame(
+            self.get_frame_from_position(frame_number).get_image_data()))
+        # Each observation sees the last frames, as a frame meter does
+        values = range(max(0, frames_shown - self.frames_per_observation) + self.offset, frames_shown + self.offset)
+        self.observations[frame_number] = [SyntheticColumn(value, value) for value in values]
+
+    def get_saved_observation_in_frame(self, frame_number: int):
+        return self.observations[frame_number]
+
+    def set_saved_observation_in_frame(self, frame_number: int, observation) -> None:
+        self.observations[frame_number] = observation
+
+    def forget_observation_in_frame(self, frame_number: int) -> None:
+        self.observations.pop(frame_number, None)
+
+    def get_exact_list_from_frame(self, frame_number: int):
+        return self.observations[frame_number]
+
+    def get_merge_observation_in_two_frames(self, first_frame: int, second_frame: int) -> List:
+        return []
+
+    def is_observation_changed_between_frames(self, first_frame: int, second_frame: int) -> bool:
+        return self.observations[first_frame] != self.observations[second_frame]
+
+    def merge_two_sequences(self, first_sequence: List, second_sequence: List, last_change_in_frames: int,
+                            is_new_sequence: bool) -> List:
+        if len(first_sequence) == 0:
+            return second_sequence
+        return first_sequence + [item for item in second_sequence if item.value > first_sequence[-1].value]
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_parallel_analysis_keeps_settings_and_matches_sequential(tmp_path, monkeypatch, start_method):
+    monkeypatch.setattr(multiprocessing, 'Pool', multiprocessing.get_context(start_method).Pool)
+    sequential_observer = ObserverOfSyntheticFrameNumbers(create_synthetic_video(tmp_path), 5)
+    sequential_observer.set_offset(100)
+    sequential_observer.analyse_full_video()
+
+    parallel_observer = ObserverOfSyntheticFrameNumbers(create_synthetic_video(tmp_path), 5)
+    parallel_observer.set_offset(100)
+    parallel_observer.analyse_full_video_in_parallel(2)
+
+    assert parallel_observer.get_exact_final_list() == sequential_observer.get_exact_final_list()
+    assert [column.value for column in parallel_observer.get_exact_final_list()] == \
+        list(range(100, 100 + len(parallel_observer.get_exact_final_list())))
+    assert len(parallel_observer.get_exact_final_list()) > 10
+
+
+class ObserverOfSyntheticFramesWithIdlePeriod(ObserverOfSyntheticFrameNumbers):
+    FIRST_IDLE_FRAME = 9
+    LAST_IDLE_FRAME = 35
+
+    frames_observed: List[int]
+
+    def __init__(self, video: Video, frames_per_observation: int):
+        super().__init__(video, frames_per_observation)
+        self.frames_observed = []
+
+    def get_number_of_frames_shown(self, frame_number_in_image: int) -> int:
+        # The meter stays still while nothing happens, and then goes on where it stopped
+        idle_frames = min(max(0, frame_number_in_image - self.FIRST_IDLE_FRAME),
+                          self.LAST_IDLE_FRAME - self.FIRST_IDLE_FRAME)
+        return frame_number_in_image + 1 - idle_frames
+
+    def apply_specific_observations_in_frame(self, frame_number: int):
+        self.frames_observed.append(frame_number)
+        super().apply_specific_observations_in_frame(frame_number)
+
+
+def test_adaptive_gap_observes_fewer_frames_and_backfills_when_the_meter_moves_again(tmp_path):
+    fixed_observer = ObserverOfSyntheticFramesWithIdlePeriod(create_synthetic_video(tmp_path), 5)
+    fixed_observer.analyse_full_video()
+
+    adaptive_observer = ObserverOfSyntheticFramesWithIdlePeriod(create_synthetic_video(tmp_path), 5)
+    adaptive_observer.set_adaptive_gap_size(True)
+    adaptive_observer.analyse_full_video()
+
+    assert adaptive_observer.get_exact_final_list() == fixed_observer.get_exact_final_list()
+    assert len(adaptive_observer.frames_observed) < len(fixed_observer.frames_observed)
+    # Once the meter moves again, the frames of the normal gap skipped meanwhile are observed too
+    last_frame_before_moving = ObserverOfSyntheticFramesWithIdlePeriod.LAST_IDLE_FRAME - fixed_observer.gap_size
+    frames_after_idle_period = {frame_number for frame_number in fixed_observer.frames_observed
+                                if frame_number > last_frame_before_moving}
+    assert frames_after_idle_period.issubset(adaptive_observer.frames_observed)
+
+
+class ObserverOfSyntheticFramesScrollingFast(ObserverOfSyntheticFramesWithIdlePeriod):
+    MINIMUM_OVERLAP_TO_MERGE = 2
+    FIRST_FAST_FRAME = 20
+    LAST_FAST_FRAME = 35
+    EXTRA_ITEMS_PER_FAST_FRAME = 2
+
+    def get_number_of_frames_shown(self, frame_number_in_image: int) -> int:
+        # The meter moves three columns per frame for a while, faster than observations of the gap can align
+        fast_frames = min(max(0, frame_number_in_image - self.FIRST_FAST_FRAME),
+                          self.LAST_FAST_FRAME - self.FIRST_FAST_FRAME)
+        return frame_number_in_image + 1 + fast_frames * self.EXTRA_ITEMS_PER_FAST_FRAME
+
+
+def get_missing_values(observer: ObserverOfSyntheticFrameNumbers) -> List[int]:
+    values = [column.value for column in observer.get_exact_final_list()]
+    return sorted(set(range(values[-1] + 1)).difference(values))
+
+
+def test_adaptive_gap_narrows_while_observations_move_too_fast_to_align(tmp_path):
+    fixed_observer = ObserverOfSyntheticFramesScrollingFast(create_synthetic_video(tmp_path), 8)
+    fixed_observer.analyse_full_video()
+
+    adaptive_observer = ObserverOfSyntheticFramesScrollingFast(create_synthetic_video(tmp_path), 8)
+    adaptive_observer.set_adaptive_gap_size(True)
+    adaptive_observer.analyse_full_video()
+
+    # Only the observation that shows the meter going too fast misses columns, the next ones are looked at sooner
+    assert len(get_missing_values(fixed_observer)) > 1
+    assert len(get_missing_values(adaptive_observer)) == 1
+    assert adaptive_observer.get_exact_final_list()[-1] == fixed_observer.get_exact_final_list()[-1]
+    assert any(frame_number % adaptive_observer.gap_size != 0 for frame_number in adaptive_observer.frames_observed)
@@ -0,0 +1,59 @@
+import pickle
+
+import pytest
+
+from move_parser_by_replay.observers.LikelihoodMapForObservation import LikelihoodMapForObservation
+
+
+def get_example_map(observations) -> LikelihoodMapForObservation[str]:
+    likelihood_map = LikelihoodMapForObservation(total_weight=0)
+    for observation, weight in observations:
+        likelihood_map.add_observation(observation, weight)
+    return likelihood_map
+
+
+def test_equal_maps_have_equal_hash_whatever_the_order_of_observations():
+    first_map = get_example_map([('a', 3), ('b', 2), (None, 1)])
+    second_map = get_example_map([(None, 1), ('b', 2), ('a', 3)])
+
+    assert first_map == second_map
+    assert hash(first_map) == hash(second_map)
+
+
+def test_hash_is_updated_when_the_map_changes():
+    likelihood_map = get_example_map([('a', 3)])
+    first_hash = hash(likelihood_map)
+
+    likelihood_map.add_observation('b', 1)
+
+    assert hash(likelihood_map) != first_hash
+    assert hash(likelihood_map) == hash(get_example_map([('a', 3), ('b', 1)]))
+
+    likelihood_map.replace_weight_in_value_for_uncertainty('b')
+
+    assert hash(likelihood_map) == hash(get_example_map([('a', 3), (None, 1)]))
+
+
+def test_frozen_copy_cannot_change():
+    likelihood_map = get_example_map([('a', 3), (None, 2)])
+    frozen_map = likelihood_map.get_frozen_copy()
+
+    assert frozen_map == likelihood_map
+    assert hash(frozen_map) == hash(likelihood_map)
+    with pytest.raises(Exception):
+        frozen_map.add_observation('a', 1)
+    with pytest.raises(Exception):
+        frozen_map.replace_weight_in_value_for_uncertainty('a')
+
+    likelihood_map.add_observation('a', 1)
+    assert frozen_map.get_weight_for_specific_value('a') == 3
+
+
+def test_cached_hash_is_not_pickled():
+    likelihood_map = get_example_map([('a', 3)])
+    hash(likelihood_map)
+
+    unpickled_map = pickle.loads(pickle.dumps(likelihood_map))
+
+    assert unpickled_map.cached_hash is None
+    assert unpickled_map == likelihood_map
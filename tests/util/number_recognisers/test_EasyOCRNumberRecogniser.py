@@ -0,0 +1,65 @@
+from typing import List
+
+import numpy as np
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.util.number_recognisers.EasyOCRNumberRecogniser import EasyOCRNumberRecogniser
+
+
+class StubReader:
+    images_read_one_by_one: List[np.ndarray]
+    batches_read: List[List[np.ndarray]]
+
+    def __init__(self):
+        self.images_read_one_by_one = []
+        self.batches_read = []
+
+    @staticmethod
+    def get_matches(image: np.ndarray) -> List:
+        # The number read is the value of the pixels, found at the height of the image
+        return [([[1, image.shape[0]], [5, image.shape[0]], [5, 9], [1, 9]], str(int(image[0, 0, 0])), 0.75)]
+
+    def readtext(self, image: np.ndarray, **kwargs) -> List:
+        self.images_read_one_by_one.append(image)
+        return self.get_matches(image)
+
+    def readtext_batched(self, images: List[np.ndarray], **kwargs) -> List[List]:
+        self.batches_read.append(images)
+        return [self.get_matches(image) for image in images]
+
+
+def get_recogniser_with_stub_reader(monkeypatch) -> EasyOCRNumberRecogniser:
+    recogniser = EasyOCRNumberRecogniser()
+    reader = StubReader()
+    monkeypatch.setattr(recogniser, 'get_reader', lambda: reader)
+    return recogniser
+
+
+def get_region(number: int, height: int) -> Frame:
+    return Frame(np.full((height, 26, 3), number, dtype=np.uint8), 0)
+
+
+def test_regions_of_the_same_shape_are_read_in_one_batch(monkeypatch):
+    recogniser = get_recogniser_with_stub_reader(monkeypatch)
+    regions = [get_region(number, 40) for number in [3, 14, 7]]
+
+    numbers_by_region = recogniser.get_numbers_in_regions(regions)
+
+    reader = recogniser.get_reader()
+    assert len(reader.batches_read) == 1
+    assert reader.images_read_one_by_one == []
+    assert [[number.get_number() for number in numbers] for numbers in numbers_by_region] == [[3], [14], [7]]
+    assert all(numbers[0].get_confidence() == 0.75 for numbers in numbers_by_region)
+
+
+def test_regions_of_different_shapes_are_read_one_by_one(monkeypatch):
+    recogniser = get_recogniser_with_stub_reader(monkeypatch)
+    regions = [get_region(3, 40), get_region(14, 34), get_region(7, 40)]
+
+    numbers_by_region = recogniser.get_numbers_in_regions(regions)
+
+    reader = recogniser.get_reader()
+    assert reader.batches_read == []
+    assert len(reader.images_read_one_by_one) == 3
+    assert [[(number.get_number(), number.get_position().get_y()) for number in numbers]
+            for numbers in numbers_by_region] == [[(3, 40)], [(14, 34)], [(7, 40)]]
@@ -0,0 +1,75 @@
+import sys
+import types
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from move_parser_by_replay.util.number_recognisers import EasyOCRReaderRegistry as registry_module
+from move_parser_by_replay.util.number_recognisers.EasyOCRReaderRegistry import EasyOCRReaderRegistry
+
+
+class FakeReader:
+    languages_of_readers_built: List[List[str]] = []
+
+    languages: List[str]
+    images_read: List[np.ndarray]
+
+    def __init__(self, languages: List[str]):
+        self.languages = languages
+        self.images_read = []
+        FakeReader.languages_of_readers_built.append(languages)
+
+    def readtext(self, image: np.ndarray, **kwargs) -> List:
+        self.images_read.append(image)
+        return []
+
+
+@pytest.fixture
+def fake_reader(monkeypatch):
+    FakeReader.languages_of_readers_built = []
+    monkeypatch.setattr(registry_module, 'Reader', FakeReader)
+    EasyOCRReaderRegistry.clear()
+    yield FakeReader
+    EasyOCRReaderRegistry.clear()
+
+
+def test_reader_is_built_lazily_and_once_per_languages(fake_reader):
+    languages: Tuple[str, ...] = ('en', 'ja')
+
+    assert not EasyOCRReaderRegistry.is_reader_loaded()
+    reader = EasyOCRReaderRegistry.get_reader()
+
+    assert EasyOCRReaderRegistry.is_reader_loaded()
+    assert EasyOCRReaderRegistry.get_reader() is reader
+    assert not EasyOCRReaderRegistry.is_reader_loaded(languages)
+    assert EasyOCRReaderRegistry.get_reader(languages) is not reader
+    assert fake_reader.languages_of_readers_built == [['en'], ['en', 'ja']]
+
+
+def test_clear_forgets_the_readers(fake_reader):
+    reader = EasyOCRReaderRegistry.get_reader()
+
+    EasyOCRReaderRegistry.clear()
+
+    assert not EasyOCRReaderRegistry.is_reader_loaded()
+    assert EasyOCRReaderRegistry.get_reader() is not reader
+    assert len(fake_reader.languages_of_readers_built) == 2
+
+
+def test_warm_up_loads_the_reader_and_reads_once(fake_reader):
+    EasyOCRReaderRegistry.warm_up()
+
+    assert EasyOCRReaderRegistry.is_reader_loaded()
+    reader = EasyOCRReaderRegistry.get_reader()
+    assert [image.shape for image in reader.images_read] == [EasyOCRReaderRegistry.WARM_UP_IMAGE_SHAPE]
+    assert len(fake_reader.languages_of_readers_built) == 1
+
+
+def test_worker_after_fork_runs_torch_with_one_thread(monkeypatch):
+    threads_set = []
+    monkeypatch.setitem(sys.modules, 'torch', types.SimpleNamespace(set_num_threads=threads_set.append))
+
+    EasyOCRReaderRegistry.prepare_worker_after_fork()
+
+    assert threads_set == [EasyOCRReaderRegistry.THREADS_PER_WORKER_AFTER_FORK]
@@ -0,0 +1,38 @@
+import random
+from typing import List
+
+import pytest
+
+from move_parser_by_replay.util.ListWithMutableTail import ListWithMutableTail
+
+
+def test_replacing_tails_gives_same_list_than_splicing():
+    random_generator = random.Random(3)
+    expected_list: List[int] = []
+    list_with_mutable_tail: ListWithMutableTail[int] = ListWithMutableTail(8)
+
+    for step in range(500):
+        length = random_generator.randint(0, 8)
+        # As with merges, the tail that is replaced never gets shorter
+        new_items = [step] * random_generator.randint(length, length + 3)
+        assert list_with_mutable_tail.get_tail(length) == expected_list[max(0, len(expected_list) - length):]
+
+        list_with_mutable_tail.replace_tail(length, new_items)
+        expected_list[max(0, len(expected_list) - length):] = new_items
+        assert len(list_with_mutable_tail) == len(expected_list)
+
+    assert list_with_mutable_tail.to_list() == expected_list
+    assert len(list_with_mutable_tail.frozen_chunks) > 1
+
+
+def test_frozen_items_go_to_the_sink():
+    items_in_sink: List[int] = []
+    list_with_mutable_tail: ListWithMutableTail[int] = ListWithMutableTail(4, items_in_sink.extend)
+
+    for item in range(20):
+        list_with_mutable_tail.replace_tail(0, [item])
+
+    assert items_in_sink + list_with_mutable_tail.to_list() == list(range(20))
+    assert len(list_with_mutable_tail) == 20
+    with pytest.raises(ValueError):
+        list_with_mutable_tail.get_tail(len(list_with_mutable_tail.to_list()) + 1)
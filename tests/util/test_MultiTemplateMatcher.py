@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+import pytest
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.Player import Player
+from move_parser_by_replay.util.MultiTemplateMatcher import MultiTemplateMatcher
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+from move_parser_by_replay.util.button_recognisers.MatchTemplateButtonRecogniser import MatchTemplateButtonRecogniser
+from move_parser_by_replay.util.direction_recognisers.MatchTemplateDirectionRecogniser import \
+    MatchTemplateDirectionRecogniser
+from move_parser_by_replay.util.number_recognisers.MatchTemplateNumberRecogniser import MatchTemplateNumberRecogniser
+
+
+def get_example_image_and_templates():
+    random_generator = np.random.default_rng(7)
+    image = random_generator.integers(0, 256, size=(120, 40, 3), dtype=np.uint8)
+    image[30:50, 5:30] = 0
+
+    templates = {}
+    for index, (height, width) in enumerate([(20, 17), (12, 12), (20, 17), (15, 9), (12, 12)]):
+        y = int(random_generator.integers(0, image.shape[0] - height))
+        x = int(random_generator.integers(0, image.shape[1] - width))
+        templates[str(index)] = image[y:y + height, x:x + width].copy()
+    templates['flat'] = np.full((20, 17, 3), 9, dtype=np.uint8)
+    return image, templates
+
+
+def test_scores_are_the_same_as_open_cv():
+    image, templates = get_example_image_and_templates()
+
+    matcher = MultiTemplateMatcher(templates)
+    assert matcher.is_frequency_domain_faster(image)
+
+    scores_by_name = matcher.get_scores_of_templates_in_image(image)
+
+    for name, template in templates.items():
+        expected_scores = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        assert scores_by_name[name].shape == expected_scores.shape
+        assert np.allclose(scores_by_name[name], expected_scores, atol=1e-4)
+
+
+def test_matches_are_in_the_same_order_as_matching_each_template():
+    image, templates = get_example_image_and_templates()
+
+    matches = MultiTemplateMatcher(templates).search_templates_in_image(image, 0.7)
+
+    expected_matches = []
+    for name, template in templates.items():
+        locations = np.where(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED) >= 0.7)
+        expected_matches.extend((name, int(x), int(y)) for y, x in zip(*locations))
+    assert [(name, x, y) for name, x, y, _ in matches] == expected_matches
+
+
+@pytest.mark.parametrize('number_of_copies_side_by_side', [1, 5])
+def test_matches_in_rows_are_the_matches_around_the_centre_of_each_row(number_of_copies_side_by_side):
+    image, templates = get_example_image_and_templates()
+    # Wide color strips are searched row by row, narrow ones are scored once and sliced in rows
+    image = np.concatenate([image] * number_of_copies_side_by_side, axis=1)
+    rows = {1: (0, 30), 2: (30, 30), 3: (60, 30), 4: (90, 30)}
+    matcher = MultiTemplateMatcher(templates)
+    assert matcher.is_search_row_by_row_faster(image) == (number_of_copies_side_by_side > 1)
+
+    matches_by_row = matcher.search_templates_in_rows(image, rows, 2, 0.7)
+
+    for row_key, (top_y, row_height) in rows.items():
+        expected_matches = []
+        for name, x, y, score in matcher.search_templates_in_image(image, 0.7):
+            expected_y = top_y + (row_height - templates[name].shape[0]) // 2
+            if abs(y - expected_y) <= 2:
+                expected_matches.append((name, x, y))
+        assert [(name, x, y) for name, x, y, _ in matches_by_row[row_key]] == expected_matches
+
+
+@pytest.mark.parametrize('recogniser, is_frequency_domain_used', [(MatchTemplateButtonRecogniser, False),
+                                                                   (MatchTemplateDirectionRecogniser, True),
+                                                                   (MatchTemplateNumberRecogniser, True)])
+def test_frequency_domain_is_used_for_narrow_color_strips_of_the_input_display(recogniser, is_frequency_domain_used):
+    strip = recogniser.get_subregion(Frame(np.zeros((1080, 1920, 3), dtype=np.uint8)), Player.FIRST_PLAYER)
+    matcher = MultiTemplateMatcher({'0': np.zeros((18, 10, 3), dtype=np.uint8)})
+    grayscale_matcher = MultiTemplateMatcher({'0': np.zeros((18, 10), dtype=np.uint8)},
+                                             preprocessing=PreprocessingForTemplateMatching.GRAYSCALE)
+
+    assert matcher.is_frequency_domain_faster(strip.get_image_data()) == is_frequency_domain_used
+    assert not grayscale_matcher.is_frequency_domain_faster(
+        grayscale_matcher.get_preprocessed_image(strip.get_image_data()))
@@ -0,0 +1,83 @@
+import os
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from move_parser_by_replay.base.Frame import Frame
+from move_parser_by_replay.base.templates.Number import Number
+from move_parser_by_replay.util.NumberInReplayWrapper import NumberInReplayWrapper
+from move_parser_by_replay.util.PreprocessingForTemplateMatching import PreprocessingForTemplateMatching
+
+DIGIT_WIDTH = 12
+DIGIT_HEIGHT = 18
+
+
+def get_image_of_digit(digit: str) -> np.ndarray:
+    image = np.zeros((DIGIT_HEIGHT, DIGIT_WIDTH, 3), dtype=np.uint8)
+    cv2.putText(image, digit, (1, DIGIT_HEIGHT - 3), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 2)
+    return image
+
+
+def create_number_templates(folder, is_border_transparent: bool = False) -> Dict[str, Number]:
+    numbers = {}
+    for digit in '0123456789':
+        file_path = os.path.join(str(folder), digit + '.png')
+        image_with_alpha = cv2.cvtColor(get_image_of_digit(digit), cv2.COLOR_BGR2BGRA)
+        if is_border_transparent:
+            image_with_alpha[:2, :, 3] = 0
+        cv2.imwrite(file_path, image_with_alpha)
+        numbers[digit] = Number(file_path)
+    return numbers
+
+
+def create_strip_with_numbers(numbers_by_y: Dict[int, str], numbers: Dict[str, Number]) -> Frame:
+    strip = np.zeros((200, 60, 3), dtype=np.uint8)
+    for y, number in numbers_by_y.items():
+        for index, digit in enumerate(number):
+            template = numbers[digit].get_image()
+            x = 5 + index * template.shape[1]
+            strip[y:y + template.shape[0], x:x + template.shape[1]] = template
+    return Frame(strip)
+
+
+def test_numbers_are_found_with_their_confidence(tmp_path):
+    numbers = create_number_templates(tmp_path)
+    strip = create_strip_with_numbers({10: '12', 80: '7', 150: '40'}, numbers)
+
+    numbers_found = NumberInReplayWrapper.search_numbers_in_image_with_confidence(strip, numbers)
+
+    assert [(number, position) for number, position, _ in numbers_found] == \
+        NumberInReplayWrapper.search_numbers_in_image(strip, numbers)
+    assert [number for number, _, _ in numbers_found] == [12, 7, 40]
+    assert [position[1] for _, position, _ in numbers_found] == [10, 80, 150]
+    assert all(confidence > 0.99 for _, _, confidence in numbers_found)
+
+
+def test_numbers_in_rows_are_found_around_the_centre_of_each_row(tmp_path):
+    numbers = create_number_templates(tmp_path)
+    row_height = 40
+    rows = {row_key: ((row_key - 1) * row_height, row_height) for row_key in range(1, 6)}
+    top_y_of_digits = (row_height - numbers['0'].get_image().shape[0]) // 2
+    strip = create_strip_with_numbers({rows[1][0] + top_y_of_digits: '12', rows[4][0] + top_y_of_digits: '7'},
+                                      numbers)
+    matcher = NumberInReplayWrapper.get_matcher_for_numbers(numbers)
+
+    numbers_found = NumberInReplayWrapper.search_numbers_in_rows_with_confidence(strip, matcher, rows, 3)
+
+    assert [(number, position) for number, position, _ in numbers_found] == \
+        NumberInReplayWrapper.search_numbers_in_image(strip, numbers)
+
+
+def test_numbers_are_found_with_preprocessed_templates_and_alpha_masks(tmp_path):
+    numbers = create_number_templates(tmp_path, is_border_transparent=True)
+    strip = create_strip_with_numbers({10: '12', 80: '7', 150: '40'}, numbers)
+
+    for preprocessing in [PreprocessingForTemplateMatching.GRAYSCALE, PreprocessingForTemplateMatching.BINARY]:
+        matcher = NumberInReplayWrapper.get_matcher_for_numbers(numbers, preprocessing)
+        numbers_found = NumberInReplayWrapper.search_numbers_in_image_with_confidence(strip, numbers, matcher)
+
+        assert numbers['1'].get_mask(preprocessing) is not None
+        assert numbers['1'].get_preprocessed_image(preprocessing).ndim == 2
+        assert [(number, position) for number, position, _ in numbers_found] == \
+            [(12, (5, 10)), (7, (5, 80)), (40, (5, 150))]